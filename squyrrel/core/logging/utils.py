@@ -1,5 +1,64 @@
 
 
+import logging
+
+
+class LogSettings:
+    """Decides which debug records are emitted, before anything is formatted.
+
+    A record is emitted if its tag is enabled explicitly, or if the level of its tag
+    (see tag_levels) is at least level and the tag is not disabled.
+    """
+
+    tag_levels = {
+        None: logging.INFO,
+        'error': logging.ERROR,
+        'call': logging.DEBUG,
+        'gui_call': logging.DEBUG,
+        'signal': logging.DEBUG,
+    }
+    # level of tags not listed in tag_levels
+    default_tag_level = logging.DEBUG
+
+    def __init__(self, level=logging.INFO):
+        self.level = level
+        self.enabled_tags = set()
+        self.disabled_tags = set()
+        self._enabled = {}
+
+    def set_level(self, level):
+        self.level = level
+        self._enabled.clear()
+
+    def enable(self, *tags):
+        self.enabled_tags.update(tags)
+        self.disabled_tags.difference_update(tags)
+        self._enabled.clear()
+
+    def disable(self, *tags):
+        self.disabled_tags.update(tags)
+        self.enabled_tags.difference_update(tags)
+        self._enabled.clear()
+
+    def is_enabled(self, tags=None):
+        # called on every logged method call: a dict lookup once the decision for the tag is known
+        try:
+            return self._enabled[tags]
+        except KeyError:
+            pass
+        if tags in self.enabled_tags:
+            enabled = True
+        elif tags in self.disabled_tags:
+            enabled = False
+        else:
+            enabled = self.tag_levels.get(tags, self.default_tag_level) >= self.level
+        self._enabled[tags] = enabled
+        return enabled
+
+
+log_settings = LogSettings()
+
+
 def arguments_tostring(*args, **kwargs):
     kwargs_str = ', '.join(['{}={}'.format(key, repr(value)) for key, value in kwargs.items()])
     if args:
@@ -20,14 +79,20 @@ def format_return_value(caller_name, func, return_value):
     return f'-> ({caller_name}.{func.__name__}) ->: {repr(return_value)}\n'
 
 def log_call(squyrrel, caller_name, func, tags=None):
+    """Wraps func to log its calls and return values (if tags are enabled in log_settings).
+    The messages are passed to squyrrel.debug unformatted (as callables)."""
     if tags is None:
         tags = 'call'
     def wrapper(*args, **kwargs):
-        squyrrel.debug(format_func_call(caller_name, func, *args, **kwargs), tags=tags)
+        if not log_settings.is_enabled(tags):
+            return func(*args, **kwargs)
+        squyrrel.debug(lambda: format_func_call(caller_name, func, *args, **kwargs), tags=tags)
         squyrrel.debug_indent_level += 1
-        return_value = func(*args, **kwargs)
-        squyrrel.debug(format_return_value(caller_name, func, return_value))
-        squyrrel.debug_indent_level -= 1
+        try:
+            return_value = func(*args, **kwargs)
+        finally:
+            squyrrel.debug_indent_level -= 1
+        squyrrel.debug(lambda: format_return_value(caller_name, func, return_value), tags=tags)
         return return_value
     wrapper.__name__ = func.__name__
     return wrapper
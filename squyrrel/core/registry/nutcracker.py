@@ -18,6 +18,7 @@ from squyrrel.core.utils.singleton import Singleton
 from squyrrel.core.utils.paths import convert_path_to_import_string, find_first_parent
 from squyrrel.core.config.base import ConfigRegistry, IConfig
 from squyrrel.core.config.decorators import exclude_from_logging
+from squyrrel.core.logging.utils import log_settings
 
 __SQUYRREL_PACKAGE_NAME__ = 'squyrrel'
 
@@ -79,6 +80,11 @@ Packages not loaded (because they were filtered): {', '.join(filtered_packages)}
 
     @exclude_from_logging
     def debug(self, message, tags=None):
+        """message: text or a callable returning the text (only called if the record is emitted)"""
+        if not log_settings.is_enabled(tags) or not squyrrel_debug_signal.has_receivers:
+            return
+        if callable(message):
+            message = message()
         debug_text = self.format_debug_output(message)
         squyrrel_debug_signal.emit(debug_text, tags=tags)
 
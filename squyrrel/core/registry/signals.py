@@ -2,7 +2,8 @@ from squyrrel.core.signals import Signal
 from squyrrel.management.base import BaseCommand
 
 squyrrel_error_signal = Signal('squyrrel_error_signal')
-squyrrel_debug_signal = Signal('squyrrel_debug_signal')
+# replayed into the log file by the ide, keep the latest messages only
+squyrrel_debug_signal = Signal('squyrrel_debug_signal', caching=True, cache_size=10000)
 
 class_loaded_signal = Signal('class_loaded_signal')
 
@@ -12,4 +13,5 @@ def command_filter(*args, **kwargs):
     return cls_meta.has_ancestor(BaseCommand)
 
 
-command_loaded_signal = class_loaded_signal.filtered(command_filter)
+# commands loaded before the CommandManager exists are replayed by the ide (which turns the caching off then)
+command_loaded_signal = class_loaded_signal.filtered(command_filter, caching=True)
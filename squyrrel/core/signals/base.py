@@ -1,4 +1,5 @@
-from collections import deque
+import time
+from collections import deque, namedtuple
 
 from squyrrel.core.logging.utils import arguments_tostring
 
@@ -6,11 +7,14 @@ from squyrrel.core.logging.utils import arguments_tostring
 NO_NAME_SIGNAL = 'NO_NAME_SIGNAL'
 
 class Signal:
+    """With caching, the emissions are kept (to be replayed by clear_cache), at most cache_size of them
+    and none older than cache_max_age seconds, if these are given."""
 
-    def __init__(self, name=None, caching=True, before_emit_hook=None, apply_filter=None):
+    def __init__(self, name=None, caching=False, before_emit_hook=None, apply_filter=None,
+                 cache_size=None, cache_max_age=None):
         self._slots = []
         self.name = name or NO_NAME_SIGNAL
-        self.cache = SignalCache()
+        self.cache = SignalCache(max_size=cache_size, max_age=cache_max_age)
         self.caching = caching
         self.apply_filter = apply_filter or self.apply_filter
         self.children = []
@@ -65,13 +69,16 @@ class Signal:
     def apply_filter(self, *args, **kwargs):
         return True
 
+    @property
+    def has_receivers(self):
+        """Whether an emission reaches anybody (a slot, a child signal or the cache)"""
+        return bool(self._slots) or self.caching or any(child.has_receivers for child in self.children)
+
     def is_connected(self, slot):
         return slot in self._slots
 
     def clear_cache(self):
-        _cache = list(self.cache.cache)
-        self.cache.cache.clear()
-        return _cache
+        return self.cache.clear()
 
     def filtered(self, apply_filter, **kwargs):
         kwargs['apply_filter'] = apply_filter
@@ -83,25 +90,41 @@ class Signal:
         return f'Signal <{self.name}>'
 
 
-class SignalFreeze:
-
-    # replace by namedtuple
-
-    def __init__(self, args, kwargs):
-        self.args = args
-        self.kwargs = kwargs
+SignalFreeze = namedtuple('SignalFreeze', ['args', 'kwargs', 'timestamp'])
 
 
 class SignalCache:
 
-    def __init__(self):
-        self.cache = deque()
+    def __init__(self, max_size=None, max_age=None):
+        # with max_size, the oldest freezes are dropped by the deque
+        self.cache = deque(maxlen=max_size)
+        self.max_age = max_age
 
     def append(self, args, kwargs):
-        self.cache.append(SignalFreeze(args, kwargs))
+        now = time.monotonic()
+        self.cache.append(SignalFreeze(args, kwargs, now))
+        if self.max_age is not None:
+            self.drop_older_than(now - self.max_age)
+
+    def drop_older_than(self, timestamp):
+        while self.cache and self.cache[0].timestamp < timestamp:
+            self.cache.popleft()
 
     def popfirst(self):
+        if self.max_age is not None:
+            self.drop_older_than(time.monotonic() - self.max_age)
         try:
             return self.cache.popleft()
         except IndexError:
-            return None
\ No newline at end of file
+            return None
+
+    def clear(self):
+        """Removes and returns all freezes"""
+        if self.max_age is not None:
+            self.drop_older_than(time.monotonic() - self.max_age)
+        freezes = list(self.cache)
+        self.cache.clear()
+        return freezes
+
+    def __len__(self):
+        return len(self.cache)
@@ -0,0 +1,137 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncSqlDatabaseConnection:
+    """Async counterpart of SqlDatabaseConnection.
+
+    Executing a statement and fetching its rows is one awaitable (execute_fetchall, execute_fetchone),
+    so that coroutines sharing the connection cannot interleave between execute and fetch.
+    """
+
+    database_error_cls = None
+    integrity_error_cls = None
+    supports_returning = False
+    supports_window_functions = False
+
+    async def connect(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def execute(self, sql, params=None):
+        raise NotImplementedError
+
+    async def execute_fetchall(self, sql, params=None):
+        raise NotImplementedError
+
+    async def execute_fetchone(self, sql, params=None):
+        raise NotImplementedError
+
+    async def execute_insert(self, sql, params=None):
+        """Executes an INSERT and returns the row id of the inserted row (or None), see
+        SqlDatabaseConnection.lastrowid"""
+        raise NotImplementedError
+
+    async def commit(self):
+        raise NotImplementedError
+
+    async def rollback(self):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+
+class ExecutorAsyncConnection(AsyncSqlDatabaseConnection):
+    """Runs a (blocking) SqlDatabaseConnection in a bounded thread pool.
+
+    Pass either connection_cls (the connection is then created and connected on a worker thread,
+    see connect) or an already connected connection. The default of one worker keeps all calls
+    on the same thread, as required by sqlite connections.
+    """
+
+    def __init__(self, connection_cls=None, connection=None, max_workers=1, executor=None):
+        if connection_cls is None and connection is None:
+            raise ValueError('ExecutorAsyncConnection needs either connection_cls or connection')
+        self.connection_cls = connection_cls
+        self.connection = connection
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix='squyrrel_db')
+        self._own_executor = executor is None
+        # the wrapped connection has a single cursor: run one statement (and its fetch) at a time
+        self._lock = asyncio.Lock()
+
+    @property
+    def database_error_cls(self):
+        return (self.connection or self.connection_cls).database_error_cls
+
+    @property
+    def integrity_error_cls(self):
+        return (self.connection or self.connection_cls).integrity_error_cls
+
+    @property
+    def supports_returning(self):
+        return (self.connection or self.connection_cls).supports_returning
+
+    @property
+    def supports_window_functions(self):
+        return (self.connection or self.connection_cls).supports_window_functions
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+
+    async def connect(self, *args, **kwargs):
+        def connect():
+            connection = self.connection_cls()
+            connection.connect(*args, **kwargs)
+            return connection
+        self.connection = await self.run(connect)
+
+    def _execute_fetch(self, sql, params, fetch):
+        self.connection.execute(sql, params=params)
+        if fetch is None:
+            return None
+        return fetch()
+
+    async def execute(self, sql, params=None):
+        async with self._lock:
+            await self.run(self._execute_fetch, sql, params, None)
+
+    async def execute_fetchall(self, sql, params=None):
+        async with self._lock:
+            return await self.run(self._execute_fetch, sql, params, self.connection.fetchall)
+
+    async def execute_fetchone(self, sql, params=None):
+        async with self._lock:
+            return await self.run(self._execute_fetch, sql, params, self.connection.fetchone)
+
+    async def execute_insert(self, sql, params=None):
+        async with self._lock:
+            return await self.run(self._execute_fetch, sql, params, self.connection.lastrowid)
+
+    async def commit(self):
+        async with self._lock:
+            await self.run(self.connection.commit)
+
+    async def rollback(self):
+        async with self._lock:
+            await self.run(self.connection.rollback)
+
+    async def close(self):
+        if self.connection is not None:
+            await self.run(self.connection.close)
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+
+async def connect_sqlite(filename, **kwargs):
+    """Async sqlite connection: native (aiosqlite), if installed, otherwise SqliteConnection in a thread"""
+    try:
+        from squyrrel.db.sqlite.async_connection import AiosqliteConnection
+    except ImportError:
+        from squyrrel.db.sqlite.connection import SqliteConnection
+        connection = ExecutorAsyncConnection(SqliteConnection)
+    else:
+        connection = AiosqliteConnection()
+    await connection.connect(filename, **kwargs)
+    return connection
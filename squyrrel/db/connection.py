@@ -1,8 +1,18 @@
 
 class SqlDatabaseConnection:
 
+    # sql dialect, e.g. for choosing the SchemaIntrospector
+    dialect = None
     database_error_cls = None
     integrity_error_cls = None
+    # whether INSERT ... RETURNING is supported
+    supports_returning = False
+    # whether COUNT(*) OVER () can be selected (total and page in one statement)
+    supports_window_functions = False
+    # whether CREATE INDEX ... INCLUDE (covering columns) is supported
+    supports_index_include = False
+    # max. number of parameters of one statement (limits the rows of multi-row statements)
+    max_variables = 999
 
     def __init__(self):
         self.c = None
@@ -12,6 +22,11 @@ class SqlDatabaseConnection:
         self._cursor = self.c.cursor(*args, **kwargs)
         return self._cursor
 
+    def create_streaming_cursor(self, batch_size=None):
+        """Returns a new cursor (which does not replace self._cursor) for fetching big results in batches.
+        Backends which support server side cursors override this."""
+        return self.c.cursor()
+
     def close_cursor(self):
         if self._cursor is not None:
             self._cursor.close()
@@ -28,15 +43,35 @@ class SqlDatabaseConnection:
         self.close_cursor()
         self.close_connection()
 
+    def ping(self):
+        """Returns whether the connection is usable (health check of the ConnectionPool)"""
+        try:
+            cursor = self.c.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
     def execute(self, sql, cursor=None, params=None):
-        if cursor is not None:
-            self._cursor = cursor
-        else:
-            self.create_cursor()
+        """Executes sql on cursor if given (self._cursor is left as it is), otherwise on a new self._cursor"""
+        if cursor is None:
+            cursor = self.create_cursor()
         if params is not None:
-            self._cursor.execute(sql, params)
+            cursor.execute(sql, params)
         else:
-            self._cursor.execute(sql)
+            cursor.execute(sql)
+
+    def executemany(self, sql, seq_of_params, cursor=None):
+        if cursor is None:
+            cursor = self.create_cursor()
+        cursor.executemany(sql, seq_of_params)
+
+    def bulk_insert(self, sql, table, columns, rows):
+        """Inserts rows (value tuples in the order of columns) with the one-row INSERT statement sql.
+        Backends with a faster bulk load path (e.g. COPY) override this."""
+        self.executemany(sql, rows)
 
     def commit(self):
         self.c.commit()
@@ -50,6 +85,15 @@ class SqlDatabaseConnection:
         data = self._cursor.fetchall()
         return data
 
+    def fetchmany(self, size):
+        if self._cursor is None:
+            raise Exception('Cursor is None')
+        return self._cursor.fetchmany(size)
+
+    def lastrowid(self):
+        """Row id of the row inserted by the last statement (of the current cursor) or None"""
+        return getattr(self._cursor, 'lastrowid', None)
+
     def fetchone(self):
         if self._cursor is None:
             raise Exception('Cursor is None')
@@ -0,0 +1,16 @@
+
+
+class PoolException(Exception):
+    pass
+
+
+class PoolTimeoutException(PoolException):
+
+    def __init__(self, msg, timeout):
+        super().__init__(msg)
+        self.msg = msg
+        self.timeout = timeout
+
+
+class PoolClosedException(PoolException):
+    pass
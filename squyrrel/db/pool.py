@@ -0,0 +1,225 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from squyrrel.db.exceptions import PoolTimeoutException, PoolClosedException, PoolException
+
+
+class PooledConnection:
+    """Bookkeeping of a connection owned by a ConnectionPool"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.thread_id = threading.get_ident()
+
+    def is_expired(self, max_uses=None, max_age=None):
+        if max_uses is not None and self.uses >= max_uses:
+            return True
+        if max_age is not None and time.monotonic() - self.created_at >= max_age:
+            return True
+        return False
+
+
+class ConnectionPool:
+    """Thread safe pool of SqlDatabaseConnection objects.
+
+    connection_factory is called without arguments and has to return a connected SqlDatabaseConnection.
+    Connections are recycled after max_uses checkouts or max_age seconds and (if health_check)
+    pinged before they are handed out. With thread_affinity a thread gets the idle connection
+    it used last, if there is one (used for sqlite, see for_sqlite).
+    """
+
+    def __init__(self, connection_factory, min_size=1, max_size=10, checkout_timeout=30.0,
+                 health_check=True, max_uses=None, max_age=None, thread_affinity=False):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError(f'Invalid pool size: min_size={min_size}, max_size={max_size}')
+        self.connection_factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.thread_affinity = thread_affinity
+        # class of the created connections (its dialect flags), known after the first connection
+        self.connection_cls = None
+
+        self._condition = threading.Condition()
+        self._idle = []
+        self._in_use = {}
+        self._size = 0
+        self._closed = False
+
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._recycled = 0
+        self._health_check_failures = 0
+
+        for _ in range(min_size):
+            self._size += 1
+            self._idle.append(self._create())
+
+    @classmethod
+    def for_sqlite(cls, filename, min_size=1, max_size=5, **kwargs):
+        """Pool of sqlite connections with thread affinity. Note: every connection to ':memory:'
+        is a separate database, use a file (or a shared cache uri) to share data between connections"""
+        from squyrrel.db.sqlite.connection import SqliteConnection
+
+        connect_kwargs = kwargs.pop('connect_kwargs', {})
+
+        def connection_factory():
+            connection = SqliteConnection()
+            connection.connect(filename, check_same_thread=False, **connect_kwargs)
+            return connection
+
+        return cls(connection_factory, min_size=min_size, max_size=max_size, thread_affinity=True, **kwargs)
+
+    def _create(self):
+        connection = self.connection_factory()
+        self.connection_cls = type(connection)
+        return PooledConnection(connection)
+
+    def _take_idle(self, thread_id):
+        if not self._idle:
+            return None
+        if self.thread_affinity:
+            for i in range(len(self._idle) - 1, -1, -1):
+                if self._idle[i].thread_id == thread_id:
+                    return self._idle.pop(i)
+        return self._idle.pop()
+
+    def _discard(self, pooled):
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """Checks out a connection, waits at most timeout (default: checkout_timeout) seconds"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        thread_id = threading.get_ident()
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolClosedException('Connection pool is closed')
+                pooled = self._take_idle(thread_id)
+                if pooled is not None or self._size < self.max_size:
+                    break
+                remaining = start + timeout - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutException(
+                        f'Could not check out a connection within {timeout} seconds', timeout=timeout)
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            if pooled is None:
+                # reserve the slot, the connection is created outside of the lock
+                self._size += 1
+            wait_time = time.monotonic() - start
+            self._checkouts += 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+
+        try:
+            pooled = self._validate(pooled)
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        pooled.thread_id = thread_id
+        with self._condition:
+            self._in_use[id(pooled.connection)] = pooled
+        return pooled.connection
+
+    def _validate(self, pooled):
+        """Returns a usable pooled connection: the given one or a new one, if it is missing, expired or broken"""
+        if pooled is None:
+            return self._create()
+        if pooled.is_expired(self.max_uses, self.max_age):
+            self._discard(pooled)
+            with self._condition:
+                self._recycled += 1
+            return self._create()
+        if self.health_check and not pooled.connection.ping():
+            self._discard(pooled)
+            with self._condition:
+                self._health_check_failures += 1
+            return self._create()
+        return pooled
+
+    def release(self, connection, discard=False):
+        """Returns a checked out connection to the pool (discard: close it instead, e.g. after a broken connection)"""
+        with self._condition:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            raise PoolException('Connection was not checked out from this pool')
+        pooled.uses += 1
+
+        if not discard:
+            try:
+                # do not hand out connections within an open transaction
+                connection.close_cursor()
+                connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._condition:
+            if discard or self._closed or pooled.is_expired(self.max_uses, self.max_age):
+                self._size -= 1
+                if not discard and not self._closed:
+                    self._recycled += 1
+                discard = True
+            else:
+                self._idle.append(pooled)
+            self._condition.notify()
+        if discard:
+            self._discard(pooled)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        connection = self.acquire(timeout=timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self):
+        """Closes the idle connections, connections in use are closed when they are released"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'total_wait_time': self._total_wait_time,
+                'max_wait_time': self._max_wait_time,
+                'avg_wait_time': self._total_wait_time / self._checkouts if self._checkouts else 0.0,
+                'recycled': self._recycled,
+                'health_check_failures': self._health_check_failures,
+            }
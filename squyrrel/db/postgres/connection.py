@@ -1,11 +1,22 @@
+from itertools import count
+
 import psycopg2
 
 from squyrrel.db.connection import SqlDatabaseConnection
+from squyrrel.db.postgres.copy import copy_csv, COPY_NULL
 
 
 class PostgresConnection(SqlDatabaseConnection):
 
+    dialect = 'postgres'
     database_error_cls = psycopg2.Error
+    supports_returning = True
+    supports_window_functions = True
+    supports_index_include = True
+    # bind parameters are counted with an int16 in the wire protocol
+    max_variables = 65535
+
+    _streaming_cursor_ids = count(1)
 
     def connect(self, user, password, database, host="127.0.0.1", port=5432, select_version=False, **kwargs):
 
@@ -25,3 +36,17 @@ class PostgresConnection(SqlDatabaseConnection):
             self.execute("SELECT version();")
             record = self.fetchone()
             print("You are connected to - ", record,"\n")
+
+    def create_streaming_cursor(self, batch_size=None):
+        # named cursor: the result is kept on the server and transferred in chunks of itersize rows
+        cursor = self.c.cursor(name=f'squyrrel_stream_{next(self._streaming_cursor_ids)}')
+        if batch_size is not None:
+            cursor.itersize = batch_size
+        return cursor
+
+    def bulk_insert(self, sql, table, columns, rows):
+        # COPY streams all rows in one command, much faster than executemany (one round trip per row)
+        buffer = copy_csv(rows)
+        self.create_cursor()
+        self._cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+                                 f"WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
@@ -0,0 +1,26 @@
+import io
+
+# marker of NULL in the csv data of COPY (unquoted); a quoted "\N" is the string
+COPY_NULL = r'\N'
+
+
+def copy_csv_field(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, bool):
+        # accepted by integer and boolean columns
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_csv(rows):
+    """Buffer with rows (value tuples) in the csv format of COPY ... WITH (FORMAT csv, NULL '\\N'):
+    every value except None and numbers is quoted, so that empty strings stay empty strings"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(','.join(copy_csv_field(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,60 @@
+import asyncio
+import sqlite3
+
+import aiosqlite
+
+from squyrrel.db.async_connection import AsyncSqlDatabaseConnection
+
+
+class AiosqliteConnection(AsyncSqlDatabaseConnection):
+
+    database_error_cls = sqlite3.Error
+    integrity_error_cls = sqlite3.IntegrityError
+    supports_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+    supports_window_functions = sqlite3.sqlite_version_info >= (3, 25, 0)
+
+    def __init__(self):
+        self.c = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self, filename, foreign_keys=True, **kwargs):
+        self.filename = filename
+        self.c = await aiosqlite.connect(self.filename, **kwargs)
+        if foreign_keys:
+            await self.execute('PRAGMA foreign_keys = ON;')
+
+    async def _execute_fetch(self, sql, params, fetch):
+        async with self._lock:
+            cursor = await self.c.execute(sql, params if params is not None else ())
+            try:
+                if fetch == 'all':
+                    return await cursor.fetchall()
+                if fetch == 'one':
+                    return await cursor.fetchone()
+                if fetch == 'lastrowid':
+                    return cursor.lastrowid
+                return None
+            finally:
+                await cursor.close()
+
+    async def execute(self, sql, params=None):
+        await self._execute_fetch(sql, params, None)
+
+    async def execute_fetchall(self, sql, params=None):
+        return await self._execute_fetch(sql, params, 'all')
+
+    async def execute_fetchone(self, sql, params=None):
+        return await self._execute_fetch(sql, params, 'one')
+
+    async def execute_insert(self, sql, params=None):
+        return await self._execute_fetch(sql, params, 'lastrowid')
+
+    async def commit(self):
+        await self.c.commit()
+
+    async def rollback(self):
+        await self.c.rollback()
+
+    async def close(self):
+        if self.c is not None:
+            await self.c.close()
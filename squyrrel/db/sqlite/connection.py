@@ -5,13 +5,21 @@ from squyrrel.db.connection import SqlDatabaseConnection
 
 class SqliteConnection(SqlDatabaseConnection):
 
+    dialect = 'sqlite'
     database_error_cls = sqlite3.Error
     integrity_error_cls = sqlite3.IntegrityError
+    supports_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+    supports_window_functions = sqlite3.sqlite_version_info >= (3, 25, 0)
+    # SQLITE_MAX_VARIABLE_NUMBER default (999 before 3.32), see connect for the actual limit
+    max_variables = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
 
     def connect(self, filename, select_version=False, foreign_keys=True, **kwargs):
         self.filename = filename
 
         self.c = sqlite3.connect(self.filename, **kwargs)
+        if hasattr(self.c, 'getlimit'):
+            # python >= 3.11
+            self.max_variables = self.c.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
         if select_version:
             self.execute('SELECT sqlite_version();')
         if foreign_keys:
@@ -1,6 +1,8 @@
+import logging
 import os
 
 from squyrrel import Squyrrel
+from squyrrel.core.logging.utils import log_settings
 # from squyrrel.management.command_manager import CommandManager
 from squyrrel.ide.windows import cmd_window_factory, log_window_factory
 from squyrrel.core.registry.signals import (squyrrel_debug_signal, # squyrrel_error_signal
@@ -41,6 +43,8 @@ class App:
     def load_settings(self):
         self.config['root_path'] = os.getcwd()
         self.config['log_file'] = 'log.txt'
+        # the log window shows all method calls
+        log_settings.set_level(logging.DEBUG)
 
     def awake_squyrrel(self):
         self.squyrrel = Squyrrel() # root_path=self.config['root_path']
@@ -62,6 +66,8 @@ class App:
         for stamp in command_loaded_signal.clear_cache():
             # print(str(stamp.kwargs['class_meta']))
             self.cmd_mgr.on_command_loaded(*stamp.args, **stamp.kwargs)
+        # the command manager is connected to the signal now, later commands need not be cached
+        command_loaded_signal.caching = False
 
         script_reader_cls_meta = self.squyrrel.find_class_meta_by_name('ScriptReader', package_name='management', module_name='script_reader')
         self.script_reader = self.squyrrel.create_instance(script_reader_cls_meta)
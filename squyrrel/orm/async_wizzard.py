@@ -0,0 +1,232 @@
+from squyrrel.db.async_connection import AsyncSqlDatabaseConnection
+from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.orm.exceptions import DidNotFindObjectWithIdException, DidNotFindForeignIdException
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.expressions import Equals
+from squyrrel.sql.query import Query, DeleteQuery
+
+
+class AsyncQueryWizzard:
+    """Asyncio variant of the main QueryWizzard methods (get, get_by_id, get_all, count, create,
+    update_by_id, delete_by_id) on top of an AsyncSqlDatabaseConnection.
+
+    The queries are built, rendered and decoded by a (sync) QueryWizzard without connection,
+    so both produce the same sql. Only the execution differs.
+    """
+
+    def __init__(self, db: AsyncSqlDatabaseConnection, builder=None, query_cache=None, wizzard=None):
+        self.db = db
+        self.wizzard = wizzard or QueryWizzard(builder=builder, query_cache=query_cache)
+        self.last_sql_query = None
+
+    @property
+    def models(self):
+        return self.wizzard.models
+
+    def register_model(self, model_cls_meta, table_name):
+        self.wizzard.register_model(model_cls_meta, table_name)
+
+    def get_model(self, model):
+        return self.wizzard.get_model(model)
+
+    def get_model_by_table(self, table_name):
+        return self.wizzard.get_model_by_table(table_name)
+
+    async def commit(self):
+        await self.db.commit()
+
+    async def rollback(self):
+        await self.db.rollback()
+
+    async def execute_query(self, query):
+        sql, params = self.wizzard.render_query(query)
+        self.last_sql_query = query
+        await self.db.execute(sql, params)
+
+    async def fetchall(self, query):
+        sql, params = self.wizzard.render_query(query)
+        self.last_sql_query = query
+        return await self.db.execute_fetchall(sql, params)
+
+    async def fetchone(self, query):
+        sql, params = self.wizzard.render_query(query)
+        self.last_sql_query = query
+        return await self.db.execute_fetchone(sql, params)
+
+    async def execute_insert_query(self, model, insert_query):
+        """see QueryWizzard.execute_insert_query"""
+        id_field_name = model.id_field_name()
+        if self.db.supports_returning and id_field_name is not None:
+            row = await self.fetchone(insert_query.returning(id_field_name))
+            return row[0] if row else None
+        sql, params = self.wizzard.render_query(insert_query)
+        self.last_sql_query = insert_query
+        # the row id is read in the same call as the insert, no other statement can run in between
+        return await self.db.execute_insert(sql, params)
+
+    # read
+
+    async def get_by_id(self, model, id, raise_if_not_found=True, **kwargs):
+        model = self.get_model(model)
+        instance = await self.get(model, filter_condition=Equals.id_as_parameter(model, id), **kwargs)
+        if instance is None and raise_if_not_found:
+            raise DidNotFindObjectWithIdException(
+                msg=f'Did not find {model.__name__} with id {id}',
+                model_name=model.__name__,
+                id=id)
+        return instance
+
+    async def get(self,
+                  model,
+                  select_fields=None,
+                  exclude_fields=None,
+                  filter_condition=None,
+                  m2m_options=None,
+                  one_to_many_options=None,
+                  load_relations_entities=True,
+                  load_relations_aggregations=False,
+                  entity_format=EntityFormat.MODEL,
+                  prefetch=None):
+        query = self.wizzard.build_get_query(model,
+                                             select_fields=select_fields,
+                                             exclude_fields=exclude_fields,
+                                             filter_condition=filter_condition,
+                                             load_relations_aggregations=load_relations_aggregations)
+        row = await self.fetchone(query)
+        if row is None:
+            return None
+
+        data = query.row_decoder.to_dict(row, entity_format=entity_format)
+        entity_id = data.get(query.model.id_field_name())
+
+        for relations_dict, options, include_lazy in self.wizzard.get_relation_loads(
+                query.model,
+                load_relations_entities=load_relations_entities,
+                m2m_options=m2m_options,
+                one_to_many_options=one_to_many_options,
+                prefetch=prefetch,
+                entity_format=entity_format):
+            related = await self.load_relations_to_many_entities(query.model, [entity_id], relations_dict,
+                                                                  options, include_lazy=include_lazy)
+            data.update({relation_name: entities[entity_id] for relation_name, entities in related.items()})
+
+        return self.wizzard.build_get_response(query.model, data, entity_format)
+
+    async def get_all(self, query: Query, include_count=False, entity_format=EntityFormat.MODEL):
+        row_decoder = self.wizzard.prepare_get_all(query)
+        window_count = include_count and self.db.supports_window_functions
+        rows = await self.fetchall(self.wizzard.select_window_count(query) if window_count else query)
+        entities = row_decoder.decode_all(rows, entity_format=entity_format)
+        if include_count:
+            count = self.wizzard.window_count(query, rows) if window_count else None
+            if count is None:
+                count = await self.count(query.model, query=query) \
+                    if entities or (query.pagination and query.pagination.offset) else 0
+            return {'entities': entities, 'count': count}
+        return entities
+
+    async def count(self, model, filter_condition=None, filters=None, fulltext_search=None, query=None):
+        query = self.wizzard.build_count_query(model, filter_condition=filter_condition, filters=filters,
+                                               fulltext_search=fulltext_search, query=query)
+        data = await self.fetchone(query)
+        if data:
+            return int(data[0])
+        return 0
+
+    async def prefetch_relation_to_many(self, model, instance_ids, relation, options=None,
+                                        entity_format=EntityFormat.MODEL):
+        related = {instance_id: [] for instance_id in instance_ids}
+        instance_ids = list(related.keys())
+        chunk_size = self.wizzard.prefetch_chunk_size
+        for i in range(0, len(instance_ids), chunk_size):
+            query = self.wizzard.build_relation_to_many_prefetch_query(
+                model, instance_ids[i:i + chunk_size], relation, options)
+            parent_id_index = len(query.select_clause.items) - 1
+            row_decoder = self.wizzard.prepare_get_all(query)
+            for row in await self.fetchall(query):
+                related.setdefault(row[parent_id_index], []).append(
+                    row_decoder.decode(row, entity_format=entity_format))
+        return related
+
+    async def load_relations_to_many_entities(self, model, instance_ids, relations_dict, options,
+                                              include_lazy=False):
+        """see QueryWizzard.load_relations_to_many_entities"""
+        model = self.get_model(model)
+        entity_format = options.get('entity_format', EntityFormat.MODEL)
+        data = {}
+        for relation_name, relation, relation_options in self.wizzard.relations_to_load(model, relations_dict,
+                                                                                        options, include_lazy):
+            if relation_options is not None and relation_options.get('page_size', None) is not None:
+                data[relation_name] = {}
+                for instance_id in instance_ids:
+                    query = self.wizzard.build_relation_to_many_query(model, instance_id, relation,
+                                                                      relation_options)
+                    query.model = relation.foreign_model
+                    data[relation_name][instance_id] = await self.get_all(query, entity_format=entity_format)
+                continue
+            data[relation_name] = await self.prefetch_relation_to_many(model, instance_ids, relation,
+                                                                       options=relation_options,
+                                                                       entity_format=entity_format)
+        return data
+
+    # write
+
+    async def get_m21_value(self, relation, value):
+        if relation.load_all:
+            return int(value)
+        foreign_model = self.get_model(relation.foreign_model)
+        query = self.wizzard.build_simple_search_query(foreign_model,
+                                                       select_fields=[foreign_model.id_field_name()],
+                                                       search_column=relation.update_search_column,
+                                                       value=value)
+        data = await self.fetchone(query)
+        if data is None or data[0] is None:
+            raise DidNotFindForeignIdException(
+                f'Did not find {foreign_model.__name__} with {relation.update_search_column} = {value}',
+                field=relation.update_search_column)
+        return data[0]
+
+    async def create(self, model, data, return_created_object=True, commit=True):
+        model = self.get_model(model)
+        try:
+            m21_values = {}
+            for column, relation, value in self.wizzard.many_to_one_values(model, data):
+                m21_values[column] = await self.get_m21_value(relation, value)
+            inserted_id = await self.execute_insert_query(model,
+                                                          self.wizzard.insert_query(model, data, m21_values=m21_values))
+            for query in self.wizzard.get_related_to_many_insert_and_update_queries(model, inserted_id, data):
+                await self.execute_query(query)
+        except Exception as exc:
+            await self.rollback()
+            raise exc
+        else:
+            if commit:
+                await self.commit()
+        if return_created_object:
+            return await self.get_by_id(model, inserted_id, entity_format=EntityFormat.JSON)
+        return inserted_id
+
+    async def update_by_id(self, model, instance_id, data, prev_data, commit=True, return_updated_object=True):
+        model = self.get_model(model)
+        queries = self.wizzard.build_update_queries(model,
+                                                    filter_condition=Equals.id_as_parameter(model, instance_id),
+                                                    instance_id=instance_id,
+                                                    prev_data=prev_data,
+                                                    data=data)
+        try:
+            for query in queries:
+                await self.execute_query(query)
+        except Exception as exc:
+            await self.rollback()
+            raise exc
+        else:
+            if commit:
+                await self.commit()
+        if return_updated_object:
+            return await self.get_by_id(model, instance_id, entity_format=EntityFormat.JSON)
+
+    async def delete_by_id(self, model, instance_id, commit=True):
+        model = self.get_model(model)
+        await self.execute_query(DeleteQuery(model.table_name, Equals.id_as_parameter(model, instance_id)))
+        if commit:
+            await self.commit()
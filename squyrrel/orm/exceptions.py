@@ -44,3 +44,12 @@ class ModelNotFoundException(Exception):
 
     def __init__(self, model, models):
         super().__init__(f'Did not find model {str(model)}.\nRegistered models are: {models}')
+
+
+class TsvLoadException(Exception):
+
+    def __init__(self, msg, line_number=None, column=None):
+        super().__init__(msg)
+        self.msg = msg
+        self.line_number = line_number
+        self.column = column
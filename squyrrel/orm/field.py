@@ -35,28 +35,100 @@ class Field(Clonable):
         self.never_select = never_select
         self.print_options = print_options
 
+    def __get__(self, instance, owner):
+        # entities built by Model.hydrate() keep their values in a list on the instance
+        # instead of holding a clone of every field, see BoundField
+        if instance is None or '_field_values' not in instance.__dict__:
+            return self
+        slot = owner.meta().field_slots_by_id.get(id(self))
+        if slot is None:
+            return self
+        return BoundField.bound_class(type(self))(self, instance, slot)
+
     @property
     def value(self):
         return self._value
 
     @property
     def nice_value(self):
-        return self._value
+        return self.value
 
     @value.setter
     def value(self, value):
         self.set_value(value)
 
     def set_value(self, value):
-        self._value = value
+        self._value = self.to_value(value)
+
+    def to_value(self, value):
+        return value
+
+    def parse(self, text):
+        """Converts text (e.g. a cell of a tsv file) to the value stored in the db, an empty text is NULL"""
+        if text == '':
+            return None
+        return self.to_value(text)
 
     def __str__(self):
         value = self.nice_value
         return str(value) if value is not None else ''
 
 
+class BoundField:
+    """Lightweight view of a class level Field on a hydrated entity.
+
+    Instances are of a subclass of BoundField and of the class of the field (see bound_class), so the
+    methods and properties of the field class apply as they are. The value is read from and written into
+    the value list of the entity, the other attributes are looked up on the field.
+    """
+
+    __slots__ = ('field', 'instance', 'slot')
+
+    # field class -> bound class
+    _bound_classes = {}
+
+    def __init__(self, field, instance, slot):
+        self.field = field
+        self.instance = instance
+        self.slot = slot
+
+    @classmethod
+    def bound_class(cls, field_class):
+        bound_class = cls._bound_classes.get(field_class)
+        if bound_class is None:
+            bound_class = type(f'Bound{field_class.__name__}', (cls, field_class), {'__slots__': ()})
+            cls._bound_classes[field_class] = bound_class
+        return bound_class
+
+    @property
+    def value(self):
+        return self.instance._field_values[self.slot]
+
+    @value.setter
+    def value(self, value):
+        self.set_value(value)
+
+    def set_value(self, value):
+        self.instance.set_field_value(self.slot, self.field.to_value(value))
+
+    def clone(self, **kwargs):
+        field_clone = self.field.clone(**kwargs)
+        field_clone.value = self.value
+        return field_clone
+
+    def __getattr__(self, name):
+        if name in BoundField.__slots__:
+            raise AttributeError(name)
+        # attributes of the field (e.g. primary_key, nice_true)
+        return getattr(self.field, name)
+
+
 class IntegerField(Field):
-    pass
+
+    def parse(self, text):
+        if text == '':
+            return None
+        return int(text)
 
 
 class BooleanField(Field):
@@ -71,6 +143,16 @@ class BooleanField(Field):
     def nice_value(self):
         return self.nice_true if self.value else self.nice_false
 
+    def parse(self, text):
+        if text == '':
+            return None
+        lowered = text.lower()
+        if lowered in ('1', 'true', 't', 'yes', 'y', self.nice_true.lower()):
+            return True
+        if lowered in ('0', 'false', 'f', 'no', 'n', self.nice_false.lower()):
+            return False
+        raise ValueError(f'Invalid boolean value: {text!r}')
+
 
 class StringField(Field):
 
@@ -83,6 +165,10 @@ class StringField(Field):
         self.collate = kwargs.pop('collate', None)
         super().__init__(*args, **kwargs)
 
+    def parse(self, text):
+        # an empty cell is an empty string
+        return text
+
 
 class CongregateField(Field):
     clone_attributes = Field.clone_attributes + ['attr']
@@ -91,6 +177,13 @@ class CongregateField(Field):
         self.attr = kwargs.pop('attr', None)
         super().__init__(*args, **kwargs)
 
+    def __get__(self, instance, owner):
+        if instance is None or '_field_values' not in instance.__dict__:
+            return self
+        instance_field = self.clone()
+        instance_field.value = instance.get_value(self.attr)
+        return instance_field
+
 
 class DateTimeField(Field):
     DEFAULT_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
@@ -104,15 +197,20 @@ class DateTimeField(Field):
         self.ancient = kwargs.pop('ancient', self.DEFAULT_ANCIENT)
         super().__init__(*args, **kwargs)
 
-    def set_value(self, value):
-        # print('set_value')
-        # print(value)
+    def to_value(self, value):
         if isinstance(value, datetime):
-            self._value = value.strftime(self.timestamp_format)
-        elif value == 'now':
-            self._value = self.now()
-        else:
-            self._value = value
+            return value.strftime(self.timestamp_format)
+        if value == 'now':
+            return self.now()
+        return value
+
+    def parse(self, text):
+        if text == '':
+            return None
+        if text == 'now':
+            return self.now()
+        # validates the text, the value is stored in timestamp_format
+        return self.to_value(datetime.strptime(text, self.timestamp_format))
 
     def now(self):
         return datetime.now().strftime(self.timestamp_format)
@@ -188,6 +286,12 @@ class Relation:
         self.name = name
         self.print_options = print_options
 
+    def __get__(self, instance, owner):
+        # hydrated entities clone their relations only on first access
+        if instance is None or '_field_values' not in instance.__dict__:
+            return self
+        return instance.bind_relation(self)
+
 
 class ManyToOne(Relation):
 
@@ -0,0 +1,145 @@
+from squyrrel.sql.expressions import Equals, Parameter, SqlFragment
+from squyrrel.sql.join import OnJoinCondition
+from squyrrel.sql.query import DdlQuery
+from squyrrel.sql.references import ColumnReference
+from squyrrel.sql.utils import sanitize_column_reference
+
+
+class FulltextSearchBackend:
+    """Index based search over Model.fulltext_search_columns, used by QueryBuilder.fulltext_search
+    if set as QueryWizzard.fulltext_backend (otherwise the columns are searched with LIKE).
+
+    The index is created by create_queries (see MigrationManager.build_fulltext_search_index).
+    Only columns of the model's own table can be indexed.
+    """
+
+    # direction of rank_expression for the best matches first
+    rank_ascending = True
+
+    def search_columns(self, model):
+        if not model.fulltext_search_columns:
+            raise ValueError(f'{model.__name__} has no fulltext_search_columns')
+        columns = []
+        for column in model.fulltext_search_columns:
+            column = sanitize_column_reference(column)
+            if column.table != model.table_name:
+                raise ValueError(f'Fulltext index of {model.__name__} cannot contain column {column.reference} '
+                                 f'of another table')
+            columns.append(column.name)
+        return columns
+
+    def search_join(self, model):
+        """(table, join condition) joined (inner) to the model's table for the search, or None"""
+        return None
+
+    def search_condition(self, model, search_value):
+        raise NotImplementedError
+
+    def rank_expression(self, model, search_value):
+        raise NotImplementedError
+
+    def create_queries(self, model):
+        raise NotImplementedError
+
+    @staticmethod
+    def search_terms(search_value):
+        return str(search_value).split()
+
+
+class Fts5SearchBackend(FulltextSearchBackend):
+    """sqlite: FTS5 table <table>_fts with the content of the model's table, kept in sync by triggers.
+    The search joins the fts table once (by rowid) and ranks by its rank column.
+    Every search term matches the words starting with it."""
+
+    rank_ascending = True
+
+    def __init__(self, tokenize='unicode61 remove_diacritics 2'):
+        self.tokenize = tokenize
+
+    @staticmethod
+    def fts_table(model):
+        return f'{model.table_name}_fts'
+
+    def match_value(self, search_value):
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in self.search_terms(search_value))
+
+    def id_column(self, model):
+        return ColumnReference(model.id_field_name(), table=model.table_name)
+
+    def search_join(self, model):
+        fts_table = self.fts_table(model)
+        return fts_table, OnJoinCondition(Equals(ColumnReference('rowid', table=fts_table), self.id_column(model)))
+
+    def search_condition(self, model, search_value):
+        # columns: the columns of the fts table are not model fields
+        return SqlFragment(f'{self.fts_table(model)} MATCH ?',
+                           parameters=[Parameter(self.match_value(search_value))],
+                           columns=[self.id_column(model)])
+
+    def rank_expression(self, model, search_value):
+        # bm25, smaller is better
+        return SqlFragment(f'{self.fts_table(model)}.rank', columns=[self.id_column(model)])
+
+    def create_queries(self, model):
+        table = model.table_name
+        fts_table = self.fts_table(model)
+        id_field_name = model.id_field_name()
+        columns = self.search_columns(model)
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        delete_old = (f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) "
+                      f"VALUES ('delete', old.{id_field_name}, {old_values});")
+        insert_new = f'INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.{id_field_name}, {new_values});'
+        return [
+            DdlQuery(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({column_list}, "
+                     f"content='{table}', content_rowid='{id_field_name}', tokenize='{self.tokenize}')"),
+            DdlQuery(f'CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN\n'
+                     f'    {insert_new}\nEND'),
+            DdlQuery(f'CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN\n'
+                     f'    {delete_old}\nEND'),
+            DdlQuery(f'CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE ON {table} BEGIN\n'
+                     f'    {delete_old}\n    {insert_new}\nEND'),
+            # index the rows which already exist
+            DdlQuery(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')"),
+        ]
+
+
+class TsvectorSearchBackend(FulltextSearchBackend):
+    """Postgres: generated tsvector column (default search_vector) of the search columns with a GIN index.
+    Every search term matches the lexemes starting with it (needs Postgres >= 12)."""
+
+    rank_ascending = False
+
+    def __init__(self, config='simple', column_name='search_vector'):
+        self.config = config
+        self.column_name = column_name
+
+    def vector_column(self, model):
+        return ColumnReference(self.column_name, table=model.table_name)
+
+    def tsquery_value(self, search_value):
+        return ' & '.join("'{}':*".format(term.replace("'", "''").replace('\\', '\\\\'))
+                          for term in self.search_terms(search_value))
+
+    def search_condition(self, model, search_value):
+        vector_column = self.vector_column(model)
+        return SqlFragment(f"{vector_column.reference} @@ to_tsquery('{self.config}', ?)",
+                           parameters=[Parameter(self.tsquery_value(search_value))],
+                           columns=[vector_column])
+
+    def rank_expression(self, model, search_value):
+        vector_column = self.vector_column(model)
+        return SqlFragment(f"ts_rank({vector_column.reference}, to_tsquery('{self.config}', ?))",
+                           parameters=[Parameter(self.tsquery_value(search_value))],
+                           columns=[vector_column])
+
+    def create_queries(self, model):
+        table = model.table_name
+        document = " || ' ' || ".join(f"coalesce({column}, '')" for column in self.search_columns(model))
+        return [
+            DdlQuery(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {self.column_name} tsvector "
+                     f"GENERATED ALWAYS AS (to_tsvector('{self.config}', {document})) STORED"),
+            DdlQuery(f'CREATE INDEX IF NOT EXISTS {table}_{self.column_name}_idx '
+                     f'ON {table} USING GIN ({self.column_name})'),
+        ]
@@ -0,0 +1,24 @@
+class Index:
+    """Index declaration of a model (see Model.indexes), e.g.
+    Index('author_id', 'title')                         composite
+    Index('title', where='deleted = 0')                 partial (where is sql)
+    Index('author_id', include=['title'])               covering
+    Without INCLUDE support (sqlite) the include columns are appended to the key, except for unique indexes.
+    """
+
+    def __init__(self, *columns, name=None, unique=False, where=None, include=None):
+        if not columns:
+            raise ValueError('Index needs at least one column')
+        self.columns = list(columns)
+        self.name = name
+        self.unique = unique
+        self.where = where
+        self.include = list(include) if include else []
+
+    def index_name(self, table_name):
+        if self.name is not None:
+            return self.name
+        return '_'.join([table_name, *self.columns, 'idx'])
+
+    def __repr__(self):
+        return f"Index({', '.join(self.columns)})"
@@ -0,0 +1,112 @@
+import hashlib
+from bisect import bisect_left
+from collections import deque
+
+
+class QueryEvent:
+    """Timings (in seconds) of one executed statement"""
+
+    __slots__ = ('sql', 'params', 'execute_time', 'fetch_time', 'rows', 'hydration_time', 'fingerprint')
+
+    def __init__(self, sql, params, execute_time):
+        self.sql = sql
+        self.params = params
+        self.execute_time = execute_time
+        self.fetch_time = 0.0
+        self.rows = 0
+        self.hydration_time = 0.0
+        self.fingerprint = None
+
+    @property
+    def duration(self):
+        """Wall time spent in the db (execute and fetch)"""
+        return self.execute_time + self.fetch_time
+
+    def __repr__(self):
+        return f'QueryEvent({self.fingerprint}, {self.duration * 1000:.2f} ms, {self.rows} rows)'
+
+
+class QueryShapeStats:
+    """Aggregated timings of all statements with the same sql (i.e. the same query shape)"""
+
+    def __init__(self, sql, fingerprint, buckets):
+        self.sql = sql
+        self.fingerprint = fingerprint
+        self.buckets = buckets
+        # histogram[i]: number of statements with duration <= buckets[i], the last one counts the rest
+        self.histogram = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.hydration_time = 0.0
+
+    def add(self, event):
+        duration = event.duration
+        self.count += 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.rows += event.rows
+        self.hydration_time += event.hydration_time
+        self.histogram[bisect_left(self.buckets, duration)] += 1
+
+    @property
+    def avg_time(self):
+        return self.total_time / self.count if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            'fingerprint': self.fingerprint,
+            'sql': self.sql,
+            'count': self.count,
+            'total_time': self.total_time,
+            'avg_time': self.avg_time,
+            'max_time': self.max_time,
+            'rows': self.rows,
+            'hydration_time': self.hydration_time,
+            'histogram': dict(zip([*self.buckets, float('inf')], self.histogram)),
+        }
+
+
+class QueryInstrumentation:
+    """Collects the QueryEvents of a QueryWizzard: aggregates them per query shape, keeps the
+    statements slower than slow_query_threshold (seconds) in a bounded log and passes every
+    event to the hooks (callables taking the event), e.g. to feed a metrics system."""
+
+    default_buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self, slow_query_threshold=None, slow_query_log_size=100, buckets=None, hooks=None):
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_queries = deque(maxlen=slow_query_log_size)
+        self.buckets = tuple(buckets or self.default_buckets)
+        self.hooks = list(hooks or [])
+        self.shapes = {}
+
+    @staticmethod
+    def fingerprint(sql):
+        return hashlib.sha1(sql.encode('utf8')).hexdigest()[:16]
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def record(self, event):
+        stats = self.shapes.get(event.sql)
+        if stats is None:
+            stats = self.shapes[event.sql] = QueryShapeStats(event.sql, self.fingerprint(event.sql), self.buckets)
+        event.fingerprint = stats.fingerprint
+        stats.add(event)
+        if self.slow_query_threshold is not None and event.duration >= self.slow_query_threshold:
+            self.slow_queries.append(event)
+        for hook in self.hooks:
+            hook(event)
+
+    def stats(self):
+        """Stats per query shape, slowest (total time) first"""
+        return [stats.to_dict() for stats in sorted(self.shapes.values(), key=lambda s: s.total_time, reverse=True)]
+
+    def reset(self):
+        self.shapes.clear()
+        self.slow_queries.clear()
@@ -1,6 +1,8 @@
+from squyrrel.orm.schema import SqliteSchemaIntrospector, PostgresSchemaIntrospector, TableRebuild, Backfill
 from squyrrel.orm.wizzard import QueryWizzard
 from squyrrel.sql.clauses import InsertClause, ValuesClause
-from squyrrel.sql.query import BatchInsertQuery, InsertQuery, CreateManyToManyJunctionTableQuery
+from squyrrel.sql.query import (BulkInsertQuery, InsertQuery, CreateManyToManyJunctionTableQuery, CreateIndexQuery,
+                                CreateTableClause, DdlQuery)
 
 
 class MigrationManager:
@@ -29,47 +31,231 @@ class MigrationManager:
     def add_create_query(self, key, model, if_not_exists=False):
         self.add_query(key, query=self.qw.build_create_table_query(model, if_not_exists=if_not_exists))
 
+    def run(self, key):
+        """Executes the queries of key: consecutive queries in one transaction,
+        table rebuilds and backfills (see squyrrel.orm.schema) on their own"""
+        pending = []
+        for query in self.queries[key]:
+            if isinstance(query, (TableRebuild, Backfill)):
+                if pending:
+                    self.qw.execute_queries_in_transaction(pending)
+                    pending = []
+                query.run(self.qw)
+            else:
+                pending.append(query)
+        if pending:
+            self.qw.execute_queries_in_transaction(pending)
+
     def write_queries_to_file(self, key, file):
         for query in self.queries[key]:
-            file.write('\n' + repr(query) + '\n')
+            if isinstance(query, BulkInsertQuery):
+                file.write('\n' + query.to_literal_sql() + '\n')
+            else:
+                file.write('\n' + repr(query) + '\n')
 
-    def build_db_m2m_tables(self, key, models):
-        junction_tables = []
+    def junction_tables(self, models):
+        """(model, m2m relation, foreign model) for every junction table of the models, the first relation
+        of each junction table (its model is the first column of the table)"""
+        junction_table_names = set()
         for model in models:
             for m2m_relation_name, m2m_relation in model.many_to_many_relations():
                 junction_table_name = m2m_relation.junction_table.name
-                if junction_table_name in junction_tables:
+                if junction_table_name in junction_table_names:
                     continue
-                query = CreateManyToManyJunctionTableQuery(model1=model,
-                                                           model2=self.qw.get_model(m2m_relation.foreign_model),
-                                                           junction_table_name=m2m_relation.junction_table)
-                junction_tables.append(junction_table_name)
-                self.add_query(key, query)
+                junction_table_names.add(junction_table_name)
+                yield model, m2m_relation, self.qw.get_model(m2m_relation.foreign_model)
+
+    @staticmethod
+    def junction_index_query(m2m_relation, foreign_model, if_not_exists=False):
+        # the primary key (column1, column2) serves the lookups by column1 only
+        column = foreign_model.id_field_name()
+        return CreateIndexQuery(f'{m2m_relation.junction_table.name}_{column}_idx',
+                                m2m_relation.junction_table, [column], if_not_exists=if_not_exists)
+
+    def build_db_m2m_tables(self, key, models, build_indexes=True, if_not_exists=False):
+        for model, m2m_relation, foreign_model in self.junction_tables(models):
+            query = CreateManyToManyJunctionTableQuery(model1=model,
+                                                       model2=foreign_model,
+                                                       junction_table_name=m2m_relation.junction_table,
+                                                       if_not_exists=if_not_exists)
+            self.add_query(key, query)
+            if build_indexes:
+                self.add_query(key, self.junction_index_query(m2m_relation, foreign_model, if_not_exists=if_not_exists))
+
+    def build_indexes(self, key, models, if_not_exists=False):
+        """Adds the CREATE INDEX queries of the models (see QueryWizzard.build_create_index_queries)"""
+        names = set()
+        for model in models:
+            for query in self.qw.build_create_index_queries(model, if_not_exists=if_not_exists):
+                if query.name not in names:
+                    names.add(query.name)
+                    self.add_query(key, query)
+
+    def build_fulltext_search_index(self, key, models):
+        """Adds the statements creating the index of the fulltext_backend of the query wizzard
+        for all models with fulltext_search_columns"""
+        backend = self.qw.fulltext_backend
+        if backend is None:
+            raise ValueError('The query wizzard has no fulltext_backend')
+        for model in models:
+            model = self.qw.get_model(model)
+            if model.fulltext_search_columns:
+                self.add_queries(key, backend.create_queries(model))
 
-    def build_db_schema(self, key, models, if_not_exists=False, build_m2m_junction_tables=True):
+    def build_db_schema(self, key, models, if_not_exists=False, build_m2m_junction_tables=True,
+                        build_indexes=True):
         self.add_query_key(key)
         for model in models:
             self.add_create_query(key, model, if_not_exists=if_not_exists)
         if build_m2m_junction_tables:
-            self.build_db_m2m_tables(key, models=models)
+            self.build_db_m2m_tables(key, models=models, build_indexes=build_indexes, if_not_exists=if_not_exists)
+        if build_indexes:
+            self.build_indexes(key, models=models, if_not_exists=if_not_exists)
+        if self.qw.fulltext_backend is not None:
+            self.build_fulltext_search_index(key, models=models)
 
     def add_insert(self, key, model, columns, values):
         insert_clause = InsertClause(model.table_name, columns)
         values_clause = ValuesClause(values)
         self.add_query(key, InsertQuery(model.table_name, insert_clause=insert_clause, values_clause=values_clause))
 
-    def add_batch_inserts(self, key, table_name, columns, rows, rows_per_batch=500):
-        insert_clause = InsertClause(table_name, columns)
-
+    def add_batch_inserts(self, key, table_name, columns, rows, rows_per_batch=None):
+        """Adds parameterized bulk inserts of rows (value tuples in the order of columns).
+        The rows are split into batches of rows_per_batch rows (default: one batch)"""
         num_rows_total = len(rows)
         if num_rows_total < 1:
             return None
-        if num_rows_total < rows_per_batch:
+        if rows_per_batch is None or num_rows_total < rows_per_batch:
             rows_per_batch = num_rows_total
 
-        chunks = [rows[x:x+rows_per_batch] for x in range(0, num_rows_total, rows_per_batch)]
-
         queries = [
-            BatchInsertQuery(table_name, insert_clause=insert_clause, rows=chunk) for chunk in chunks
+            BulkInsertQuery(table_name, columns, rows[x:x + rows_per_batch])
+            for x in range(0, num_rows_total, rows_per_batch)
         ]
         self.add_queries(key, queries)
+
+    # incremental migrations
+
+    def introspect(self):
+        """Tables of the live database (table name -> squyrrel.orm.schema.TableInfo)"""
+        dialect = self.qw.db.dialect
+        if dialect == 'sqlite':
+            return SqliteSchemaIntrospector(self.qw).tables()
+        if dialect == 'postgres':
+            return PostgresSchemaIntrospector(self.qw).tables()
+        raise ValueError(f'No schema introspection for the dialect {dialect}')
+
+    def build_migration(self, key, models, drop_columns=False, build_indexes=True):
+        """Adds the steps which migrate the live database to the models (only the differences):
+        missing tables and junction tables, new, changed and (if drop_columns) removed columns,
+        missing indexes. Sqlite tables are rebuilt where ALTER TABLE cannot do the change.
+        Tables and indexes which are not in the models are not dropped. Returns the steps."""
+        self.add_query_key(key)
+        tables = self.introspect()
+        models = [self.qw.get_model(model) for model in models]
+        changed_tables = set()
+        for model in models:
+            table = tables.get(model.table_name)
+            if table is None:
+                self.add_create_query(key, model)
+                changed_tables.add(model.table_name)
+            elif self.build_alter_table(key, model, table, drop_columns=drop_columns):
+                changed_tables.add(model.table_name)
+        for model, m2m_relation, foreign_model in self.junction_tables(models):
+            if m2m_relation.junction_table.name not in tables:
+                self.add_query(key, CreateManyToManyJunctionTableQuery(model1=model,
+                                                                       model2=foreign_model,
+                                                                       junction_table_name=m2m_relation.junction_table))
+        if build_indexes:
+            self.build_missing_indexes(key, models, tables)
+        backend = self.qw.fulltext_backend
+        if backend is not None and self.qw.db.dialect == 'sqlite':
+            # the triggers of the fulltext index are dropped with a rebuilt table
+            for model in models:
+                if model.table_name in changed_tables and model.fulltext_search_columns:
+                    self.add_queries(key, backend.create_queries(model))
+        return self.queries[key]
+
+    def build_alter_table(self, key, model, table, drop_columns=False):
+        """Adds the steps for the columns of an existing table, returns whether the table is rebuilt"""
+        create_query = self.qw.build_create_table_query(model)
+        introspector_cls = SqliteSchemaIntrospector if self.qw.db.dialect == 'sqlite' else PostgresSchemaIntrospector
+        normalize_type = introspector_cls(self.qw).normalize_type
+        definitions = {column.name: column for column in create_query.column_definitions}
+        added = [column for name, column in definitions.items() if name not in table.columns]
+        changed = []
+        for name, column in definitions.items():
+            live_column = table.columns.get(name)
+            if live_column is None:
+                continue
+            if (normalize_type(column.data_type) != live_column.data_type
+                    or (live_column.primary_key is not None and bool(column.primary_key) != live_column.primary_key)
+                    or (not column.primary_key and bool(column.not_null) != live_column.not_null)):
+                changed.append(column)
+        ignored_columns = {getattr(self.qw.fulltext_backend, 'column_name', None)}
+        dropped = [name for name in table.columns if name not in definitions and name not in ignored_columns] \
+            if drop_columns else []
+
+        if self.qw.db.dialect == 'sqlite':
+            if changed or dropped or any(not self.sqlite_can_add_column(column) for column in added):
+                create_query.create_clause = CreateTableClause(f'{model.table_name}__rebuild')
+                copied_columns = [name for name in definitions if name in table.columns]
+                # the NULL values of a column which becomes NOT NULL are replaced by its default
+                expressions = {name: f'coalesce({name}, {repr(definitions[name].default)})'
+                               for name in copied_columns
+                               if definitions[name].not_null and not table.columns[name].not_null
+                               and definitions[name].default is not None}
+                self.add_query(key, TableRebuild(model.table_name, create_query, copied_columns,
+                                                 expressions=expressions))
+                return True
+            for column in added:
+                self.add_query(key, DdlQuery(f'ALTER TABLE {model.table_name} ADD COLUMN {repr(column)}'))
+            return False
+
+        for column in added:
+            self.add_query(key, DdlQuery(f'ALTER TABLE {model.table_name} ADD COLUMN {repr(column)}'))
+        for column in changed:
+            live_column = table.columns[column.name]
+            if normalize_type(column.data_type) != live_column.data_type:
+                self.add_query(key, DdlQuery(f'ALTER TABLE {model.table_name} ALTER COLUMN {column.name} '
+                                             f'TYPE {column.data_type} USING {column.name}::{column.data_type}'))
+            if not column.primary_key and bool(column.not_null) != live_column.not_null:
+                action = 'SET' if column.not_null else 'DROP'
+                self.add_query(key, DdlQuery(f'ALTER TABLE {model.table_name} ALTER COLUMN {column.name} '
+                                             f'{action} NOT NULL'))
+        for name in dropped:
+            self.add_query(key, DdlQuery(f'ALTER TABLE {model.table_name} DROP COLUMN {name}'))
+        return False
+
+    @staticmethod
+    def sqlite_can_add_column(column):
+        # see the restrictions of ALTER TABLE ADD COLUMN in the sqlite docs
+        if column.primary_key or column.unique:
+            return False
+        if column.not_null and column.default is None:
+            return False
+        return column.foreign_key is None or column.default is None
+
+    def build_missing_indexes(self, key, models, tables):
+        """Adds the indexes of the models (see build_indexes) which the live database does not have.
+        The indexes of rebuilt tables are missing afterwards as well."""
+        rebuilt_tables = {query.table_name for query in self.queries[key] if isinstance(query, TableRebuild)}
+        existing = set()
+        for table_name, table in tables.items():
+            if table_name not in rebuilt_tables:
+                existing.update(table.indexes)
+        for model in models:
+            for query in self.qw.build_create_index_queries(model, if_not_exists=True):
+                if query.name not in existing:
+                    existing.add(query.name)
+                    self.add_query(key, query)
+        for model, m2m_relation, foreign_model in self.junction_tables(models):
+            query = self.junction_index_query(m2m_relation, foreign_model, if_not_exists=True)
+            if query.name not in existing:
+                self.add_query(key, query)
+
+    def add_backfill(self, key, model, assignments, where=None, batch_size=500, pause=0.0, progress_callback=None):
+        """Adds an UPDATE of the model's table which runs in batches (see squyrrel.orm.schema.Backfill)"""
+        model = self.qw.get_model(model)
+        self.add_query(key, Backfill(model.table_name, model.id_field_name(), assignments, where=where,
+                                     batch_size=batch_size, pause=pause, progress_callback=progress_callback))
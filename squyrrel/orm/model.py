@@ -3,10 +3,24 @@ from squyrrel.orm.field import (Field, Relation, ManyToOne,
 from squyrrel.orm.exceptions import RelationNotFoundException
 from squyrrel.orm.filter import ManyToOneFilter, ManyToManyFilter
 from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.orm.model_meta import ModelMeta
 from squyrrel.sql.references import ColumnReference
 
 
-class AbstractModel:
+class ModelType(type):
+    """Metaclass of models: drops the compiled ModelMeta whenever an attribute of the class changes"""
+
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if name != '_model_meta':
+            cls.invalidate_meta()
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        cls.invalidate_meta()
+
+
+class AbstractModel(metaclass=ModelType):
 
     @classmethod
     def attributes(cls):
@@ -30,6 +44,11 @@ class AbstractModel:
     def congregate_attr_dict(cls, include_never_select_fields=False):
         return cls.attr_dict(field_cls=CongregateField, exclude_cls=None, include_never_select_fields=include_never_select_fields)
 
+    @classmethod
+    def invalidate_meta(cls):
+        if '_model_meta' in cls.__dict__:
+            type.__delattr__(cls, '_model_meta')
+
 
 class Model(AbstractModel):
     table_name = None
@@ -40,11 +59,29 @@ class Model(AbstractModel):
     duplicate_search_columns = None
     duplicate_exact_columns_matchers = None
     uniqueness_constraints = None
+    # list of Index, see QueryWizzard.build_create_index_queries
+    indexes = None
     column_names = None
 
+    @classmethod
+    def meta(cls) -> ModelMeta:
+        # look into cls.__dict__ only, a subclass must not reuse the meta of its parent
+        meta = cls.__dict__.get('_model_meta')
+        if meta is None:
+            meta = cls.compile_meta()
+        return meta
+
+    @classmethod
+    def compile_meta(cls) -> ModelMeta:
+        meta = ModelMeta(cls)
+        type.__setattr__(cls, '_model_meta', meta)
+        return meta
+
     @classmethod
     def fields_dict(cls, include_never_select_fields=False):
-        return cls.attr_dict(Field, include_never_select_fields=include_never_select_fields)
+        if include_never_select_fields:
+            return cls.meta().all_fields
+        return cls.meta().fields
 
     @classmethod
     def fields(cls, include_never_select_fields=False):
@@ -56,7 +93,7 @@ class Model(AbstractModel):
 
     @classmethod
     def congregate_fields(cls):
-        return cls.congregate_attr_dict().items()
+        return cls.meta().congregate_fields.items()
 
     @classmethod
     def id_field(cls) -> Field:
@@ -65,10 +102,10 @@ class Model(AbstractModel):
     @classmethod
     def id_field_name(cls) -> str:
         # todo: handle more different cases
-        for field_name, field in cls.fields():
-            if field.primary_key:
-                return field_name
-        raise Exception('Model has no primary_key field')
+        id_field_name = cls.meta().id_field_name
+        if id_field_name is None:
+            raise Exception('Model has no primary_key field')
+        return id_field_name
 
     @classmethod
     def id_column_reference(cls):
@@ -76,7 +113,7 @@ class Model(AbstractModel):
 
     @classmethod
     def relations_dict(cls):
-        return {k: v for k, v in cls.attributes().items() if isinstance(v, Relation)}
+        return cls.meta().relations
 
     @classmethod
     def relations(cls):
@@ -84,7 +121,7 @@ class Model(AbstractModel):
 
     @classmethod
     def many_to_one_dict(cls):
-        return {k: v for k, v in cls.attributes().items() if isinstance(v, ManyToOne)}
+        return cls.meta().many_to_one
 
     @classmethod
     def many_to_one_relations(cls):
@@ -92,7 +129,7 @@ class Model(AbstractModel):
 
     @classmethod
     def one_to_many_dict(cls):
-        return {k: v for k, v in cls.attributes().items() if isinstance(v, OneToMany)}
+        return cls.meta().one_to_many
 
     @classmethod
     def one_to_many_relations(cls):
@@ -100,7 +137,7 @@ class Model(AbstractModel):
 
     @classmethod
     def many_to_many_dict(cls):
-        return {k: v for k, v in cls.attributes().items() if isinstance(v, ManyToMany)}
+        return cls.meta().many_to_many
 
     @classmethod
     def many_to_many_relations(cls):
@@ -162,13 +199,84 @@ class Model(AbstractModel):
 
     @classmethod
     def get_relation_by_fk_id_column(cls, fk_id_column):
-        for relation_name, relation in cls.relations_dict().items():
-            if isinstance(relation, OneToMany):
-                # todo: solve diff., has no foreign_key_field attr
-                continue
-            if relation.foreign_key_field == fk_id_column:
-                return relation_name, relation
-        raise RelationNotFoundException(fk_id_column=fk_id_column)
+        try:
+            return cls.meta().fk_column_index[fk_id_column]
+        except KeyError:
+            raise RelationNotFoundException(fk_id_column=fk_id_column)
+
+    @classmethod
+    def hydrate(cls, values, relations=None):
+        """Fast path to build an entity without cloning the class fields and relations.
+
+        values is a list with one value per field, ordered like cls.meta().field_names.
+        relations maps relation names onto the related entity (many to one), a list of entities or an
+        aggregation value (to many). The fields are exposed through BoundField views, the relations
+        are cloned lazily on first access.
+        """
+        instance = cls.__new__(cls)
+        instance._field_values = values
+        instance._relation_values = relations
+        return instance
+
+    @classmethod
+    def from_row(cls, row, column_slots, relations=None):
+        """Builds an entity straight from a db row, column_slots as returned by ModelMeta.column_slots()"""
+        values = [None] * cls.meta().num_fields
+        for column_index, slot in column_slots:
+            values[slot] = row[column_index]
+        return cls.hydrate(values, relations)
+
+    @classmethod
+    def from_dict(cls, data):
+        meta = cls.meta()
+        values = [data.get(field_name) for field_name in meta.field_names]
+        for slot, field in meta.converting_fields:
+            values[slot] = field.to_value(values[slot])
+        relations = {key: value for key, value in data.items() if key in meta.relations}
+        return cls.hydrate(values, relations)
+
+    @property
+    def is_hydrated(self):
+        return '_field_values' in self.__dict__
+
+    def set_field_value(self, slot, value):
+        changes = self.__dict__.get('_changes')
+        if changes is None:
+            changes = self._changes = {}
+        # remember the loaded value of the field on its first change, see dirty_fields
+        changes.setdefault(slot, self._field_values[slot])
+        self._field_values[slot] = value
+
+    def dirty_fields(self):
+        """Fields of a hydrated entity changed since it was loaded (or since mark_clean): {field_name: value}"""
+        changes = self.__dict__.get('_changes')
+        if not changes:
+            return {}
+        field_names = self.model.meta().field_names
+        return {field_names[slot]: self._field_values[slot]
+                for slot, loaded_value in changes.items() if self._field_values[slot] != loaded_value}
+
+    @property
+    def is_dirty(self):
+        return bool(self.dirty_fields())
+
+    def mark_clean(self):
+        self.__dict__.pop('_changes', None)
+
+    def bind_relation(self, relation):
+        relation_name = self.model.meta().relation_names_by_id.get(id(relation))
+        if relation_name is None:
+            return relation
+        instance_relation = relation.clone()
+        value = self._relation_values.get(relation_name) if self._relation_values else None
+        if isinstance(instance_relation, ManyToOne):
+            instance_relation.entity = value
+        elif isinstance(value, list):
+            instance_relation.entities = value
+        else:
+            instance_relation.aggregation_value = value
+        self.__dict__[relation_name] = instance_relation
+        return instance_relation
 
     def __init__(self, m2m_aggregations=None, **kwargs):
         self.init_fields(**kwargs)
@@ -240,9 +348,13 @@ class Model(AbstractModel):
 
     @property
     def id(self) -> str:
-        return self.id_field().value
+        if self.is_hydrated:
+            return self._field_values[self.model.meta().field_slots[self.id_field_name()]]
+        return getattr(self, self.id_field_name()).value
 
     def as_json(self):
+        if self.is_hydrated:
+            return dict(zip(self.model.meta().field_names, self._field_values))
         json_dict = {}
         for field_name, field in self.instance_fields():
             json_dict[field_name] = field.value
@@ -0,0 +1,74 @@
+from squyrrel.orm.field import (Field, Relation, ManyToOne,
+                                ManyToMany, OneToMany, CongregateField)
+
+
+class ModelMeta:
+    """Compiled, read-only view of the fields and relations declared on a model class.
+
+    Built once per model (see Model.meta()) so that lookups like Model.fields_dict() or
+    Model.id_field_name() do not have to rescan cls.__dict__ on every call.
+    The dicts held here are shared, callers must not mutate them.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.table_name = model.table_name
+
+        self.all_fields = {}
+        self.all_congregate_fields = {}
+        self.relations = {}
+        for attr_name, attr in model.attributes().items():
+            if isinstance(attr, CongregateField):
+                self.all_congregate_fields[attr_name] = attr
+            elif isinstance(attr, Field):
+                self.all_fields[attr_name] = attr
+            elif isinstance(attr, Relation):
+                self.relations[attr_name] = attr
+
+        self.fields = {k: v for k, v in self.all_fields.items() if not v.never_select}
+        self.congregate_fields = {k: v for k, v in self.all_congregate_fields.items() if not v.never_select}
+        self.field_names = list(self.fields.keys())
+        self.field_slots = {field_name: slot for slot, field_name in enumerate(self.field_names)}
+        self.field_slots_by_id = {id(field): slot for slot, field in enumerate(self.fields.values())}
+        self.converting_fields = [(slot, field) for slot, field in enumerate(self.fields.values())
+                                  if type(field).to_value is not Field.to_value]
+
+        self.id_field_name = None
+        for field_name, field in self.fields.items():
+            if field.primary_key:
+                self.id_field_name = field_name
+                break
+
+        self.many_to_one = {k: v for k, v in self.relations.items() if isinstance(v, ManyToOne)}
+        self.one_to_many = {k: v for k, v in self.relations.items() if isinstance(v, OneToMany)}
+        self.many_to_many = {k: v for k, v in self.relations.items() if isinstance(v, ManyToMany)}
+
+        self.relation_names_by_id = {id(relation): relation_name for relation_name, relation in self.relations.items()}
+
+        self.fk_column_index = {}
+        for relation_name, relation in self.relations.items():
+            if isinstance(relation, OneToMany):
+                # todo: solve diff., has no foreign_key_field attr
+                continue
+            self.fk_column_index.setdefault(relation.foreign_key_field, (relation_name, relation))
+
+    @property
+    def num_fields(self):
+        return len(self.field_names)
+
+    def column_slots(self, select_fields, table_name=None):
+        """Maps the positions of the select fields (which belong to this model's table) onto field slots,
+        i.e. returns a list of (column_index, slot) tuples to be used with Model.from_row()"""
+        if table_name is None:
+            table_name = self.table_name
+        column_slots = []
+        for column_index, column in enumerate(select_fields):
+            if getattr(column, 'table', None) != table_name:
+                continue
+            slot = self.field_slots.get(getattr(column, 'name', None))
+            if slot is not None:
+                column_slots.append((column_index, slot))
+        return column_slots
+
+    def __repr__(self):
+        return f'ModelMeta({self.model.__name__}, fields={self.field_names}, relations={list(self.relations.keys())})'
@@ -0,0 +1,125 @@
+import hashlib
+import pickle
+import re
+import time
+from collections import OrderedDict
+
+
+class InMemoryResultCacheBackend:
+    """LRU cache in the process, entries expire after ttl seconds (if given)"""
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        # table versions are not subject to eviction: a reset version could revive stale entries
+        self.versions = {}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.entries[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get_version(self, table):
+        return self.versions.get(table, 0)
+
+    def bump_version(self, table):
+        self.versions[table] = self.versions.get(table, 0) + 1
+
+    def clear(self):
+        self.entries.clear()
+        self.versions.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class KeyValueResultCacheBackend:
+    """Backend on a key value store shared between processes.
+
+    client needs get(key), set(key, value, ex=None) and incr(key) like a redis client; any
+    object with these methods (e.g. a dict based stand-in for local development) will do.
+    """
+
+    def __init__(self, client, prefix='squyrrel:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return None
+        return pickle.loads(data)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def get_version(self, table):
+        return int(self.client.get(f'{self.prefix}version:{table}') or 0)
+
+    def bump_version(self, table):
+        self.client.incr(f'{self.prefix}version:{table}')
+
+
+class ResultCache:
+    """Read-through cache of the raw rows of select statements, keyed by sql and params.
+
+    Every table has a version, which is part of the keys of the statements reading it.
+    Statements writing a table bump its version, so the cached results of the table are not
+    used anymore (and are evicted by the backend eventually).
+    """
+
+    read_pattern = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+    read_tables_pattern = re.compile(r'\b(?:FROM|JOIN)\s+([A-Za-z_][\w.]*)', re.IGNORECASE)
+    write_table_pattern = re.compile(
+        r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|ALTER\s+TABLE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?|COPY)\s+([A-Za-z_][\w.]*)',
+        re.IGNORECASE)
+
+    def __init__(self, backend=None, ttl=None):
+        self.backend = backend if backend is not None else InMemoryResultCacheBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, sql):
+        return self.read_pattern.match(sql) is not None
+
+    def read_tables(self, sql):
+        return sorted(set(self.read_tables_pattern.findall(sql)))
+
+    def written_table(self, sql):
+        match = self.write_table_pattern.match(sql)
+        return match.group(1) if match else None
+
+    def key(self, sql, params):
+        versions = [(table, self.backend.get_version(table)) for table in self.read_tables(sql)]
+        return hashlib.sha1(repr((sql, list(params or ()), versions)).encode('utf8')).hexdigest()
+
+    def get(self, key):
+        rows = self.backend.get(key)
+        if rows is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return rows
+
+    def set(self, key, rows):
+        self.backend.set(key, rows, ttl=self.ttl)
+
+    def invalidate(self, *tables):
+        for table in tables:
+            self.backend.bump_version(table)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
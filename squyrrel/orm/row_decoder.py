@@ -0,0 +1,85 @@
+from squyrrel.orm.entity_format import EntityFormat
+
+
+class RowDecoder:
+    """Compiled plan which turns the rows of a built query into entities or json dicts.
+
+    The select fields of the query are matched against the model, its many to one relations and the
+    aggregation columns only once (in __init__), so decoding a row is linear in the row width.
+    """
+
+    def __init__(self, model, select_fields, many_to_one_relations=None,
+                 one_to_many_aggregations=None, m2m_aggregations=None):
+        self.model = model
+        meta = model.meta()
+
+        # (column_index, slot) of the model's own fields, see Model.from_row
+        self.column_slots = meta.column_slots(select_fields)
+        # (column_index, column_name) of all columns of the model's table, used for json
+        self.columns = self.table_columns(select_fields, model.table_name)
+
+        # (relation_name, foreign_model, column_slots, columns)
+        self.many_to_one = []
+        for relation_name, relation in many_to_one_relations or []:
+            foreign_model = relation.foreign_model
+            table_name = foreign_model.table_name
+            self.many_to_one.append((relation_name,
+                                     foreign_model,
+                                     foreign_model.meta().column_slots(select_fields),
+                                     self.table_columns(select_fields, table_name)))
+
+        # (relation_name, column_index)
+        self.aggregations = []
+        for relation_name, relation in one_to_many_aggregations or []:
+            column_index = self.first_index(select_fields, lambda column: getattr(column, 'table', None) == relation.table_name)
+            if column_index is not None:
+                self.aggregations.append((relation_name, column_index))
+        for relation_name, aggr_column_ref in m2m_aggregations or []:
+            column_index = self.first_index(select_fields, lambda column: column == aggr_column_ref)
+            if column_index is not None:
+                self.aggregations.append((relation_name, column_index))
+
+    @staticmethod
+    def table_columns(select_fields, table_name):
+        return [(column_index, column.name) for column_index, column in enumerate(select_fields)
+                if getattr(column, 'table', None) == table_name]
+
+    @staticmethod
+    def first_index(select_fields, predicate):
+        for column_index, column in enumerate(select_fields):
+            if predicate(column):
+                return column_index
+        return None
+
+    def to_entity(self, row, relations=None):
+        relation_values = {}
+        for relation_name, foreign_model, column_slots, columns in self.many_to_one:
+            relation_values[relation_name] = foreign_model.from_row(row, column_slots)
+        for relation_name, column_index in self.aggregations:
+            relation_values[relation_name] = row[column_index]
+        if relations:
+            relation_values.update(relations)
+        return self.model.from_row(row, self.column_slots, relation_values)
+
+    def to_dict(self, row, entity_format=EntityFormat.JSON):
+        data = {column_name: row[column_index] for column_index, column_name in self.columns}
+        for relation_name, foreign_model, column_slots, columns in self.many_to_one:
+            if entity_format == EntityFormat.MODEL:
+                data[relation_name] = foreign_model.from_row(row, column_slots)
+            else:
+                data[relation_name] = {column_name: row[column_index] for column_index, column_name in columns}
+        for relation_name, column_index in self.aggregations:
+            data[relation_name] = row[column_index]
+        return data
+
+    def decode(self, row, entity_format=EntityFormat.MODEL):
+        if entity_format == EntityFormat.MODEL:
+            return self.to_entity(row)
+        return self.to_dict(row, entity_format=entity_format)
+
+    def decode_all(self, rows, entity_format=EntityFormat.MODEL):
+        if entity_format == EntityFormat.MODEL:
+            to_entity = self.to_entity
+            return [to_entity(row) for row in rows]
+        to_dict = self.to_dict
+        return [to_dict(row, entity_format) for row in rows]
@@ -0,0 +1,221 @@
+import time
+
+from squyrrel.sql.query import DdlQuery
+
+
+class ColumnInfo:
+    """Column of the live schema. Attributes an introspector cannot tell are None (and not compared)."""
+
+    def __init__(self, name, data_type, not_null=None, primary_key=None):
+        self.name = name
+        self.data_type = data_type
+        self.not_null = not_null
+        self.primary_key = primary_key
+
+    def __repr__(self):
+        return f'ColumnInfo({self.name} {self.data_type})'
+
+
+class TableInfo:
+
+    def __init__(self, name, columns=None, indexes=None):
+        self.name = name
+        # column name -> ColumnInfo, in the order of the table
+        self.columns = columns or {}
+        self.indexes = set(indexes or [])
+
+    def __repr__(self):
+        return f'TableInfo({self.name}: {", ".join(self.columns)})'
+
+
+class SchemaIntrospector:
+    """Reads the tables, columns and index names of the live database through the query wizzard"""
+
+    # data type aliases, so that the declared types of the models compare equal to the reported ones
+    type_aliases = {}
+
+    def __init__(self, qw):
+        self.qw = qw
+
+    def normalize_type(self, data_type):
+        if data_type is None:
+            return None
+        data_type = ' '.join(data_type.lower().split())
+        return self.type_aliases.get(data_type, data_type)
+
+    def fetchall(self, sql, params=None):
+        self.qw.execute_sql(sql, params=params)
+        return self.qw.fetchall()
+
+    def tables(self):
+        """table name -> TableInfo"""
+        raise NotImplementedError
+
+
+class SqliteSchemaIntrospector(SchemaIntrospector):
+
+    type_aliases = {'int': 'integer'}
+
+    def tables(self):
+        tables = {}
+        rows = self.fetchall("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                             "ORDER BY name")
+        for (table_name,) in rows:
+            columns = {}
+            for _, name, data_type, not_null, _, primary_key in self.fetchall(f'PRAGMA table_info({table_name})'):
+                columns[name] = ColumnInfo(name, self.normalize_type(data_type),
+                                           not_null=bool(not_null), primary_key=bool(primary_key))
+            tables[table_name] = TableInfo(table_name, columns)
+        # without the automatic indexes of primary keys and unique constraints (sql is NULL)
+        for name, table_name in self.fetchall("SELECT name, tbl_name FROM sqlite_master "
+                                              "WHERE type = 'index' AND sql IS NOT NULL"):
+            if table_name in tables:
+                tables[table_name].indexes.add(name)
+        return tables
+
+
+class PostgresSchemaIntrospector(SchemaIntrospector):
+
+    type_aliases = {
+        'int': 'integer',
+        'int4': 'integer',
+        'bool': 'boolean',
+        'varchar': 'character varying',
+        'timestamp': 'timestamp without time zone',
+    }
+
+    def __init__(self, qw, schema='public'):
+        super().__init__(qw)
+        self.schema = schema
+
+    def tables(self):
+        tables = {}
+        rows = self.fetchall('SELECT table_name, column_name, data_type, is_nullable '
+                             'FROM information_schema.columns WHERE table_schema = ? '
+                             'ORDER BY table_name, ordinal_position', params=[self.schema])
+        for table_name, name, data_type, is_nullable in rows:
+            table = tables.setdefault(table_name, TableInfo(table_name))
+            table.columns[name] = ColumnInfo(name, self.normalize_type(data_type), not_null=is_nullable == 'NO')
+        for table_name, name in self.fetchall('SELECT tablename, indexname FROM pg_indexes WHERE schemaname = ?',
+                                              params=[self.schema]):
+            if table_name in tables:
+                tables[table_name].indexes.add(name)
+        return tables
+
+
+class TableRebuild:
+    """Rebuild of a sqlite table (which cannot alter or drop most columns in place): the table is
+    created anew with the definition of the model, the rows of the columns in both definitions are
+    copied over, the old table is dropped and the new one renamed (the procedure of the sqlite docs).
+    All in one transaction with foreign keys off, so that dropping the old table does not cascade to
+    the referencing tables; the foreign keys are checked before the commit.
+    expressions: column -> sql expression of the copied value (default: the column), e.g. a coalesce
+    for a column which becomes NOT NULL."""
+
+    def __init__(self, table_name, create_query, columns, expressions=None):
+        self.table_name = table_name
+        self.create_query = create_query
+        self.columns = columns
+        self.expressions = expressions or {}
+
+    @property
+    def tmp_table_name(self):
+        return f'{self.table_name}__rebuild'
+
+    def statements(self):
+        column_list = ', '.join(self.columns)
+        select_list = ', '.join(self.expressions.get(column, column) for column in self.columns)
+        return [
+            self.create_query,
+            DdlQuery(f'INSERT INTO {self.tmp_table_name} ({column_list}) '
+                     f'SELECT {select_list} FROM {self.table_name}'),
+            DdlQuery(f'DROP TABLE {self.table_name}'),
+            DdlQuery(f'ALTER TABLE {self.tmp_table_name} RENAME TO {self.table_name}'),
+        ]
+
+    def run(self, qw):
+        qw.commit()
+        qw.execute_sql('PRAGMA foreign_keys')
+        foreign_keys = qw.fetchone()[0]
+        # has no effect inside a transaction
+        qw.execute_sql('PRAGMA foreign_keys = OFF')
+        try:
+            # explicitly, as DDL does not open a transaction implicitly
+            qw.execute_sql('BEGIN')
+            try:
+                for statement in self.statements():
+                    qw.execute_query(statement)
+                if foreign_keys:
+                    qw.execute_sql('PRAGMA foreign_key_check')
+                    violations = qw.fetchall()
+                    if violations:
+                        raise ValueError(f'Rebuild of {self.table_name} violates foreign keys: {violations}')
+            except Exception:
+                qw.rollback()
+                raise
+            qw.commit()
+        finally:
+            qw.execute_sql(f'PRAGMA foreign_keys = {"ON" if foreign_keys else "OFF"}')
+
+    def __repr__(self):
+        return '\n'.join(['PRAGMA foreign_keys = OFF;', 'BEGIN;', *[repr(query) for query in self.statements()],
+                          'PRAGMA foreign_key_check;', 'COMMIT;', 'PRAGMA foreign_keys = ON;'])
+
+
+class Backfill:
+    """UPDATE of a (possibly big) table in batches of batch_size rows (by primary key), each batch in its own
+    transaction, so that the table is never locked for long. assignments: column -> sql expression, e.g.
+    {'title_lower': 'lower(title)'}. where (sql) restricts the updated rows."""
+
+    def __init__(self, table_name, id_column, assignments, where=None, batch_size=500, pause=0.0,
+                 progress_callback=None):
+        self.table_name = table_name
+        self.id_column = id_column
+        self.assignments = assignments
+        self.where = where
+        self.batch_size = int(batch_size)
+        self.pause = pause
+        self.progress_callback = progress_callback
+
+    def set_sql(self):
+        return ', '.join(f'{column} = {expression}' for column, expression in self.assignments.items())
+
+    def batch_sql(self, after_id):
+        """Selects the ids of the next batch (after the id after_id, if not None)"""
+        conditions = []
+        if after_id is not None:
+            conditions.append(f'{self.id_column} > ?')
+        if self.where is not None:
+            conditions.append(f'({self.where})')
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        return f'SELECT {self.id_column} FROM {self.table_name}{where} ORDER BY {self.id_column} LIMIT {self.batch_size}'
+
+    def run(self, qw):
+        """Returns the number of updated rows"""
+        updated = 0
+        last_id = None
+        while True:
+            qw.execute_sql(self.batch_sql(last_id), params=[last_id] if last_id is not None else None)
+            ids = [row[0] for row in qw.fetchall()]
+            if not ids:
+                return updated
+            placeholders = ', '.join('?' * len(ids))
+            try:
+                qw.execute_sql(f'UPDATE {self.table_name} SET {self.set_sql()} '
+                               f'WHERE {self.id_column} IN ({placeholders})', params=ids)
+            except Exception:
+                qw.rollback()
+                raise
+            qw.commit()
+            updated += len(ids)
+            last_id = ids[-1]
+            if self.progress_callback is not None:
+                self.progress_callback(updated)
+            if self.pause:
+                time.sleep(self.pause)
+
+    def __repr__(self):
+        output = f'-- backfill in batches of {self.batch_size} rows\nUPDATE {self.table_name} SET {self.set_sql()}'
+        if self.where is not None:
+            output += f'\nWHERE {self.where}'
+        return output + ';'
@@ -0,0 +1,148 @@
+from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.orm.exceptions import DidNotFindObjectWithIdException
+from squyrrel.orm.filter import ManyToOneFilter, ManyToManyFilter
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.expressions import Equals
+from squyrrel.sql.query import Query, UpdateQuery
+
+
+class Session:
+    """Identity map and unit of work on top of a QueryWizzard, meant to live for one request.
+
+    Every entity (EntityFormat.MODEL) is loaded once per session and kept by (model name, id):
+    repeated lookups are served from memory, and a query result contains the instance
+    already in the session for an id that was loaded before. get_by_id loads the relations which
+    a query (get_all) may leave out, an entity of a query is completed by its first get_by_id. Changes of fields of the
+    entities (through their BoundFields, e.g. book.title.value = 'x') are written by flush,
+    only the changed columns, all entities in one transaction.
+    """
+
+    def __init__(self, qw: QueryWizzard):
+        self.qw = qw
+        self.identity_map = {}
+        # keys of the entities loaded by get_by_id (with all their relations)
+        self._loaded_by_id = set()
+        # (model name, filter column, value) -> id, for the many to one lookups of create
+        self._id_lookups = {}
+
+    def key(self, model, id):
+        return self.qw.get_model(model).__name__, id
+
+    def add(self, entity):
+        """Puts a loaded entity into the session and returns the instance of the session for its id"""
+        return self.identity_map.setdefault(self.key(entity.model, entity.id), entity)
+
+    def expunge(self, entity):
+        key = self.key(entity.model, entity.id)
+        self.identity_map.pop(key, None)
+        self._loaded_by_id.discard(key)
+
+    def clear(self):
+        self.identity_map.clear()
+        self._loaded_by_id.clear()
+        self._id_lookups.clear()
+
+    def __contains__(self, entity):
+        return self.identity_map.get(self.key(entity.model, entity.id)) is entity
+
+    # read
+
+    def get_by_id(self, model, id, raise_if_not_found=True, **kwargs):
+        key = self.key(model, id)
+        entity = self.identity_map.get(key)
+        if entity is not None and key in self._loaded_by_id:
+            return entity
+        loaded = self.qw.get_by_id(model, id, raise_if_not_found=raise_if_not_found,
+                                   entity_format=EntityFormat.MODEL, **kwargs)
+        if loaded is None:
+            return None
+        self._loaded_by_id.add(key)
+        if entity is None:
+            return self.add(loaded)
+        # loaded by a query before: takes over the relations, keeps the (possibly changed) fields
+        for relation_name, relation in entity.model.relations():
+            entity.__dict__[relation_name] = getattr(loaded, relation_name)
+        return entity
+
+    def get_all_by_ids(self, model, ids, raise_if_not_found=True, prefetch=None):
+        """Entities with the given ids (in the order of ids), only the ones not in the session are queried"""
+        ids = list(ids)
+        missing = [id_ for id_ in dict.fromkeys(ids) if self.key(model, id_) not in self.identity_map]
+        if missing:
+            for entity in self.qw.get_all_by_ids(model, missing, prefetch=prefetch,
+                                                 raise_if_not_found=raise_if_not_found):
+                self.add(entity)
+        entities = []
+        for id_ in ids:
+            key = self.key(model, id_)
+            entity = self.identity_map.get(key)
+            if entity is None:
+                if raise_if_not_found:
+                    raise DidNotFindObjectWithIdException(msg=f'Did not find {key[0]} with id {id_}',
+                                                          model_name=key[0], id=id_)
+                continue
+            entities.append(entity)
+        return entities
+
+    def get_all(self, query: Query, **kwargs):
+        kwargs['entity_format'] = EntityFormat.MODEL
+        response = self.qw.get_all(query, **kwargs)
+        if isinstance(response, dict):
+            response['entities'] = [self.add(entity) for entity in response['entities']]
+            return response
+        return [self.add(entity) for entity in response]
+
+    def load_filter_values(self, filters, prefetch=None):
+        """see QueryWizzard.load_filter_values, the entities are taken from the session"""
+        if filters is None:
+            return
+        for filter_ in filters:
+            if isinstance(filter_, (ManyToOneFilter, ManyToManyFilter)):
+                filter_.entities = list()
+                if filter_.value:
+                    filter_.entities = self.get_all_by_ids(filter_.relation.foreign_model, filter_.value,
+                                                           prefetch=prefetch)
+
+    def get_m21_value(self, relation, value):
+        """see QueryWizzard.get_m21_value, each lookup is done once per session"""
+        if relation.load_all:
+            return int(value)
+        key = (self.qw.get_model(relation.foreign_model).__name__, relation.update_search_column, value)
+        if key not in self._id_lookups:
+            self._id_lookups[key] = self.qw.get_m21_value(relation, value)
+        return self._id_lookups[key]
+
+    # write
+
+    def create(self, model, data):
+        """Inserts the entity (without committing) and returns its id"""
+        model = self.qw.get_model(model)
+        try:
+            m21_values = {column: self.get_m21_value(relation, value)
+                          for column, relation, value in self.qw.many_to_one_values(model, data)}
+            inserted_id = self.qw.execute_insert(model, data, self.qw.insert_query(model, data, m21_values=m21_values))
+        except Exception as exc:
+            self.qw.rollback()
+            raise exc
+        return inserted_id
+
+    def dirty_entities(self):
+        return [entity for entity in self.identity_map.values() if entity.is_hydrated and entity.is_dirty]
+
+    def flush(self):
+        """Writes the changed fields of all entities of the session in one transaction"""
+        entities = self.dirty_entities()
+        queries = [UpdateQuery.build(entity.model, Equals.id_as_parameter(entity.model, entity.id),
+                                     entity.dirty_fields())
+                   for entity in entities]
+        self.qw.execute_queries_in_transaction(queries)
+        for entity in entities:
+            entity.mark_clean()
+        return len(queries)
+
+    def commit(self):
+        self.flush()
+
+    def rollback(self):
+        self.qw.rollback()
+        self.clear()
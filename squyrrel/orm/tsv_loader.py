@@ -0,0 +1,99 @@
+import os
+
+from squyrrel.orm.exceptions import TsvLoadException
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.query import BulkInsertQuery
+
+
+class TsvLoader:
+    """Streams the rows of a tsv file into the table of a model.
+
+    The first line of the file holds the column headers, which are mapped onto the fields of the model
+    (by name or with column_map). The cells are converted with Field.parse and inserted in chunks of
+    chunk_size rows (executemany, COPY on postgres), all chunks in one transaction. Only one chunk
+    is held in memory at a time.
+
+    progress_callback is called after every chunk with (rows_loaded, bytes_read, total_bytes).
+    """
+
+    def __init__(self, qw: QueryWizzard, chunk_size=5000, progress_callback=None):
+        self.qw = qw
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+
+    def map_columns(self, model, column_headers, column_map=None):
+        """Returns a list of (cell index, column name, field). column_map maps headers to field names,
+        headers mapped to None are skipped"""
+        column_map = column_map or {}
+        fields = model.fields_dict(include_never_select_fields=True)
+        mapping = []
+        for index, header in enumerate(column_headers):
+            field_name = column_map.get(header, header)
+            if field_name is None:
+                continue
+            field = fields.get(field_name)
+            if field is None:
+                raise TsvLoadException(f'Column {header} does not correspond to a field of {model.__name__}',
+                                       line_number=1, column=header)
+            mapping.append((index, field_name, field))
+        return mapping
+
+    @staticmethod
+    def split_line(line, encoding='utf8', separator_char='\t'):
+        return line.decode(encoding).rstrip('\r\n').split(separator_char)
+
+    def parse_row(self, cells, mapping, line_number):
+        if mapping and mapping[-1][0] >= len(cells):
+            raise TsvLoadException(f'Line {line_number} has only {len(cells)} cells', line_number=line_number)
+        row = []
+        for index, column, field in mapping:
+            try:
+                row.append(field.parse(cells[index]))
+            except ValueError as exc:
+                raise TsvLoadException(f'Line {line_number}, column {column}: {exc}',
+                                       line_number=line_number, column=column) from exc
+        return tuple(row)
+
+    def load(self, model, filepath, column_map=None, encoding='utf8', separator_char='\t', commit=True):
+        """Inserts all rows of the tsv file and returns the number of inserted rows.
+        On an error, the transaction is rolled back (nothing of the file is inserted)"""
+        model = self.qw.get_model(model)
+        total_bytes = os.path.getsize(filepath)
+        rows_loaded = 0
+        # binary mode: tell() reports the progress in bytes while iterating the lines
+        with open(filepath, 'rb') as file:
+            header_line = file.readline()
+            if not header_line:
+                return 0
+            mapping = self.map_columns(model,
+                                       self.split_line(header_line, encoding=encoding, separator_char=separator_char),
+                                       column_map=column_map)
+            columns = [column for _, column, _ in mapping]
+            try:
+                chunk = []
+                for line_number, line in enumerate(file, start=2):
+                    if not line.strip(b'\r\n'):
+                        continue
+                    cells = self.split_line(line, encoding=encoding, separator_char=separator_char)
+                    chunk.append(self.parse_row(cells, mapping, line_number))
+                    if len(chunk) >= self.chunk_size:
+                        rows_loaded += self.insert_chunk(model, columns, chunk)
+                        self.report_progress(rows_loaded, file.tell(), total_bytes)
+                        chunk = []
+                if chunk:
+                    rows_loaded += self.insert_chunk(model, columns, chunk)
+                    self.report_progress(rows_loaded, file.tell(), total_bytes)
+            except Exception as exc:
+                self.qw.rollback()
+                raise exc
+        if commit:
+            self.qw.commit()
+        return rows_loaded
+
+    def insert_chunk(self, model, columns, rows):
+        self.qw.execute_bulk_insert(BulkInsertQuery(model.table_name, columns, rows))
+        return len(rows)
+
+    def report_progress(self, rows_loaded, bytes_read, total_bytes):
+        if self.progress_callback is not None:
+            self.progress_callback(rows_loaded, bytes_read, total_bytes)
@@ -29,7 +29,6 @@ def sanitize_id_array(model, obj):
         if isinstance(first_element, model):
             return [entity.id for entity in sanitized_list]
         if isinstance(first_element, dict):
-            print([entity[model.id_field_name()] for entity in sanitized_list])
             return [entity[model.id_field_name()] for entity in sanitized_list]
     raise ValueError(f"Invalid type <{repr(obj)}> of argument for sanitize_id_array")
 
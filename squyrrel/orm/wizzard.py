@@ -1,19 +1,26 @@
-import sqlite3
+import copy
+import threading
+import time
+from contextlib import contextmanager
 from typing import Type
 
 from squyrrel.db.connection import SqlDatabaseConnection
+from squyrrel.db.exceptions import PoolException
 from squyrrel.orm.entity_format import EntityFormat
 from squyrrel.orm.exceptions import *
 from squyrrel.orm.field import (ManyToOne, ManyToMany, OneToMany)
+from squyrrel.orm.index import Index
+from squyrrel.orm.instrumentation import QueryEvent
 from squyrrel.orm.filter import (ManyToOneFilter, ManyToManyFilter)
 from squyrrel.orm.model import Model
+from squyrrel.orm.row_decoder import RowDecoder
 from squyrrel.orm.signals import model_loaded_signal
 from squyrrel.orm.utils import sanitize_id_array, m2m_aggregation_subquery_alias, field_to_sql_data_type
-from squyrrel.sql.query import (Query, UpdateQuery, InsertQuery,
-                                DeleteQuery, CreateTableQuery)
+from squyrrel.sql.query import (Query, UpdateQuery, InsertQuery, BatchInsertQuery, BulkInsertQuery,
+                                DeleteQuery, CreateTableQuery, CreateIndexQuery)
 from squyrrel.sql.clauses import *
 from squyrrel.sql.expressions import (Equals, NumericalLiteral,
-                                      StringLiteral, And, Parameter)
+                                      StringLiteral, And, Parameter, In)
 from squyrrel.sql.query_builder import QueryBuilder
 from squyrrel.sql.references import ColumnReference
 from squyrrel.sql.join import OnJoinCondition, JoinConstruct, JoinType
@@ -21,18 +28,91 @@ from squyrrel.sql.join import OnJoinCondition, JoinConstruct, JoinType
 
 class QueryWizzard:
 
-    def __init__(self, db: SqlDatabaseConnection, builder=None):
-        self.db = db
+    # max. number of ids in one IN (...) condition when loading relations of many instances at once
+    prefetch_chunk_size = 500
+
+    def __init__(self, db: SqlDatabaseConnection = None, builder=None, query_cache=None, pool=None,
+                 instrumentation=None, result_cache=None, fulltext_backend=None):
+        """Either db (one connection) or pool (ConnectionPool) is needed. With a pool, every thread
+        has to check out a connection for its queries with unit_of_work().
+        instrumentation: optional QueryInstrumentation, which gets the timings of all statements
+        result_cache: optional ResultCache for the rows of get_all and count
+        fulltext_backend: optional FulltextSearchBackend for fulltext_search (instead of LIKE)"""
+        self._db = db
+        self.pool = pool
+        self._local = threading.local()
         self.builder = builder
+        # optional QueryCache (sql and param plan per query shape), must use the same builder
+        self.query_cache = query_cache
+        self.instrumentation = instrumentation
+        self.result_cache = result_cache
+        self.fulltext_backend = fulltext_backend
         self.last_sql_query = None
         self.models = {}
         model_loaded_signal.connect(self.on_model_loaded)
 
+    @property
+    def db(self) -> SqlDatabaseConnection:
+        if self.pool is None:
+            return self._db
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            raise PoolException('No connection checked out in this thread, use QueryWizzard.unit_of_work()')
+        return db
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+
+    @property
+    def connection_cls(self):
+        """Class of the connection(s), for the dialect flags (also without a connection checked out of the pool)"""
+        if self.pool is None:
+            return type(self._db) if self._db is not None else None
+        if self.pool.connection_cls is None:
+            # min_size 0: no connection created yet
+            self.pool.release(self.pool.acquire())
+        return self.pool.connection_cls
+
+    @contextmanager
+    def unit_of_work(self, timeout=None):
+        """Runs the enclosed queries on one connection (checked out from the pool, if any) and commits them
+        at the end (or rolls them back in case of an exception). Nested units of work join the outer one."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0 and self.pool is not None:
+            self._local.db = self.pool.acquire(timeout=timeout)
+        self._local.depth = depth + 1
+        try:
+            yield self
+            if depth == 0:
+                self.commit()
+        except BaseException:
+            if depth == 0:
+                self.rollback()
+            raise
+        finally:
+            self._local.depth = depth
+            if depth == 0 and self.pool is not None:
+                db, self._local.db = self._local.db, None
+                self.pool.release(db)
+
     def commit(self):
+        self.finish_query_event()
         self.db.commit()
+        # other connections may have cached the rows committed before under the versions bumped by the writes
+        self.invalidate_transaction_tables()
 
     def rollback(self):
+        self.finish_query_event()
         self.db.rollback()
+        # results read within the transaction may contain the rolled back changes
+        self.invalidate_transaction_tables()
+
+    def invalidate_transaction_tables(self):
+        written_tables = getattr(self._local, 'written_tables', None)
+        if written_tables:
+            self.result_cache.invalidate(*written_tables)
+        self._local.written_tables = None
 
     def last_insert_rowid(self):
         # todo: this only implements sqlite
@@ -40,13 +120,21 @@ class QueryWizzard:
 
         self.execute_sql(sql="SELECT last_insert_rowid()")
 
-        data = self.db.fetchone()
+        data = self.fetchone()
         if not data:
             return None
         return data[0]
 
-    def execute_sql(self, sql, params=None):
-        self.db.execute(sql=sql, params=params)
+    def execute_sql(self, sql, params=None, cursor=None):
+        if self.instrumentation is None:
+            self.db.execute(sql=sql, cursor=cursor, params=params)
+        else:
+            self.finish_query_event()
+            start = time.perf_counter()
+            self.db.execute(sql=sql, cursor=cursor, params=params)
+            self._local.query_event = QueryEvent(sql, params, time.perf_counter() - start)
+        if self.result_cache is not None:
+            self.invalidate_written_table(sql)
         # try:
         #    self.db.execute(sql=sql, params=params)
         # except self.db.database_error_cls as exc:
@@ -54,20 +142,116 @@ class QueryWizzard:
         #    # log sql? (but don't give it out in exception! otherwise it would land in request responses
         #    raise SqlException(f'Database during execution of query: : {str(exc)}')
 
-    def execute_query(self, query):
-        # todo: log!
-        sql = self.builder.build(query)
-        # print('\n'+sql)
-        # print('params:', query.params)
+    def render_query(self, query):
+        """Returns the sql and the params of the query"""
+        if self.query_cache is not None:
+            return self.query_cache.render(query)
+        return self.builder.build(query), query.params
+
+    def execute_query(self, query, cursor=None):
+        sql, params = self.render_query(query)
         self.last_sql_query = query
-        self.execute_sql(sql, params=query.params)
+        self.execute_sql(sql, params=params, cursor=cursor)
+
+    def execute_many(self, query, seq_of_params):
+        """Executes the query (rendered once) for every params tuple in seq_of_params"""
+        sql, _ = self.render_query(query)
+        self.last_sql_query = query
+        self.finish_query_event()
+        start = time.perf_counter()
+        self.db.executemany(sql, seq_of_params)
+        self.record_query_event(sql, None, start)
+        if self.result_cache is not None:
+            self.invalidate_written_table(sql)
+
+    def execute_bulk_insert(self, query: BulkInsertQuery):
+        """Inserts all rows of the query with the fastest bulk path of the db (executemany or COPY)"""
+        sql, _ = self.render_query(query)
+        self.last_sql_query = query
+        self.finish_query_event()
+        start = time.perf_counter()
+        self.db.bulk_insert(sql, query.table, query.columns, query.seq_of_params)
+        self.record_query_event(sql, None, start)
+        if self.result_cache is not None:
+            self.invalidate_written_table(sql)
+
+    # result cache
+
+    def execute_fetchall(self, query):
+        """Executes the query and returns its rows, from the result cache if there is one"""
+        sql, params = self.render_query(query)
+        self.last_sql_query = query
+        if self.result_cache is None or not self.result_cache.is_cacheable(sql):
+            self.execute_sql(sql, params=params)
+            return self.fetchall()
+        key = self.result_cache.key(sql, params)
+        rows = self.result_cache.get(key)
+        if rows is None:
+            self.execute_sql(sql, params=params)
+            rows = self.fetchall()
+            self.result_cache.set(key, rows)
+        return rows
+
+    def invalidate_written_table(self, sql):
+        table = self.result_cache.written_table(sql)
+        if table is None:
+            return
+        self.result_cache.invalidate(table)
+        written_tables = getattr(self._local, 'written_tables', None)
+        if written_tables is None:
+            written_tables = self._local.written_tables = set()
+        written_tables.add(table)
+
+    # instrumentation: the event of a statement is completed (and passed to the instrumentation)
+    # when the next statement is executed, after the hydration of its rows or on commit/rollback
+
+    def fetchone(self):
+        event = getattr(self._local, 'query_event', None)
+        if event is None:
+            return self.db.fetchone()
+        start = time.perf_counter()
+        row = self.db.fetchone()
+        event.fetch_time += time.perf_counter() - start
+        if row is not None:
+            event.rows += 1
+        return row
+
+    def fetchall(self):
+        event = getattr(self._local, 'query_event', None)
+        if event is None:
+            return self.db.fetchall()
+        start = time.perf_counter()
+        rows = self.db.fetchall()
+        event.fetch_time += time.perf_counter() - start
+        event.rows += len(rows)
+        return rows
+
+    def record_query_event(self, sql, params, start):
+        if self.instrumentation is not None:
+            self.instrumentation.record(QueryEvent(sql, params, time.perf_counter() - start))
+
+    def add_hydration_time(self, start):
+        """Adds the time since start to the current event and completes it"""
+        event = getattr(self._local, 'query_event', None)
+        if event is not None:
+            event.hydration_time += time.perf_counter() - start
+            self.finish_query_event()
+
+    def finish_query_event(self):
+        event = getattr(self._local, 'query_event', None)
+        if event is not None:
+            self._local.query_event = None
+            self.instrumentation.record(event)
 
     def execute_queries_in_transaction(self, queries):
         # print(f'start transaction, {len(queries)} queries')
         try:
             for query in queries:
                 # print('execute query with params', query.params)
-                self.execute_query(query)
+                if isinstance(query, BulkInsertQuery):
+                    self.execute_bulk_insert(query)
+                else:
+                    self.execute_query(query)
         except Exception as exc:
             self.rollback()
             raise exc
@@ -90,7 +274,10 @@ class QueryWizzard:
         if key in self.models.keys():
             # print(f'There is already a model on key <{key}>')
             return
-        self.models[key] = model_cls_meta.class_reference
+        model = model_cls_meta.class_reference
+        self.models[key] = model
+        if hasattr(model, 'compile_meta'):
+            model.compile_meta()
         # print('register_model:', key)
 
     def get_model(self, model) -> Type[Model]:
@@ -264,23 +451,150 @@ class QueryWizzard:
             .pagination(active_page, page_size) \
             .build()
 
-    def load_relation_to_many_entities(self, model, instance_id, relations_dict, options):
-        if not options.get('load_entities', True):
-            return {}
+    def build_relation_to_many_prefetch_query(self, model, instance_ids, relation, options=None) -> Query:
+        """Query for the related entities of all instance_ids at once (WHERE parent_id IN (...)),
+        the last select field is the id of the parent instance (used for stitching)"""
+        model = self.get_model(model)
+        foreign_model = self.get_model(relation.foreign_model)
+        orderby = options.get('orderby', None) if options is not None else None
+
+        if isinstance(relation, ManyToMany):
+            parent_id_column = ColumnReference(model.id_field_name(), table=relation.junction_table)
+        else:
+            parent_id_column = ColumnReference(model.id_field_name(), table=foreign_model.table_name)
+
+        select_fields = foreign_model.build_select_fields()
+        query = QueryBuilder(foreign_model, self) \
+            .select(select_fields + [parent_id_column]) \
+            .orderby(orderby) \
+            .build()
+        if isinstance(relation, ManyToMany):
+            foreign_id_field_name = foreign_model.id_field_name()
+            query.from_clause.join(
+                join_type=JoinType.INNER_JOIN,
+                table2=relation.junction_table,
+                join_condition=OnJoinCondition(
+                    Equals(ColumnReference(foreign_id_field_name, table=foreign_model.table_name),
+                           ColumnReference(foreign_id_field_name, table=relation.junction_table))))
+        query.where_clause = WhereClause(In.column_as_parameters(parent_id_column, instance_ids))
+        query.model = foreign_model
+        return query
 
+    def prefetch_relation_to_many(self, model, instance_ids, relation, options=None,
+                                  entity_format=EntityFormat.MODEL):
+        """Loads the related entities of a to many relation for all instance_ids with one query
+        (per chunk of prefetch_chunk_size ids). Returns a dict instance_id -> list of related entities."""
+        related = {instance_id: [] for instance_id in instance_ids}
+        instance_ids = list(related.keys())
+        for i in range(0, len(instance_ids), self.prefetch_chunk_size):
+            query = self.build_relation_to_many_prefetch_query(
+                model, instance_ids[i:i + self.prefetch_chunk_size], relation, options)
+            parent_id_index = len(query.select_clause.items) - 1
+            row_decoder = self.prepare_get_all(query)
+            self.execute_query(query)
+            for row in self.fetchall():
+                related.setdefault(row[parent_id_index], []).append(
+                    row_decoder.decode(row, entity_format=entity_format))
+        return related
+
+    def load_relations_to_many_entities(self, model, instance_ids, relations_dict, options,
+                                        include_lazy=False):
+        """Loads the non lazy (or all, if include_lazy) relations of relations_dict for all instance_ids.
+        Returns a dict relation_name -> {instance_id -> list of related entities}"""
         model = self.get_model(model)
+        entity_format = options.get('entity_format', EntityFormat.MODEL)
         data = {}
+        for relation_name, relation, relation_options in self.relations_to_load(model, relations_dict, options,
+                                                                                include_lazy):
+            if relation_options is not None and relation_options.get('page_size', None) is not None:
+                # pagination applies per instance, cannot be done in one query
+                data[relation_name] = {}
+                for instance_id in instance_ids:
+                    query = self.build_relation_to_many_query(model, instance_id, relation, relation_options)
+                    query.model = relation.foreign_model
+                    data[relation_name][instance_id] = self.get_all(query, entity_format=entity_format)
+                continue
+            data[relation_name] = self.prefetch_relation_to_many(model, instance_ids, relation,
+                                                                 options=relation_options,
+                                                                 entity_format=entity_format)
+        return data
+
+    def relations_to_load(self, model, relations_dict, options, include_lazy=False):
+        """Yields (relation_name, relation, relation_options) of the relations of relations_dict to be loaded"""
+        if not options.get('load_entities', True):
+            return
         for relation_name in relations_dict:
             relation = model.get_relation(relation_name)  # getattr(model, relation_name)
-            if relation.lazy_load:
+            if relation.lazy_load and not include_lazy:
                 continue
             relation_options = options.get(relation_name, None)
             if relation_options is not None and relation_options.get('skip', False):
                 continue
-            query = self.build_relation_to_many_query(model, instance_id, relation, relation_options)
-            query.model = relation.foreign_model
-            data[relation_name] = self.get_all(query, entity_format=options.get('entity_format', EntityFormat.MODEL))
-        return data
+            yield relation_name, relation, relation_options
+
+    def get_relation_loads(self, model, load_relations_entities=True, m2m_options=None, one_to_many_options=None,
+                           prefetch=None, entity_format=EntityFormat.MODEL):
+        """Returns the to many relations to be loaded by get(): list of (relations_dict, options, include_lazy)"""
+        loads = []
+        loaded = set()
+        if load_relations_entities:
+            for relations_dict, options in ((model.many_to_many_dict(), m2m_options),
+                                            (model.one_to_many_dict(), one_to_many_options)):
+                options = {**(options or {}), 'entity_format': entity_format}
+                loads.append((relations_dict, options, False))
+                loaded.update(relation_name for relation_name, _, _ in
+                              self.relations_to_load(model, relations_dict, options))
+        if prefetch:
+            loads.append(([relation_name for relation_name in prefetch if relation_name not in loaded],
+                          {'entity_format': entity_format},
+                          True))
+        return loads
+
+    def load_relation_to_many_entities(self, model, instance_id, relations_dict, options, include_lazy=False):
+        data = self.load_relations_to_many_entities(model, [instance_id], relations_dict, options,
+                                                    include_lazy=include_lazy)
+        return {relation_name: related[instance_id] for relation_name, related in data.items()}
+
+    def prefetch_related(self, model, entities, relation_names=None, options=None,
+                         entity_format=EntityFormat.MODEL):
+        """Loads the given to many relations (by default all non lazy ones) for all entities
+        with one query per relation and attaches the related entities to them"""
+        model = self.get_model(model)
+        if not entities:
+            return entities
+        if relation_names is None or relation_names is True:
+            relations_dict = {**model.many_to_many_dict(), **model.one_to_many_dict()}
+            include_lazy = False
+        else:
+            relations_dict = {relation_name: model.get_relation(relation_name) for relation_name in relation_names}
+            include_lazy = True
+
+        id_field_name = model.id_field_name()
+        if entity_format == EntityFormat.MODEL:
+            instance_ids = [entity.id for entity in entities]
+        else:
+            instance_ids = [entity[id_field_name] for entity in entities]
+
+        data = self.load_relations_to_many_entities(model, instance_ids, relations_dict,
+                                                    options={**(options or {}), 'entity_format': entity_format},
+                                                    include_lazy=include_lazy)
+        for relation_name, related in data.items():
+            for instance_id, entity in zip(instance_ids, entities):
+                related_entities = related.get(instance_id, [])
+                if entity_format == EntityFormat.MODEL:
+                    self.set_related_entities(entity, relation_name, related_entities)
+                else:
+                    entity[relation_name] = related_entities
+        return entities
+
+    @staticmethod
+    def set_related_entities(entity, relation_name, related_entities):
+        relation = getattr(entity, relation_name)
+        if relation is entity.model.get_relation(relation_name):
+            # never clone the class level relation
+            relation = relation.clone()
+            setattr(entity, relation_name, relation)
+        relation.entities = related_entities
 
     # todo: make this method to method of FromClause
     def include_many_to_many_join(self, model, relation, from_clause):
@@ -339,7 +653,8 @@ class QueryWizzard:
                   raise_if_not_found=True,
                   load_relations_entities=True,
                   load_relations_aggregations=False,
-                  entity_format=EntityFormat.MODEL):
+                  entity_format=EntityFormat.MODEL,
+                  prefetch=None):
 
         model = self.get_model(model)
         filter_condition = Equals.id_as_parameter(model, id)
@@ -351,7 +666,8 @@ class QueryWizzard:
                             one_to_many_options=one_to_many_options,
                             load_relations_entities=load_relations_entities,
                             load_relations_aggregations=load_relations_aggregations,
-                            entity_format=entity_format)
+                            entity_format=entity_format,
+                            prefetch=prefetch)
         if instance is None and raise_if_not_found:
             raise DidNotFindObjectWithIdException(
                 msg=f'Did not find {model.__name__} with id {id}',
@@ -368,8 +684,47 @@ class QueryWizzard:
             one_to_many_options=None,
             load_relations_entities=True,
             load_relations_aggregations=False,
-            entity_format=EntityFormat.MODEL):
+            entity_format=EntityFormat.MODEL,
+            prefetch=None):
+        """prefetch: names of (also lazy) to many relations to load together with the non lazy ones"""
+
+        query = self.build_get_query(model,
+                                     select_fields=select_fields,
+                                     exclude_fields=exclude_fields,
+                                     filter_condition=filter_condition,
+                                     load_relations_aggregations=load_relations_aggregations)
+
+        self.execute_query(query)
+        data = self.fetchone()
 
+        if data is None:
+            return None
+
+        start = time.perf_counter()
+        data = query.row_decoder.to_dict(data, entity_format=entity_format)
+        self.add_hydration_time(start)
+        entity_id = data.get(query.model.id_field_name())
+
+        for relations_dict, options, include_lazy in self.get_relation_loads(
+                query.model,
+                load_relations_entities=load_relations_entities,
+                m2m_options=m2m_options,
+                one_to_many_options=one_to_many_options,
+                prefetch=prefetch,
+                entity_format=entity_format):
+            data.update(
+                **self.load_relation_to_many_entities(query.model,
+                                                      instance_id=entity_id,
+                                                      relations_dict=relations_dict,
+                                                      options=options,
+                                                      include_lazy=include_lazy)
+            )
+
+        return self.build_get_response(query.model, data, entity_format)
+
+    def build_get_query(self, model, select_fields=None, exclude_fields=None, filter_condition=None,
+                        load_relations_aggregations=False) -> Query:
+        """Query of get() (the compiled RowDecoder is set as query.row_decoder)"""
         query = QueryBuilder(model, self) \
             .select(select_fields, exclude_fields) \
             .add_filter_condition(filter_condition) \
@@ -392,70 +747,62 @@ class QueryWizzard:
         many_to_one_entities = self.handle_many_to_one_entities(model=query.model,
                                                                 select_fields=select_fields,
                                                                 from_clause=query.from_clause)
+        query.row_decoder = self.compile_row_decoder(query.model, select_fields, many_to_one_entities,
+                                                     one_to_many_aggregations, m2m_aggregations)
+        return query
 
-        print(query)
-
-        self.execute_query(query)
-        data = self.db.fetchone()
-
-        if data is None:
-            return None
-
-        data = self.model_instance_dict(query.model, data, entity_format, select_fields,
-                                        many_to_one_entities, one_to_many_aggregations,
-                                        m2m_aggregations)
-        entity_id = data.get(query.model.id_field_name())
-
-        print('keys')
-        print(data.keys())
-
-        if load_relations_entities:
-            data.update(
-                **self.load_relation_to_many_entities(query.model,
-                                                      instance_id=entity_id,
-                                                      relations_dict=query.model.many_to_many_dict(),
-                                                      options={**(m2m_options or {}),
-                                                               'entity_format': entity_format})
-            )
-            data.update(
-                **self.load_relation_to_many_entities(query.model,
-                                                      instance_id=entity_id,
-                                                      relations_dict=query.model.one_to_many_dict(),
-                                                      options={**(one_to_many_options or {}),
-                                                               'entity_format': entity_format})
-            )
-
+    def build_get_response(self, model, data, entity_format):
         # todo: refactor in method/class entitybuilder
         if entity_format == EntityFormat.MODEL:
-            entity = self.build_entity(
-                query.model,
-                data,
-                m2m_aggregations=m2m_aggregations
-            )
-            # self.handle_one_to_many(entity, one_to_many_options=one_to_many_options)
-            return entity
+            return self.build_entity(model, data)
         elif entity_format == EntityFormat.JSON:
             return data
 
     # todo: remove or refactor this method
-    def load_filter_values(self, filters):
+    def load_filter_values(self, filters, prefetch=None):
+        """Loads the entities selected by the relation filters, one query per filter
+        (prefetch: names of to many relations of the foreign models to load as well)"""
         if filters is None:
             return
         for filter_ in filters:
             if isinstance(filter_, (ManyToOneFilter, ManyToManyFilter)):
                 filter_.entities = list()
                 if filter_.value:
-                    for id_value in filter_.value:
-                        filter_.entities.append(
-                            self.get_by_id(model=filter_.relation.foreign_model,
-                                           id=id_value, load_relations_entities=False, load_relations_aggregations=True)
-                        )
+                    filter_.entities = self.get_all_by_ids(filter_.relation.foreign_model, filter_.value,
+                                                           prefetch=prefetch)
 
-    def get_all(self, query: Query, include_count=False,
-                entity_format=EntityFormat.MODEL):
-        # todo: put include_count and entity_format into options
-        # todo: somehow manage query.model better: possibly as extra parameter of this method instead of attribute of query
+    def get_all_by_ids(self, model, ids, entity_format=EntityFormat.MODEL, prefetch=None, raise_if_not_found=True):
+        """Loads the entities with the given ids (in the order of ids) with one query per chunk of ids"""
+        model = self.get_model(model)
+        id_column = ColumnReference(model.id_field_name(), table=model.table_name)
+        id_field_name = model.id_field_name()
+        ids = list(ids)
+        entities_by_id = {}
+        for i in range(0, len(ids), self.prefetch_chunk_size):
+            query = QueryBuilder(model, self) \
+                .add_filter_condition(In.column_as_parameters(id_column, ids[i:i + self.prefetch_chunk_size])) \
+                .build()
+            for entity in self.get_all(query, entity_format=entity_format, prefetch=prefetch):
+                entity_id = entity.id if entity_format == EntityFormat.MODEL else entity[id_field_name]
+                entities_by_id[entity_id] = entity
+        entities = []
+        for id_ in ids:
+            if id_ not in entities_by_id:
+                if raise_if_not_found:
+                    raise DidNotFindObjectWithIdException(
+                        msg=f'Did not find {model.__name__} with id {id_}',
+                        model_name=model.__name__,
+                        id=id_)
+                continue
+            entities.append(entities_by_id[id_])
+        return entities
 
+    def prepare_get_all(self, query: Query):
+        """Adds the joins of the non lazy many to one relations and the aggregations to the query
+        and returns the compiled RowDecoder for its rows"""
+        if query.row_decoder is not None:
+            # prepared before (the query is reused)
+            return query.row_decoder
         from_clause = query.from_clause
         select_fields = query.select_clause.items
 
@@ -467,101 +814,155 @@ class QueryWizzard:
         m2m_aggregations = self.include_many_to_many_aggregations(
             model=query.model, from_clause=from_clause, select_fields=select_fields)
 
-        self.db.create_cursor()
+        query.row_decoder = self.compile_row_decoder(query.model, select_fields, many_to_one_entities,
+                                                     one_to_many_aggregations, m2m_aggregations)
+        return query.row_decoder
+
+    def get_all(self, query: Query, include_count=False,
+                entity_format=EntityFormat.MODEL, prefetch=None, prefetch_options=None):
+        # todo: put include_count and entity_format into options
+        # todo: somehow manage query.model better: possibly as extra parameter of this method instead of attribute of query
+        # prefetch: list of to many relation names (or True for all non lazy ones) to load for all entities at once
+
+        row_decoder = self.prepare_get_all(query)
+        count = None
+        if include_count and self.db.supports_window_functions:
+            # the total is selected by the same statement (after the columns of the row decoder)
+            res = self.execute_fetchall(self.select_window_count(query))
+            count = self.window_count(query, res)
+        else:
+            res = self.execute_fetchall(query)
+        response = self.build_get_all_response(res=res, include_count=include_count, query=query,
+                                               entity_format=entity_format,
+                                               model=query.model, select_fields=query.select_clause.items,
+                                               many_to_one_entities=None,
+                                               one_to_many_aggregations=None,
+                                               m2m_aggregations=None,
+                                               row_decoder=row_decoder,
+                                               count=count)
+        if prefetch:
+            self.prefetch_related(query.model,
+                                  response['entities'] if include_count else response,
+                                  relation_names=prefetch,
+                                  options=prefetch_options,
+                                  entity_format=entity_format)
+        return response
+
+    def get_page(self, query: Query, entity_format=EntityFormat.MODEL, prefetch=None, prefetch_options=None):
+        """Entities of a query with keyset pagination (see QueryBuilder.keyset_pagination)
+        and the cursor of the next page (None if the page is not full)"""
+        pagination = query.pagination
+        if not isinstance(pagination, KeysetPagination):
+            raise ValueError('get_page needs a query with KeysetPagination')
+        row_decoder = self.prepare_get_all(query)
+        res = self.execute_fetchall(query)
+        entities = self.build_get_all_response(res=res, include_count=False, query=query,
+                                               entity_format=entity_format,
+                                               model=query.model, select_fields=query.select_clause.items,
+                                               many_to_one_entities=None,
+                                               one_to_many_aggregations=None,
+                                               m2m_aggregations=None,
+                                               row_decoder=row_decoder)
+        if prefetch:
+            self.prefetch_related(query.model, entities, relation_names=prefetch, options=prefetch_options,
+                                  entity_format=entity_format)
+        next_cursor = None
+        if len(res) == pagination.page_size:
+            next_cursor = pagination.next_cursor(query.select_clause.items, res[-1])
+        return {'entities': entities, 'next_cursor': next_cursor}
+
+    def iter_all(self, query: Query, batch_size=500, entity_format=EntityFormat.MODEL):
+        """Generator variant of get_all: the rows are fetched in batches of batch_size and the entities
+        are built lazily, so the memory used does not depend on the size of the result.
+        Uses a server side cursor if the connection supports it (PostgresConnection)."""
+        row_decoder = self.prepare_get_all(query)
+        cursor = self.db.create_streaming_cursor(batch_size=batch_size)
+        event = None
         try:
-            self.execute_query(query)
-        except (sqlite3.OperationalError, sqlite3.Error, sqlite3.Warning) as e:
-            print(query)
-            raise e
-
-        res = self.db.fetchall()
-        return self.build_get_all_response(res=res, include_count=include_count, query=query,
-                                           entity_format=entity_format,
-                                           model=query.model, select_fields=select_fields,
-                                           many_to_one_entities=many_to_one_entities,
-                                           one_to_many_aggregations=one_to_many_aggregations,
-                                           m2m_aggregations=m2m_aggregations)
+            self.execute_query(query, cursor=cursor)
+            # other statements may run while the generator is consumed: keep the event out of self._local
+            event, self._local.query_event = getattr(self._local, 'query_event', None), None
+            while True:
+                start = time.perf_counter()
+                rows = cursor.fetchmany(batch_size)
+                if event is not None:
+                    event.fetch_time += time.perf_counter() - start
+                    event.rows += len(rows)
+                if not rows:
+                    break
+                for row in rows:
+                    start = time.perf_counter()
+                    entity = row_decoder.decode(row, entity_format=entity_format)
+                    if event is not None:
+                        event.hydration_time += time.perf_counter() - start
+                    yield entity
+        finally:
+            cursor.close()
+            if event is not None:
+                self.instrumentation.record(event)
+
+    @staticmethod
+    def select_window_count(query: Query):
+        """Copy of the query with the total number of rows (without pagination) as last select item,
+        the query itself is not changed"""
+        window_query = copy.copy(query)
+        window_query.select_clause = SelectClause([*query.select_clause.items, 'COUNT(*) OVER ()'])
+        return window_query
+
+    @staticmethod
+    def window_count(query: Query, rows):
+        """Total of a query with select_window_count, None if it has to be counted separately
+        (the page is behind the last row)"""
+        if rows:
+            return int(rows[0][-1])
+        if query.pagination is None or not query.pagination.offset:
+            return 0
+        return None
 
     def build_get_all_response(self, res, include_count, query, entity_format, model,
-                               select_fields, many_to_one_entities, one_to_many_aggregations, m2m_aggregations):
+                               select_fields, many_to_one_entities, one_to_many_aggregations, m2m_aggregations,
+                               row_decoder=None, count=None):
+        """count: total number of rows if already known (see select_window_count)"""
         if not res:
             if include_count:
+                if count is None:
+                    count = self.count(model, query=query) if query.pagination and query.pagination.offset else 0
                 return {
                     'entities': [],
-                    'count': 0
+                    'count': count
                 }
             return []
-        entities = []
-        if entity_format == EntityFormat.MODEL:
-            for r in res:
-                data = self.model_instance_dict(
-                    model,
-                    r,
-                    entity_format,
-                    select_fields,
-                    many_to_one_entities,
-                    one_to_many_aggregations,
-                    m2m_aggregations)
-                entities.append(
-                    self.build_entity(
-                        model,
-                        data,
-                        m2m_aggregations=m2m_aggregations)
-                )
-        elif entity_format == EntityFormat.JSON:
-            for data in res:
-                entities.append(
-                    self.model_instance_dict(model, data, entity_format, select_fields,
-                                             many_to_one_entities, one_to_many_aggregations,
-                                             m2m_aggregations)
-                )
+        if row_decoder is None:
+            row_decoder = self.compile_row_decoder(model, select_fields, many_to_one_entities,
+                                                   one_to_many_aggregations, m2m_aggregations)
+        start = time.perf_counter()
+        entities = row_decoder.decode_all(res, entity_format=entity_format)
+        self.add_hydration_time(start)
         if include_count:
-            count = self.count(model, query=query)
+            if count is None:
+                count = self.count(model, query=query)
             return {'entities': entities, 'count': count}
         return entities
 
+    def compile_row_decoder(self, model, select_fields, many_to_one_relations=None,
+                            one_to_many_aggregations=None, m2m_aggregations=None):
+        model = self.get_model(model)
+        return RowDecoder(model, select_fields,
+                          many_to_one_relations=many_to_one_relations,
+                          one_to_many_aggregations=one_to_many_aggregations,
+                          m2m_aggregations=m2m_aggregations)
+
     def model_instance_dict(self, model, data, entity_format, select_fields,
                             many_to_one_relations, one_to_many_aggregations,
                             m2m_aggregations):
-        model = self.get_model(model)
-        kwargs = {}
-        for i, column_reference in enumerate(select_fields):
-            if column_reference.table == model.table_name:
-                kwargs[column_reference.name] = data[i]
-
-        # todo: refactor for loops by putting col_ref onto select_fields
-        for relation_name, relation in many_to_one_relations:
-            foreign_kwargs = {}
-            results = self.get_data(data, select_fields, relation.foreign_model.table_name)
-            for result in results:
-                # todo: type result into namedtuple
-                field_index = result[0]
-                foreign_kwargs[select_fields[field_index].name] = result[1]
-            if entity_format == EntityFormat.MODEL:
-                kwargs[relation_name] = relation.foreign_model(**foreign_kwargs)
-            elif entity_format == EntityFormat.JSON:
-                # print(foreign_kwargs)
-                kwargs[relation_name] = dict(foreign_kwargs)
-        # print(kwargs)
-
-        for relation_name, relation in one_to_many_aggregations:
-            # TODO: überarbeiten-> gleich wie m2m oder umgekehrt
-            results = self.get_data(data, select_fields, relation.table_name)
-            if results:
-                first_result = results[0]
-                kwargs[relation_name] = first_result[1]
-
-        for relation_name, relation in m2m_aggregations:
-            results = self.get_data(data, select_fields, relation)
-            if results:
-                first_result = results[0]
-                kwargs[relation_name] = first_result[1]
-
-        return kwargs
+        row_decoder = self.compile_row_decoder(model, select_fields, many_to_one_relations,
+                                               one_to_many_aggregations, m2m_aggregations)
+        return row_decoder.to_dict(data, entity_format=entity_format)
 
     def build_entity(self, model, data, m2m_aggregations=None):
+        # m2m aggregation values are part of data (on the key of the relation name)
         model = self.get_model(model)
-        return model(m2m_aggregations=m2m_aggregations, **data)
+        return model.from_dict(data)
 
     # todo: make static or utility
     def get_data(self, data, select_fields, reference):
@@ -589,7 +990,7 @@ class QueryWizzard:
                       from_clause=FromClause(m2m_relation.junction_table),
                       where_clause=WhereClause(where_clause))
         self.execute_query(query)
-        return self.db.fetchall()
+        return self.fetchall()
 
     def get_one_to_many_related_ids(self, model, instance_id, relation_name):
         one_to_many_relation = model.get_one_to_many_relation(relation_name)
@@ -602,7 +1003,7 @@ class QueryWizzard:
             .add_filter_condition(filter_condition) \
             .build()
         self.execute_query(query)
-        res = self.db.fetchall()
+        res = self.fetchall()
         return [val for sublist in res for val in sublist]
 
     def count_m2m(self, entity, relation_name):
@@ -618,32 +1019,39 @@ class QueryWizzard:
         self.include_many_to_many_join(model, relation, query.from_clause)
 
         self.execute_query(query)
-        data = self.db.fetchone()
+        data = self.fetchone()
         return int(data[0])
 
     def count(self, model, filter_condition=None, filters=None, fulltext_search=None, query=None):
+        query = self.build_count_query(model, filter_condition=filter_condition, filters=filters,
+                                       fulltext_search=fulltext_search, query=query)
+        rows = self.execute_fetchall(query)
+        if rows and rows[0]:
+            return int(rows[0][0])
+        return 0
+
+    def build_count_query(self, model, filter_condition=None, filters=None, fulltext_search=None, query=None):
         model = self.get_model(model)
 
+        select_field = f'count ({ColumnReference(model.id_field_name(), table=model.table_name)})'
         if query is not None:
-            # or count(*)
-            select_fields = [f'count ({ColumnReference(model.id_field_name(), table=model.table_name)})']
-            query.select_clause = SelectClause(*select_fields)
-            query.pagination = None
-            # query.select_clause.select_fields = [f'count ({ColumnReference(model.id_field_name(), table=model.table_name)})']
-        else:
-            query = QueryBuilder(model, self) \
-                .select([f'count ({ColumnReference(model.id_field_name(), table=model.table_name)})']) \
-                .add_filter_condition(filter_condition) \
-                .model_filters(filters) \
-                .fulltext_search(fulltext_search) \
-                .build()
+            # a new query on the clauses of the given one (which is not changed): without pagination and order,
+            # so that the sql (and the key in the result cache) is the same for all pages
+            count_query = Query(select_clause=SelectClause(select_field),
+                                from_clause=query.from_clause,
+                                where_clause=query.where_clause,
+                                groupby_clause=query.groupby_clause,
+                                having_clause=query.having_clause)
+            count_query.model = query.model
+            return count_query
+        query = QueryBuilder(model, self) \
+            .select([select_field]) \
+            .add_filter_condition(filter_condition) \
+            .model_filters(filters) \
+            .fulltext_search(fulltext_search) \
+            .build()
         query.orderby_clause = None
-
-        self.execute_query(query)
-        data = self.db.fetchone()
-        if data:
-            return int(data[0])
-        return 0
+        return query
 
     def build_simple_search_query(self, model, select_fields, search_column, value):
         model = self.get_model(model)
@@ -675,7 +1083,6 @@ class QueryWizzard:
             except RelationNotFoundException as exc:
                 # todo: log
                 # print(str(exc))
-                print('did not find relation ', column)
                 pass
             else:
                 if isinstance(relation, ManyToOne):
@@ -712,7 +1119,7 @@ class QueryWizzard:
                                                )
         self.execute_query(query)
 
-        data = self.db.fetchone()
+        data = self.fetchone()
         if data is None:
             return None
         # todo: handle case if more than one row is returned
@@ -732,16 +1139,25 @@ class QueryWizzard:
                 field=filter_column)
         return id_
 
-    def fulltext_search(self, model, search_value, pagesize, active_page, include_count=True, json=False):
-        query = QueryBuilder(model, self) \
-            .fulltext_search(search_value) \
-            .pagination(active_page, page_size=pagesize) \
-            .build()
-
-        data = {'list': self.get_all(query)}
-
-        if include_count:
-            data['count'] = self.count(model=model, query=query)
+    def fulltext_search(self, model, search_value, pagesize, active_page, include_count=True, json=False,
+                        keyset=False, cursor=None):
+        """keyset: paginate with cursors (data['next_cursor']) instead of active_page.
+        With a fulltext_backend the results are ordered by relevance (except with keyset pagination)"""
+        builder = QueryBuilder(model, self).fulltext_search(search_value, rank=not keyset)
+        if keyset:
+            query = builder.keyset_pagination(pagesize, cursor=cursor).build()
+            page = self.get_page(query)
+            data = {'list': page['entities'], 'next_cursor': page['next_cursor']}
+            if include_count:
+                # the count must not be restricted by the cursor condition
+                data['count'] = self.count(model=model, fulltext_search=search_value)
+        else:
+            query = builder.pagination(active_page, page_size=pagesize).build()
+            if include_count:
+                response = self.get_all(query, include_count=True)
+                data = {'list': response['entities'], 'count': response['count']}
+            else:
+                data = {'list': self.get_all(query)}
         if json:
             data['list'] = [el.as_json() for el in data['list']]
         return data
@@ -839,7 +1255,18 @@ class QueryWizzard:
                 filter_value=value
             )
 
-    def insert_query(self, model, data):
+    def many_to_one_values(self, model, data):
+        """Yields (column, relation, value) for the many to one relations in data"""
+        for column, value in data.items():
+            if not value or model.get_field(column) is not None:
+                continue
+            relation = model.get_relation(column)
+            if isinstance(relation, ManyToOne):
+                yield column, relation, value
+
+    def insert_query(self, model, data, m21_values=None):
+        """m21_values: already resolved foreign key ids of the many to one relations in data (by column),
+        the others are looked up with get_m21_value"""
         # todo: refactor: put on merge query builder?
         model = self.get_model(model)
         inserts = dict()
@@ -850,7 +1277,10 @@ class QueryWizzard:
                     continue
                 relation = model.get_relation(column)
                 if isinstance(relation, ManyToOne):
-                    fk_id = self.get_m21_value(relation, value)
+                    if m21_values is not None and column in m21_values:
+                        fk_id = m21_values[column]
+                    else:
+                        fk_id = self.get_m21_value(relation, value)
                     if fk_id:
                         inserts[relation.foreign_key_field] = fk_id
             else:
@@ -908,15 +1338,75 @@ class QueryWizzard:
             return self.get_by_id(model, inserted_id, entity_format=EntityFormat.JSON)
         return inserted_id
 
-    def execute_insert(self, model, data, insert_query):
+    def execute_insert_query(self, model, insert_query):
+        """Executes the insert query and returns the id of the inserted row: via INSERT ... RETURNING,
+        if the db supports it, otherwise via the lastrowid of the cursor"""
+        model = self.get_model(model)
+        id_field_name = model.id_field_name()
+        if self.db.supports_returning and id_field_name is not None:
+            insert_query.returning(id_field_name)
+            self.execute_query(insert_query)
+            row = self.fetchone()
+            return row[0] if row else None
         self.execute_query(insert_query)
-        inserted_id = self.last_insert_rowid()
+        inserted_id = self.db.lastrowid()
+        if inserted_id is None:
+            inserted_id = self.last_insert_rowid()
+        return inserted_id
+
+    def insert_rows(self, model, columns, rows):
+        """Inserts rows (value tuples in the order of columns) and returns the ids of the inserted rows
+        (in the order of rows), with one INSERT ... RETURNING statement if the db supports it
+        (otherwise one insert per row)"""
+        model = self.get_model(model)
+        if not rows:
+            return []
+        id_field_name = model.id_field_name()
+        if self.db.supports_returning and id_field_name is not None:
+            # one statement must not exceed the parameter limit of the db
+            rows_per_statement = max(1, self.db.max_variables // max(1, len(columns)))
+            ids = []
+            for i in range(0, len(rows), rows_per_statement):
+                chunk = rows[i:i + rows_per_statement]
+                insert_query = BatchInsertQuery.build(model.table_name, columns, chunk)
+                self.execute_query(insert_query.returning(id_field_name, *columns))
+                ids.extend(self.match_returned_ids(model, columns, chunk, self.fetchall()))
+            return ids
+        return [self.execute_insert_query(model, InsertQuery.build(model.table_name, dict(zip(columns, row))))
+                for row in rows]
+
+    @staticmethod
+    def match_returned_ids(model, columns, rows, returned_rows):
+        """Ids of the rows (in their order) from the rows (id, *values) of INSERT ... RETURNING, which come in
+        no guaranteed order. The rows are matched by their values, converted by the fields of the model (rows
+        with equal values are interchangeable). The values of the other rows were converted by the db
+        (e.g. '1' stored as 1): they get the remaining ids in ascending order, as the generated ids
+        increase in the order of the VALUES list."""
+        fields = [model.get_field(column) for column in columns]
+
+        def key(values):
+            return tuple(field.to_value(value) if field is not None else value for field, value in zip(fields, values))
+
+        ids = [None] * len(rows)
+        ids_by_values = {}
+        try:
+            for returned_row in returned_rows:
+                ids_by_values.setdefault(tuple(returned_row[1:]), []).append(returned_row[0])
+            for index, row in enumerate(rows):
+                candidates = ids_by_values.get(key(row))
+                if candidates:
+                    ids[index] = candidates.pop(0)
+        except TypeError:
+            # unhashable values
+            pass
+        matched_ids = set(id_ for id_ in ids if id_ is not None)
+        remaining_ids = iter(sorted(row[0] for row in returned_rows if row[0] not in matched_ids))
+        return [id_ if id_ is not None else next(remaining_ids) for id_ in ids]
+
+    def execute_insert(self, model, data, insert_query):
+        inserted_id = self.execute_insert_query(model, insert_query)
 
         related_queries = self.get_related_to_many_insert_and_update_queries(model, inserted_id, data)
-        print('related_queries')
-        for query in related_queries:
-            print(query)
-            print(query.params)
         for query in related_queries:
             self.execute_query(query)
 
@@ -938,10 +1428,183 @@ class QueryWizzard:
             return self.get_by_id(model, inserted_id, entity_format=EntityFormat.JSON)
         return inserted_id
 
+    def resolve_many_to_one_values(self, model, rows):
+        """Looks up the foreign key ids of the many to one values of all rows (data dicts as for create)
+        with one query per relation (and chunk of values). Returns {column: {value: fk_id}}"""
+        model = self.get_model(model)
+        relations = {}
+        values = {}
+        for data in rows:
+            for column, relation, value in self.many_to_one_values(model, data):
+                relations[column] = relation
+                values.setdefault(column, set()).add(value)
+
+        resolved = {}
+        for column, relation in relations.items():
+            if relation.load_all:
+                resolved[column] = {value: int(value) for value in values[column]}
+                continue
+            foreign_model = self.get_model(relation.foreign_model)
+            search_column = ColumnReference(relation.update_search_column, table=foreign_model.table_name)
+            id_column = ColumnReference(foreign_model.id_field_name(), table=foreign_model.table_name)
+            column_values = list(values[column])
+            fk_ids = {}
+            for i in range(0, len(column_values), self.prefetch_chunk_size):
+                query = QueryBuilder(foreign_model, self) \
+                    .select([id_column, search_column]) \
+                    .add_filter_condition(In.column_as_parameters(
+                        search_column, column_values[i:i + self.prefetch_chunk_size])) \
+                    .build()
+                self.execute_query(query)
+                for fk_id, value in self.fetchall():
+                    fk_ids.setdefault(value, fk_id)
+            for value in column_values:
+                if value not in fk_ids:
+                    raise DidNotFindForeignIdException(
+                        f'Did not find {foreign_model.__name__} with {relation.update_search_column} = {value}',
+                        field=relation.update_search_column)
+            resolved[column] = fk_ids
+        return resolved
+
+    def insert_many(self, model, rows, m21_values):
+        """Inserts the rows (data dicts as for create) with one multi row insert per set of columns,
+        m21_values: see resolve_many_to_one_values. Returns the ids of the inserted rows."""
+        model = self.get_model(model)
+        groups = {}
+        for index, data in enumerate(rows):
+            row_m21_values = {column: m21_values[column][value]
+                              for column, relation, value in self.many_to_one_values(model, data)}
+            insert_query = self.insert_query(model, data, m21_values=row_m21_values)
+            groups.setdefault(tuple(insert_query.insert_clause.columns), []).append((index, insert_query.params))
+        ids = [None] * len(rows)
+        for columns, group in groups.items():
+            group_ids = self.insert_rows(model, columns, [values for index, values in group])
+            for (index, values), inserted_id in zip(group, group_ids):
+                ids[index] = inserted_id
+        return ids
+
+    def insert_related_to_many(self, model, instance_ids, rows):
+        """Bulk variant of get_related_to_many_insert_and_update_queries: inserts the junction rows of the
+        many to many relations and updates the foreign keys of the one to many relations in rows
+        with one executemany per relation"""
+        model = self.get_model(model)
+        id_field_name = model.id_field_name()
+        related = {}
+        for instance_id, data in zip(instance_ids, rows):
+            for column, value in data.items():
+                if not value or model.get_field(column) is not None:
+                    continue
+                relation = model.get_relation(column)
+                if isinstance(relation, ManyToMany):
+                    foreign_model = self.get_model(relation.foreign_model)
+                    related.setdefault(column, []).extend(
+                        (instance_id, foreign_id) for foreign_id in set(sanitize_id_array(foreign_model, value)))
+                elif isinstance(relation, OneToMany):
+                    related.setdefault(column, []).extend(
+                        (instance_id, related_id) for related_id in value)
+
+        for column, pairs in related.items():
+            relation = model.get_relation(column)
+            foreign_model = self.get_model(relation.foreign_model)
+            if isinstance(relation, ManyToMany):
+                query = InsertQuery.build(relation.junction_table, inserts={
+                    id_field_name: None,
+                    foreign_model.id_field_name(): None
+                })
+            else:
+                query = UpdateQuery.build(foreign_model,
+                                          filter_condition=Equals.id_as_parameter(foreign_model, None),
+                                          updates={id_field_name: None})
+            self.execute_many(query, pairs)
+
+    def create_many(self, model, rows, chunk_size=500):
+        """Creates many entities (rows: list of data dicts as for create) with a few statements per chunk:
+        one lookup query per many to one relation, one multi row insert (per set of columns),
+        one executemany per to many relation and one commit.
+        Returns the ids of the created entities (in the order of rows).
+        If a chunk fails, it is rolled back (the previous chunks stay committed)."""
+        model = self.get_model(model)
+        ids = []
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            try:
+                m21_values = self.resolve_many_to_one_values(model, chunk)
+                chunk_ids = self.insert_many(model, chunk, m21_values)
+                self.insert_related_to_many(model, chunk_ids, chunk)
+            except Exception as exc:
+                self.rollback()
+                raise exc
+            else:
+                self.commit()
+            ids.extend(chunk_ids)
+        return ids
+
+    def update_many(self, model, rows, chunk_size=500):
+        """Updates many entities, every row is a data dict (as for update) including the id of the entity.
+        Rows updating the same columns are executed with one executemany, many to many relations in rows
+        are replaced (i.e. the given ids are the new related ids). Commits once per chunk."""
+        model = self.get_model(model)
+        id_field_name = model.id_field_name()
+        for i in range(0, len(rows), chunk_size):
+            chunk = rows[i:i + chunk_size]
+            update_groups = {}
+            m2m_values = {}
+            for data in chunk:
+                instance_id = data[id_field_name]
+                updates = {}
+                for column, value in data.items():
+                    if column == id_field_name:
+                        continue
+                    if model.get_field(column) is not None:
+                        updates[column] = value
+                        continue
+                    relation = model.get_relation(column)
+                    if isinstance(relation, ManyToOne):
+                        if value:
+                            updates[relation.foreign_key_field] = value
+                    elif isinstance(relation, ManyToMany):
+                        m2m_values.setdefault(column, []).append((instance_id, value or []))
+                    elif relation is None:
+                        raise Exception(f'Error during update: Did not find column {column}')
+                    else:
+                        raise Exception(f'Error during update: Could not handle relation {repr(relation)}')
+                if updates:
+                    update_groups.setdefault(tuple(updates.keys()), []).append(
+                        list(updates.values()) + [instance_id])
+            try:
+                for columns, seq_of_params in update_groups.items():
+                    query = UpdateQuery.build(model,
+                                              filter_condition=Equals.id_as_parameter(model, None),
+                                              updates=dict.fromkeys(columns))
+                    self.execute_many(query, seq_of_params)
+                for column, values in m2m_values.items():
+                    relation = model.get_relation(column)
+                    instance_ids = [instance_id for instance_id, related_ids in values]
+                    self.execute_query(DeleteQuery(relation.junction_table, In.column_as_parameters(
+                        ColumnReference(id_field_name, table=relation.junction_table), instance_ids)))
+                instance_ids = []
+                related_rows = []
+                for column, values in m2m_values.items():
+                    for instance_id, related_ids in values:
+                        instance_ids.append(instance_id)
+                        related_rows.append({column: related_ids})
+                self.insert_related_to_many(model, instance_ids, related_rows)
+            except Exception as exc:
+                self.rollback()
+                raise exc
+            else:
+                self.commit()
+
     def update(self, model, filter_condition, instance_id, prev_data, data, fetch_m21_values=False):
         # todo only update changed data
         # i.e. difference data - instance.data
         # todo: what about commit?
+        queries = self.build_update_queries(model, filter_condition, instance_id, prev_data, data,
+                                            fetch_m21_values=fetch_m21_values)
+        self.execute_queries_in_transaction(queries=queries)
+
+    def build_update_queries(self, model, filter_condition, instance_id, prev_data, data, fetch_m21_values=False):
+        """Returns the update query and the queries updating the many to many junction tables"""
         model = self.get_model(model)
         updates = dict()
         m2m_update_queries = []
@@ -985,8 +1648,7 @@ class QueryWizzard:
 
         update_query = UpdateQuery.build(
             model, filter_condition=filter_condition, updates=updates)
-
-        self.execute_queries_in_transaction(queries=[update_query] + m2m_update_queries)
+        return [update_query] + m2m_update_queries
 
     def update_by_id(self, model, instance_id, data, prev_data, commit=True, return_updated_object=True):
         # todo: add extensive doc string for params!!
@@ -1021,7 +1683,57 @@ class QueryWizzard:
         )
         return query
 
-    # def build_
+    def build_create_index_queries(self, model, if_not_exists=False):
+        """CREATE INDEX queries of the model: its declared indexes (model.indexes) and an index on every
+        foreign key column (of the table and of the tables of its one to many relations), unless the column
+        is already the first column of the primary key, a unique constraint or another index"""
+        model = self.get_model(model)
+        indexes = {}
+        leading_columns = {}
+
+        def add(table_name, index):
+            name = index.index_name(table_name)
+            if name not in indexes:
+                indexes[name] = (table_name, index)
+                leading_columns.setdefault(table_name, set()).add(index.columns[0])
+
+        def add_foreign_key_index(table_name, column):
+            if column not in leading_columns.get(table_name, ()):
+                add(table_name, Index(column))
+
+        for index in model.indexes or []:
+            add(model.table_name, index)
+        own_columns = leading_columns.setdefault(model.table_name, set())
+        for field_name, field in model.fields(include_never_select_fields=True):
+            if field.primary_key or field.unique:
+                own_columns.add(field_name)
+        for constraint in model.uniqueness_constraints or []:
+            own_columns.add(constraint[0])
+
+        for field_name, field in model.fields(include_never_select_fields=True):
+            if field.foreign_key is not None:
+                add_foreign_key_index(model.table_name, field_name)
+        for relation_name, relation in model.many_to_one_relations():
+            add_foreign_key_index(model.table_name, relation.foreign_key_field)
+        for relation_name, relation in model.one_to_many_relations():
+            foreign_model = self.get_model(relation.foreign_model)
+            add_foreign_key_index(foreign_model.table_name, model.id_field_name())
+
+        connection_cls = self.connection_cls
+        supports_include = connection_cls is not None and connection_cls.supports_index_include
+        queries = []
+        for name, (table_name, index) in indexes.items():
+            columns = index.columns
+            if not supports_include and not index.unique:
+                # without INCLUDE the covering columns are appended to the key (same effect for index only scans),
+                # but not to a unique index, whose uniqueness would change
+                columns = index.columns + index.include
+            queries.append(CreateIndexQuery(name, table_name, columns,
+                                            unique=index.unique,
+                                            if_not_exists=if_not_exists,
+                                            include=index.include if supports_include else None,
+                                            where=index.where))
+        return queries
 
     def create_table(self, model, if_not_exists=False):
         model = self.get_model(model)
@@ -1,28 +1,41 @@
 
 
 class NodeVisitor:
+    """Dispatches nodes to the visit_<ClassName> method of the node class or of its nearest ancestor.
+    The method found for a node type is cached per visitor class (see dispatch)."""
+
+    _dispatch_cache = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch_cache = {}
 
     def visit(self, node, *args, **kwargs):
-        cls_ = type(node)
-        method_name = 'visit_' + cls_.__name__
-        visitor = getattr(self, method_name, None)
-        if visitor is None:
-            for ancestor in cls_.__mro__:
-                method_name = 'visit_' + ancestor.__name__
-                visitor = getattr(self, method_name, None)
-                if visitor:
-                    break
-
-        if visitor:
-            return visitor(node, *args, **kwargs)
-        else:
-            # print(f'no visit_ found for {cls_.__name__}')
-            try:
-                return repr(node)
-            except TypeError:
-                raise Exception(f'Node {node.__class__.__name__}.__repr__ did not return str!')
-            #return self.generic_visit(node, *args, **kwargs)
+        visitor = self.dispatch(type(node))
+        if visitor is not None:
+            return visitor(self, node, *args, **kwargs)
+        # print(f'no visit_ found for {type(node).__name__}')
+        try:
+            return repr(node)
+        except TypeError:
+            raise Exception(f'Node {node.__class__.__name__}.__repr__ did not return str!')
+        #return self.generic_visit(node, *args, **kwargs)
+
+    def dispatch(self, node_cls):
+        """Returns the (unbound) visit method for nodes of type node_cls or None"""
+        try:
+            return self._dispatch_cache[node_cls]
+        except KeyError:
+            visitor = self._dispatch_cache[node_cls] = self.find_visitor(node_cls)
+            return visitor
+
+    def find_visitor(self, node_cls):
+        for ancestor in node_cls.__mro__:
+            visitor = getattr(type(self), 'visit_' + ancestor.__name__, None)
+            if visitor is not None:
+                return visitor
+        return None
 
     def generic_visit(self, node, *args, **kwargs):
         text = 'No visit_{} method'.format(type(node).__name__)
-        return text
\ No newline at end of file
+        return text
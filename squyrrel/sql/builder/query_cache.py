@@ -0,0 +1,123 @@
+from collections import OrderedDict
+
+from squyrrel.sql.expressions import Parameter
+
+
+class QueryShape:
+    """Cached rendering of one query shape: the sql and the parameter extraction plan,
+    i.e. the positions (in fingerprint walk order) of the Parameter nodes making up query.params"""
+
+    def __init__(self, sql, param_plan):
+        self.sql = sql
+        self.param_plan = param_plan
+
+    def params(self, parameters):
+        if self.param_plan is None:
+            return None
+        return [parameters[i].value for i in self.param_plan]
+
+
+class QueryCache:
+    """LRU cache of rendered sql for query shapes.
+
+    Two queries have the same shape if their node trees are equal except for the values of
+    their Parameter nodes (which are rendered as placeholders anyway). The fingerprint of a
+    query is computed by walking its nodes, which is much cheaper than rendering it.
+    """
+
+    # attributes which do not influence the rendered sql
+    ignored_attributes = frozenset(('model', 'row_decoder', 'seq_of_params'))
+
+    def __init__(self, builder, max_size=256):
+        self.builder = builder
+        self.max_size = max_size
+        self.shapes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def clear(self):
+        self.shapes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        return {'size': len(self.shapes), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+    def fingerprint(self, query):
+        """Returns the structural key of the query and its Parameter nodes in walk order"""
+        parameters = []
+        key = self._fingerprint(query, parameters)
+        return key, parameters
+
+    def _fingerprint(self, node, parameters):
+        if isinstance(node, Parameter):
+            parameters.append(node)
+            return type(node)
+        if isinstance(node, (str, int, float, bool, type(None), type)):
+            # with the type, as 1, 1.0 and True are equal keys but render differently
+            return type(node), node
+        if isinstance(node, (list, tuple)):
+            return (type(node),) + tuple(self._fingerprint(item, parameters) for item in node)
+        if isinstance(node, dict):
+            return (dict,) + tuple((key, self._fingerprint(value, parameters)) for key, value in node.items())
+        attributes = getattr(node, '__dict__', None)
+        if attributes is None:
+            try:
+                hash(node)
+            except TypeError:
+                return repr(node)
+            return node
+        return (type(node),) + tuple((attr_name, self._fingerprint(value, parameters))
+                                     for attr_name, value in attributes.items()
+                                     if attr_name not in self.ignored_attributes)
+
+    def render(self, query):
+        """Returns (sql, params) of the query, rendering it only if its shape is not cached"""
+        key, parameters = self.fingerprint(query)
+        try:
+            shape = self.shapes[key]
+        except TypeError:
+            # unhashable node somewhere in the tree
+            self.misses += 1
+            return self.builder.build(query), query.params
+        except KeyError:
+            self.misses += 1
+            shape = self.compile(query, parameters)
+            if shape is None:
+                return self.builder.build(query), query.params
+            self.shapes[key] = shape
+            if len(self.shapes) > self.max_size:
+                self.shapes.popitem(last=False)
+        else:
+            self.hits += 1
+            self.shapes.move_to_end(key)
+        return shape.sql, shape.params(parameters)
+
+    def compile(self, query, parameters):
+        """Renders the query and finds out which Parameter nodes make up query.params (and in which order)
+        by temporarily replacing their values by sentinels. Returns None if the params of the query
+        cannot be traced back to its Parameter nodes, such queries are not cached."""
+        sql = self.builder.build(query)
+        values = [parameter.value for parameter in parameters]
+        sentinels = [object() for _ in parameters]
+        try:
+            for parameter, sentinel in zip(parameters, sentinels):
+                parameter.value = sentinel
+            params = query.params
+        finally:
+            for parameter, value in zip(parameters, values):
+                parameter.value = value
+        if params is None:
+            return QueryShape(sql, None)
+        positions = {id(sentinel): i for i, sentinel in enumerate(sentinels)}
+        param_plan = []
+        for param in params:
+            i = positions.get(id(param))
+            if i is None:
+                return None
+            param_plan.append(i)
+        return QueryShape(sql, param_plan)
@@ -1,8 +1,166 @@
 from .node_visitor import NodeVisitor
-
+from squyrrel.sql.join import JoinConstruct, join_type
 
 
 class SqlBuilder(NodeVisitor):
+    """Renders sql nodes. The visit_ methods append the sql to a single list buffer (joined once in build),
+    nodes without visit_ method are rendered by their __repr__.
+    The output is the same as repr(node)."""
 
     def build(self, node):
-        return self.visit(node)
\ No newline at end of file
+        buffer = []
+        self.write(node, buffer)
+        return ''.join(buffer)
+
+    def write(self, node, buffer):
+        visitor = self.dispatch(type(node))
+        if visitor is None:
+            buffer.append(repr(node))
+        else:
+            visitor(self, node, buffer)
+
+    def write_str(self, node, buffer):
+        """analogue of str(node)"""
+        if isinstance(node, str):
+            buffer.append(node)
+        elif type(node).__str__ is object.__str__:
+            self.write(node, buffer)
+        else:
+            buffer.append(str(node))
+
+    def write_list(self, nodes, buffer, write=None, separator=', '):
+        write = write or self.write
+        for i, node in enumerate(nodes):
+            if i:
+                buffer.append(separator)
+            write(node, buffer)
+
+    def find_visitor(self, node_cls):
+        # a node class overriding __repr__ (without a more specific visit_ method) is rendered by its __repr__
+        for ancestor in node_cls.__mro__:
+            visitor = getattr(type(self), 'visit_' + ancestor.__name__, None)
+            if visitor is not None:
+                return visitor
+            if '__repr__' in ancestor.__dict__:
+                return None
+        return None
+
+    def write_select_item(self, item, buffer):
+        if isinstance(item, str):
+            buffer.append(item)
+        else:
+            self.write(item, buffer)
+
+    # queries
+
+    def visit_Query(self, query, buffer):
+        clause_separation = '\n' + query.indent
+        if query.is_subquery:
+            buffer.append('(')
+        self.write_list(query.get_clauses(), buffer, separator=clause_separation)
+        if query.is_subquery:
+            buffer.append(')')
+            if query.alias is not None:
+                buffer.append(f' AS {query.alias}')
+        else:
+            buffer.append(';')
+
+    def visit_UpdateQuery(self, query, buffer):
+        self.write_list((query.update_clause, query.set_clause, query.where_clause), buffer, separator='\n')
+        buffer.append(';')
+
+    def visit_DeleteQuery(self, query, buffer):
+        self.write_list((query.delete_clause, query.where_clause), buffer, separator='\n')
+        buffer.append(';')
+
+    def visit_InsertQuery(self, query, buffer):
+        self.write_list((query.insert_clause, query.values_clause), buffer, separator='\n')
+        if query.returning_clause is not None:
+            buffer.append('\n')
+            self.write(query.returning_clause, buffer)
+        buffer.append(';')
+
+    # clauses
+
+    def visit_SelectClause(self, clause, buffer):
+        buffer.append('SELECT ')
+        self.write_list(clause.items, buffer, write=self.write_select_item)
+
+    def visit_FromClause(self, clause, buffer):
+        buffer.append('FROM ')
+        self.write(clause.table_reference, buffer)
+
+    def visit_WhereClause(self, clause, buffer):
+        buffer.append('WHERE ')
+        self.write(clause.condition, buffer)
+
+    def visit_GroupByClause(self, clause, buffer):
+        buffer.append('GROUP BY ')
+        self.write_list(clause.items, buffer, write=self.write_select_item)
+
+    def visit_OrderByClause(self, clause, buffer):
+        buffer.append('ORDER BY ')
+        for i, column in enumerate(clause.columns):
+            if i:
+                buffer.append(', ')
+            self.write(column, buffer)
+            buffer.append(' ASC' if clause.ascending.get(column, True) else ' DESC')
+
+    def visit_SetClause(self, clause, buffer):
+        buffer.append('SET ')
+        self.write_list(clause.updates, buffer)
+
+    def visit_ValuesClause(self, clause, buffer):
+        buffer.append('VALUES (')
+        self.write_list(clause.values, buffer)
+        buffer.append(')')
+
+    # joins
+
+    def visit_JoinConstruct(self, join, buffer):
+        if join.table1 is None:
+            pass
+        elif isinstance(join.table1, JoinConstruct):
+            self.visit_JoinConstruct(join.table1, buffer)
+            buffer.append('\n')
+        else:
+            self.write(join.table1, buffer)
+            buffer.append('\n')
+        buffer.append(join_type[join.join_type.value])
+        buffer.append(' ')
+        self.write_str(join.table2, buffer)
+        buffer.append('\n')
+        self.write(join.join_condition, buffer)
+
+    def visit_OnJoinCondition(self, condition, buffer):
+        buffer.append('ON ')
+        self.write(condition.boolean_expr, buffer)
+
+    # expressions
+
+    def visit_ComparisionOperator(self, operator, buffer):
+        self.write(operator.lhs, buffer)
+        buffer.append(f' {operator.operator_name} ')
+        self.write(operator.rhs, buffer)
+
+    def visit_BooleanBinaryOperator(self, operator, buffer):
+        buffer.append('(')
+        self.write_list(operator.operands, buffer, separator=f' {operator.operator_name} ')
+        buffer.append(')')
+
+    def visit_Not(self, operator, buffer):
+        buffer.append('NOT ')
+        self.write(operator.predicate, buffer)
+
+    def visit_In(self, predicate, buffer):
+        self.write(predicate.lhs, buffer)
+        buffer.append(' IN (')
+        self.write_list(predicate.values, buffer)
+        buffer.append(')')
+
+    def visit_Function(self, function, buffer):
+        buffer.append(f'{function.name}(')
+        self.write_list(function.args, buffer)
+        buffer.append(')')
+        if function.alias is not None:
+            buffer.append(f' AS {function.alias}')
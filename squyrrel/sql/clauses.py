@@ -1,3 +1,7 @@
+import base64
+import datetime
+import json
+
 from squyrrel.sql.expressions import (Equals, Parameter)
 from squyrrel.sql.references import ColumnReference
 from squyrrel.sql.table import TableName
@@ -46,6 +50,13 @@ class OrderByClause:
         direction = 'ASC' if asc else 'DESC'
         return f'{repr(column)} {direction}'
 
+    @property
+    def params(self):
+        params = []
+        for column in self.columns:
+            params.extend(column.params)
+        return params
+
     def __repr__(self):
         sort_specs = [self.get_column_repr(column) for column in self.columns]
         sort_specs = ', '.join(sort_specs)
@@ -120,6 +131,53 @@ class Pagination:
         return f'LIMIT {self.page_size} OFFSET {self.offset}'
 
 
+class KeysetPagination(Pagination):
+    """LIMIT page_size, without offset: the rows after the previous page are selected by a condition
+    on the order by columns (see QueryBuilder.keyset_pagination), which are passed on in the cursor"""
+
+    def __init__(self, page_size, columns, ascending):
+        super().__init__(page_size)
+        self.columns = columns
+        self.ascending = ascending
+
+    def next_cursor(self, select_items, row):
+        """Cursor of the page after row (the last row of the current page)"""
+        return self.encode_cursor([row[select_items.index(column)] for column in self.columns])
+
+    # values json cannot represent are encoded as {type name: isoformat}
+    cursor_value_types = {'datetime': datetime.datetime, 'date': datetime.date, 'time': datetime.time}
+
+    @classmethod
+    def encode_cursor_value(cls, value):
+        for type_name, value_type in cls.cursor_value_types.items():
+            if isinstance(value, value_type):
+                return {type_name: value.isoformat()}
+        raise TypeError(f'Cannot encode {value!r} of type {type(value).__name__} in a cursor')
+
+    @classmethod
+    def decode_cursor_value(cls, data):
+        if len(data) == 1:
+            type_name, value = next(iter(data.items()))
+            if type_name in cls.cursor_value_types and isinstance(value, str):
+                return cls.cursor_value_types[type_name].fromisoformat(value)
+        raise ValueError(f'Invalid cursor value: {data}')
+
+    @classmethod
+    def encode_cursor(cls, values):
+        return base64.urlsafe_b64encode(json.dumps(values, default=cls.encode_cursor_value).encode('utf8')) \
+            .decode('ascii')
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')), object_hook=cls.decode_cursor_value)
+        except ValueError:
+            raise ValueError(f'Invalid cursor: {cursor}')
+        if not isinstance(values, list):
+            raise ValueError(f'Invalid cursor: {cursor}')
+        return values
+
+
 #### UPDATE STATEMENT ###
 
 
@@ -164,6 +222,17 @@ class InsertClause:
         return f'INSERT INTO {self.table} ({cols})'
 
 
+class ReturningClause:
+    """used in INSERT query (sqlite >= 3.35 and postgres)"""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __repr__(self):
+        cols = ', '.join(str(column) for column in self.columns)
+        return f'RETURNING {cols}'
+
+
 class DeleteClause:
 
     def __init__(self, table):
@@ -89,6 +89,19 @@ class Literal(ValueExpression):
     def columns(self):
         return []
 
+    @staticmethod
+    def from_value(value):
+        """Literal of a python value (for sql that is written out instead of executed with parameters)"""
+        if isinstance(value, ValueExpression):
+            return value
+        if value is None:
+            return Literal(None)
+        if isinstance(value, bool):
+            return NumericalLiteral(int(value))
+        if isinstance(value, (int, float)):
+            return NumericalLiteral(value)
+        return StringLiteral(str(value))
+
 
 ScalarExpression = ValueExpression
 
@@ -180,12 +193,15 @@ class BooleanExpression(Predicate):
 class ComparisionOperator(Predicate):
     """The lhs and rhs of comparision operators are value expressions"""
 
-    # todo: class attribute: operator_token = Token('=')
+    operator_name = None
 
     def __init__(self, lhs, rhs):
         self.lhs = lhs
         self.rhs = rhs
 
+    def __repr__(self):
+        return f'{repr(self.lhs)} {self.operator_name} {repr(self.rhs)}'
+
     @property
     def params(self):
         return self.lhs.params + self.rhs.params
@@ -203,6 +219,7 @@ class ComparisionOperator(Predicate):
 
 
 class Equals(ComparisionOperator):
+    operator_name = '='
 
     @classmethod
     def id_as_parameter(cls, model, id):
@@ -215,11 +232,9 @@ class Equals(ComparisionOperator):
         return cls(lhs=column_reference,
                    rhs=Parameter(value))
 
-    def __repr__(self):
-        return f'{repr(self.lhs)} = {repr(self.rhs)}'
-
 
 class Like(ComparisionOperator):
+    operator_name = 'LIKE'
 
     @classmethod
     def column_as_parameter(cls, column_reference, search_value):
@@ -227,14 +242,100 @@ class Like(ComparisionOperator):
         return cls(lhs=column_reference,
                    rhs=Parameter(f'%{search_value}%'))
 
+
+class GreaterThanOrEquals(ComparisionOperator):
+    operator_name = '>='
+
+
+class GreaterThan(ComparisionOperator):
+    operator_name = '>'
+
+
+class LessThan(ComparisionOperator):
+    operator_name = '<'
+
+
+class RowValueComparison(Predicate):
+    """(lhs1, lhs2, ...) > (rhs1, rhs2, ...): the row values are compared lexicographically"""
+
+    def __init__(self, lhs, rhs, operator_name='>'):
+        if len(lhs) != len(rhs):
+            raise ValueError('Row values of different length')
+        self.lhs = lhs
+        self.rhs = rhs
+        self.operator_name = operator_name
+
+    @property
+    def params(self):
+        params = []
+        for value in self.lhs + self.rhs:
+            params.extend(value.params)
+        return params
+
+    @property
+    def columns(self):
+        columns = []
+        for value in self.lhs:
+            columns.extend(value.columns)
+        return columns
+
     def __repr__(self):
-        return f'{repr(self.lhs)} LIKE {repr(self.rhs)}'
+        lhs = ', '.join(repr(value) for value in self.lhs)
+        rhs = ', '.join(repr(value) for value in self.rhs)
+        return f'({lhs}) {self.operator_name} ({rhs})'
 
 
-class GreaterThanOrEquals(ComparisionOperator):
+class SqlFragment(Predicate):
+    """Sql which has no node class (e.g. dialect specific operators and functions), written out as is.
+    Its ? placeholders are the parameters (in order), columns are the columns it refers to."""
+
+    def __init__(self, sql, parameters=None, columns=None):
+        self.sql = sql
+        self.parameters = parameters or []
+        self.referenced_columns = columns or []
+
+    @property
+    def params(self):
+        params = []
+        for parameter in self.parameters:
+            params.extend(parameter.params)
+        return params
+
+    @property
+    def columns(self):
+        return list(self.referenced_columns)
 
     def __repr__(self):
-        return f'{repr(self.lhs)} >= {repr(self.rhs)}'
+        return self.sql
+
+
+class In(Predicate):
+    """lhs IN (value1, value2, ...)"""
+
+    def __init__(self, lhs, values):
+        self.lhs = lhs
+        self.values = values
+
+    @classmethod
+    def column_as_parameters(cls, column_reference, values):
+        column_reference = sanitize_column_reference(column_reference)
+        return cls(lhs=column_reference,
+                   values=[Parameter(value) for value in values])
+
+    @property
+    def params(self):
+        params = list(self.lhs.params)
+        for value in self.values:
+            params.extend(value.params)
+        return params
+
+    @property
+    def columns(self):
+        return self.lhs.columns
+
+    def __repr__(self):
+        values = ', '.join(repr(value) for value in self.values)
+        return f'{repr(self.lhs)} IN ({values})'
 
 
 class BooleanOperator(Predicate):
@@ -242,35 +343,59 @@ class BooleanOperator(Predicate):
 
 
 class BooleanBinaryOperator(BooleanOperator):
+    """(operand1 OP operand2 OP ...): n-ary, so that long chains of conditions
+    are rendered and their params collected in one pass (instead of a deep binary tree)"""
     operator_name = None
 
-    def __init__(self, lhs, rhs):
-        if not isinstance(lhs, Predicate) or not isinstance(rhs, Predicate):
-            raise Exception(f'Both sides of the {self.__class__.operator_name} operator must be of type Predicate')
-        self.lhs = lhs
-        self.rhs = rhs
+    def __init__(self, lhs, rhs, *operands):
+        operands = [lhs, rhs, *operands]
+        for operand in operands:
+            if not isinstance(operand, Predicate):
+                raise Exception(f'All operands of the {self.__class__.operator_name} operator must be of type Predicate')
+        self.operands = operands
+
+    @property
+    def lhs(self):
+        return self.operands[0]
+
+    @property
+    def rhs(self):
+        """the right hand side as binary operator (i.e. everything after the first operand)"""
+        if len(self.operands) == 2:
+            return self.operands[1]
+        return self.__class__(*self.operands[1:])
 
     def __repr__(self):
-        return f'({repr(self.lhs)} {self.operator_name} {repr(self.rhs)})'
+        operator = f' {self.operator_name} '
+        return f'({operator.join(repr(operand) for operand in self.operands)})'
 
     @property
     def params(self):
-        # todo: lhs is of type Predicate, but params not resolved attribute of this class?
-        return self.lhs.params + self.rhs.params
+        params = []
+        for operand in self.operands:
+            params.extend(operand.params)
+        return params
 
     @property
     def columns(self):
-        # todo: lhs is of type Predicate, but params not resolved attribute of this class?
-        return self.lhs.columns + self.rhs.columns
+        columns = []
+        for operand in self.operands:
+            columns.extend(operand.columns)
+        return columns
 
     @classmethod
     def concat(cls, conditions):
         """ Builder method to build conditions[0] OR conditions[1] OR ...
-        analogously for AND, ..."""
-        concated_condition = conditions[0]
-        for condition in conditions[1:]:
-            concated_condition = cls(concated_condition, condition)
-        return concated_condition
+        analogously for AND, ... (operands of the same operator are merged into one flat node)"""
+        operands = []
+        for condition in conditions:
+            if type(condition) is cls:
+                operands.extend(condition.operands)
+            else:
+                operands.append(condition)
+        if len(operands) == 1:
+            return operands[0]
+        return cls(*operands)
 
 
 class And(BooleanBinaryOperator):
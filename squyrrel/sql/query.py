@@ -5,8 +5,8 @@ from squyrrel.orm.field import ForeignKey
 from squyrrel.orm.model import Model
 from squyrrel.orm.utils import field_to_sql_data_type
 from squyrrel.sql.clauses import (UpdateClause, WhereClause, SetClause,
-                                  InsertClause, ValuesClause, DeleteClause, SelectClause)
-from squyrrel.sql.expressions import Parameter
+                                  InsertClause, ValuesClause, DeleteClause, SelectClause, ReturningClause)
+from squyrrel.sql.expressions import Parameter, Literal
 from squyrrel.sql.table import TableName
 
 
@@ -40,6 +40,7 @@ class Query:
                 self.indent = options['indent']
 
         self.model = None
+        self.row_decoder = None
 
     def get_clauses(self):
         clauses = [self.select_clause, self.from_clause]
@@ -58,7 +59,10 @@ class Query:
     @property
     def params(self):
         # todo: add params of all clauses together
-        return self.where_clause.params if self.where_clause else []
+        params = self.where_clause.params if self.where_clause else []
+        if self.orderby_clause is not None:
+            params = params + self.orderby_clause.params
+        return params
 
     def __repr__(self):
         clauses = self.clauses_to_strings()
@@ -191,6 +195,51 @@ class CreateTableQuery:
         return cls(create_clause, column_definitions=column_definitions, uniqueness_constraints=uniqueness_constraints)
 
 
+class CreateIndexQuery:
+    """
+    CREATE [UNIQUE] INDEX [IF NOT EXISTS] index_name ON table_name (col1, col2, ...)
+    [INCLUDE (col3, ...)]
+    [WHERE condition];
+    """
+
+    def __init__(self, name, table, columns, unique=False, if_not_exists=False, include=None, where=None):
+        self.name = name
+        self.table = TableName.build(table)
+        self.columns = columns
+        self.unique = unique
+        self.if_not_exists = if_not_exists
+        self.include = include
+        self.where = where
+
+    @property
+    def params(self):
+        return None
+
+    def __repr__(self):
+        unique_str = ' UNIQUE' if self.unique else ''
+        if_not_exists_str = ' IF NOT EXISTS' if self.if_not_exists else ''
+        output = f'CREATE{unique_str} INDEX{if_not_exists_str} {self.name} ON {repr(self.table)} ({", ".join(self.columns)})'
+        if self.include:
+            output += f' INCLUDE ({", ".join(self.include)})'
+        if self.where is not None:
+            output += f' WHERE {self.where}'
+        return output + ';'
+
+
+class DdlQuery:
+    """Schema statement without node classes (e.g. CREATE TRIGGER), written out as is"""
+
+    def __init__(self, sql):
+        self.sql = sql.rstrip().rstrip(';')
+
+    @property
+    def params(self):
+        return None
+
+    def __repr__(self):
+        return self.sql + ';'
+
+
 class CreateManyToManyJunctionTableQuery(CreateTableQuery):
 
     def __init__(self, model1: Model, model2: Model, junction_table_name, if_not_exists=False):
@@ -224,11 +273,17 @@ class InsertQuery:
     """
     INSERT INTO table_name (col1, col2, ..)
     VALUES (val1, val2, ...)
+    [RETURNING col1, ...]
     """
 
-    def __init__(self, table, insert_clause=None, values_clause=None):
+    def __init__(self, table, insert_clause=None, values_clause=None, returning_clause=None):
         self.insert_clause = insert_clause or InsertClause(table=table, columns=[])
         self.values_clause = values_clause or ValuesClause(values=[])
+        self.returning_clause = returning_clause
+
+    def returning(self, *columns):
+        self.returning_clause = ReturningClause(list(columns))
+        return self
 
     @property
     def params(self):
@@ -239,6 +294,9 @@ class InsertQuery:
         output = repr(self.insert_clause)
         output += clause_separation
         output += repr(self.values_clause)
+        if self.returning_clause is not None:
+            output += clause_separation
+            output += repr(self.returning_clause)
         output += ';'
         return output
 
@@ -257,12 +315,17 @@ class BatchInsertQuery(InsertQuery):
     VALUES
     (val1, val2, ...)
     (val1, val2, ...)
+    [RETURNING col1, ...]
     """
 
-    def __init__(self, table, insert_clause=None, rows=None):
-        super().__init__(table, insert_clause=insert_clause)
+    def __init__(self, table, insert_clause=None, rows=None, returning_clause=None):
+        super().__init__(table, insert_clause=insert_clause, returning_clause=returning_clause)
         self.rows = rows
 
+    @property
+    def params(self):
+        return [value.value for row in self.rows for value in row if isinstance(value, Parameter)]
+
     def __repr__(self):
         clause_separation = '\n'
         output = repr(self.insert_clause)
@@ -270,11 +333,50 @@ class BatchInsertQuery(InsertQuery):
         output += 'VALUES' + clause_separation
 
         for row in self.rows[:-1]:
-            output += '({}),\n'.format(', '.join(repr(value) for value in row))
-        output += '({})\n'.format(', '.join(repr(value) for value in self.rows[-1]))
+            output += '({}),\n'.format(', '.join(repr(Literal.from_value(value)) for value in row))
+        output += '({})\n'.format(', '.join(repr(Literal.from_value(value)) for value in self.rows[-1]))
+        if self.returning_clause is not None:
+            output += repr(self.returning_clause)
         output += ';'
         return output
 
+    @classmethod
+    def build(cls, table, columns, rows):
+        """rows: list of value tuples (in the order of columns), the values are passed as parameters"""
+        return cls(table=table,
+                   insert_clause=InsertClause(table=table, columns=list(columns)),
+                   rows=[[Parameter(value) for value in row] for row in rows])
+
+
+class BulkInsertQuery(InsertQuery):
+    """
+    INSERT INTO table_name (col1, col2, ...)
+    VALUES (?, ?, ...)
+
+    The statement is rendered for one row and executed for every row of seq_of_params
+    (executemany, COPY FROM STDIN on postgres, see SqlDatabaseConnection.bulk_insert).
+    """
+
+    def __init__(self, table, columns, seq_of_params):
+        columns = list(columns)
+        super().__init__(table,
+                         insert_clause=InsertClause(table=table, columns=columns),
+                         values_clause=ValuesClause(values=[Parameter(None) for _ in columns]))
+        self.table = table
+        self.columns = columns
+        self.seq_of_params = seq_of_params
+
+    @property
+    def params(self):
+        return None
+
+    def to_literal_sql(self, rows_per_statement=500):
+        """The rows written out as multi-row INSERT statements (e.g. for sql scripts)"""
+        rows = list(self.seq_of_params)
+        return '\n'.join(
+            repr(BatchInsertQuery(self.table, insert_clause=self.insert_clause, rows=rows[i:i + rows_per_statement]))
+            for i in range(0, len(rows), rows_per_statement))
+
 
 class DeleteQuery:
     """
@@ -1,15 +1,17 @@
+import warnings
 from typing import Type, List
 
 from squyrrel.orm.field import ManyToMany, OneToMany
 from squyrrel.orm.exceptions import RelationNotFoundException
-from squyrrel.sql.join import OnJoinCondition, JoinType
+from squyrrel.sql.join import OnJoinCondition, JoinType, JoinConstruct
 from squyrrel.sql.utils import sanitize_column_reference, listify
 from squyrrel.orm.filter import ManyToOneFilter, ManyToManyFilter, StringFieldFilter, OrFieldFilter, FieldFilter, \
     BooleanFieldFilter, JunctionType
 from squyrrel.sql.references import ColumnReference
 from squyrrel.orm.model import Model
-from squyrrel.sql.clauses import SelectClause, FromClause, WhereClause, Pagination, OrderByClause
-from squyrrel.sql.expressions import Equals, Or, Like, And, Not
+from squyrrel.sql.clauses import SelectClause, FromClause, WhereClause, Pagination, OrderByClause, KeysetPagination
+from squyrrel.sql.expressions import (Equals, Or, Like, And, Not, In, GreaterThan, LessThan, Parameter,
+                                      RowValueComparison)
 from squyrrel.sql.query import Query
 
 
@@ -43,6 +45,9 @@ class QueryBuilder:
         self._orderby_clause = None
 
         self._pagination = None
+        self._keyset = None
+        # (rank expression, ascending) of fulltext_search
+        self._search_rank = None
         self._alias = None
         self._is_subquery = None
         self._options = None
@@ -70,6 +75,9 @@ class QueryBuilder:
 
         self._build_select_clause()
 
+        if self._keyset is not None:
+            self._build_keyset_pagination()
+
         self._build_where_clause()
 
         self._build_orderby_clause()
@@ -109,6 +117,11 @@ class QueryBuilder:
         # todo: handle filter.negate
         conditions = []
         filter_foreign_model = self._get_model(filter.foreign_model)
+        if filter.junction_type != JunctionType.AND and len(filter.value) > 1:
+            return In.column_as_parameters(
+                ColumnReference(filter.key, table=filter_foreign_model.table_name),
+                filter.value
+            )
         for id_value in filter.value:
             conditions.append(
                 Equals.column_as_parameter(
@@ -183,9 +196,28 @@ class QueryBuilder:
         )
         return self
 
-    def fulltext_search(self, search_value):
-        if search_value:
+    def fulltext_search(self, search_value, rank=False):
+        """Filters by search_value in model.fulltext_search_columns: with the fulltext_backend of the
+        query wizzard if it has one, otherwise with LIKE. rank: order by relevance (only with a backend)."""
+        if not search_value:
+            return self
+        backend = getattr(self._qw, 'fulltext_backend', None)
+        if backend is None:
             self._filter_conditions.append(self.build_search_condition(search_value))
+            return self
+        if not backend.search_terms(search_value):
+            return self
+        search_join = backend.search_join(self._model)
+        if search_join is not None:
+            table, join_condition = search_join
+            self._from_clause.table_reference = JoinConstruct(
+                table1=self._from_clause.table_reference,
+                join_type=JoinType.INNER_JOIN,
+                table2=table,
+                join_condition=join_condition)
+        self._filter_conditions.append(backend.search_condition(self._model, search_value))
+        if rank:
+            self._search_rank = (backend.rank_expression(self._model, search_value), backend.rank_ascending)
         return self
 
     def build_search_condition(self, search_value, search_columns=None):
@@ -212,6 +244,51 @@ class QueryBuilder:
             self._pagination = Pagination(active_page=active_page, page_size=page_size)
         return self
 
+    def keyset_pagination(self, page_size, cursor=None):
+        """Pagination by the orderby columns (plus the primary key): the page after cursor (the next_cursor
+        of the previous page, see QueryWizzard.get_page) is selected with a WHERE condition instead of
+        OFFSET, so any page costs the same as the first one.
+        Note: the orderby columns must not contain NULL values."""
+        self._keyset = (int(page_size), cursor)
+        self._pagination = None
+        return self
+
+    def keyset_condition(self, columns, ascending, values):
+        """Condition selecting the rows after values in the order of columns"""
+        if all(ascending) or not any(ascending):
+            return RowValueComparison(columns, [Parameter(value) for value in values],
+                                      operator_name='>' if ascending[0] else '<')
+        # mixed directions: (c1 > v1) OR (c1 = v1 AND c2 < v2) OR ...
+        conditions = []
+        for i, column in enumerate(columns):
+            comparison_cls = GreaterThan if ascending[i] else LessThan
+            terms = [Equals(columns[j], Parameter(values[j])) for j in range(i)]
+            terms.append(comparison_cls(column, Parameter(values[i])))
+            conditions.append(And.concat(terms))
+        return Or.concat(conditions)
+
+    def _build_keyset_pagination(self):
+        page_size, cursor = self._keyset
+        id_column = ColumnReference(self._model.id_field_name(), table=self._model.table_name)
+        if id_column not in self._orderby_columns:
+            # the primary key makes the order unique
+            direction = self._ascending.get(self._orderby_columns[0], True) if self._orderby_columns else True
+            self._orderby_columns.append(id_column)
+            self._ascending[id_column] = direction
+        columns = list(self._orderby_columns)
+        ascending = [self._ascending.get(column, True) for column in columns]
+        missing_columns = [column for column in columns if column not in self._select_fields]
+        if missing_columns:
+            # the cursor of the next page is read from the selected values
+            self._select_fields = list(self._select_fields) + missing_columns
+            self._select_clause = SelectClause(*self._select_fields)
+        if cursor is not None:
+            values = KeysetPagination.decode_cursor(cursor)
+            if len(values) != len(columns):
+                raise ValueError(f'Invalid cursor: {cursor}')
+            self._filter_conditions.append(self.keyset_condition(columns, ascending, values))
+        self._pagination = KeysetPagination(page_size, columns=columns, ascending=ascending)
+
     def orderby(self, columns, ascending=None):
         """ args:
         columns is either a single column (ColumnReference or str) or a list of columns (or ColumnReferences)
@@ -253,16 +330,22 @@ class QueryBuilder:
             self._where_clause = None
 
     def _build_orderby_clause(self):
-        if not self._orderby_columns:
+        orderby_columns = []
+        for column in self._orderby_columns:
+            if column in self._select_fields:
+                orderby_columns.append(column)
+            else:
+                warnings.warn(f'The orderby column <{column}> is not specified in the select clause')
+        ascending = self._ascending
+        if self._search_rank is not None and self._keyset is None:
+            # the best matches first, the orderby columns break ties
+            rank_expression, rank_ascending = self._search_rank
+            orderby_columns.insert(0, rank_expression)
+            ascending = {rank_expression: rank_ascending, **self._ascending}
+        if not orderby_columns:
             self._orderby_clause = None
         else:
-            orderby_columns = []
-            for column in self._orderby_columns:
-                if column in self._select_fields:
-                    orderby_columns.append(column)
-                else:
-                    print(f'Warning: The orderby column <{column}> is not specified in the select clause')
-            self._orderby_clause = OrderByClause(columns=orderby_columns, ascending=self._ascending)
+            self._orderby_clause = OrderByClause(columns=orderby_columns, ascending=ascending)
 
     def _get_model_by_table(self, table):
         if self._qw is None:
@@ -299,7 +382,7 @@ class QueryBuilder:
 
         if self._orderby_clause is not None:
             for column in self._orderby_clause.columns:
-                columns_to_check.add(column)
+                columns_to_check.update(column.columns)
 
         for column_reference in list(columns_to_check):
             self._include_column(column_reference)
@@ -1,10 +1,27 @@
 
+import mmap
+from array import array
+
+
 class TsvTableDocument:
 
     def __init__(self):
-        self.column_headers = []
+        self._column_headers = []
+        self._column_indexes = {}
         self.rows = []
 
+    @property
+    def column_headers(self):
+        return self._column_headers
+
+    @column_headers.setter
+    def column_headers(self, column_headers):
+        self._column_headers = column_headers
+        self._column_indexes = {}
+        for i, col in enumerate(column_headers):
+            # the first of duplicate headers wins
+            self._column_indexes.setdefault(col, i)
+
     @staticmethod
     def get_tsv(file,
                 open_in_text_mode=True,
@@ -20,13 +37,8 @@ class TsvTableDocument:
             rows = [line.rstrip(strip).split(separator_char) for line in file]
         else:
             rows = []
-
-        for line in file:
-            try:
+            for line in file:
                 rows.append(line.decode().rstrip(strip).split(separator_char))
-            except UnicodeDecodeError as e:
-                print(e)
-                raise e
 
         if strip_space:
             rows = [[cell.strip() for cell in row] for row in rows]
@@ -61,10 +73,7 @@ class TsvTableDocument:
         return self.column_headers
 
     def get_column_index(self, column_name):
-        for i, col in enumerate(self.column_headers):
-            if col == column_name:
-                return i
-        return None
+        return self._column_indexes.get(column_name)
 
     def __getitem__(self, item):
         return self.rows[item]
@@ -72,3 +81,131 @@ class TsvTableDocument:
     def __len__(self):
         return len(self.rows)
 
+
+class MappedTsvTableDocument(TsvTableDocument):
+    """TsvTableDocument on a memory-mapped file for big tables.
+
+    Loading only builds an index of the line offsets, a row is decoded when it is accessed.
+    With columns (names or indexes), only the cells of these columns are decoded.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.encoding = 'utf8'
+        self.separator = b'\t'
+        self.strip_space = False
+        self._file = None
+        self._mmap = None
+        # start offsets of the rows, the last entry is the end of the data
+        self._offsets = array('Q')
+
+    def load_from_file(self,
+                       filepath,
+                       encoding='utf8',
+                       separator_char='\t',
+                       strip_space=False):
+        self.close()
+        self.encoding = encoding
+        self.separator = separator_char.encode(encoding)
+        self.strip_space = strip_space
+        self._file = open(filepath, 'rb')
+        self._offsets = array('Q')
+        self.column_headers = []
+        if self._file.seek(0, 2) == 0:
+            # an empty file cannot be mapped
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._build_index()
+        self.column_headers = self._decode_cells(0, self._header_end, None)
+
+    def _build_index(self):
+        mm = self._mmap
+        size = len(mm)
+        header_end = mm.find(b'\n')
+        self._header_end = size if header_end == -1 else header_end
+        pos = self._header_end + 1
+        while pos < size:
+            self._offsets.append(pos)
+            end = mm.find(b'\n', pos)
+            if end == -1:
+                pos = size + 1
+                break
+            pos = end + 1
+        self._offsets.append(pos)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _column_indexes_of(self, columns):
+        if columns is None:
+            return None
+        indexes = []
+        for column in columns:
+            index = column if isinstance(column, int) else self.get_column_index(column)
+            if index is None:
+                raise KeyError(f'Unknown column {column}')
+            indexes.append(index)
+        return indexes
+
+    def _decode_cells(self, start, end, indexes):
+        mm = self._mmap
+        # exclude the line break
+        if end > start and mm[end - 1:end] == b'\r':
+            end -= 1
+        if indexes is None:
+            cells = mm[start:end].decode(self.encoding).split(self.separator.decode(self.encoding))
+        else:
+            # find the separators up to the last wanted column, the other cells are not decoded
+            wanted = set(indexes)
+            last = max(indexes, default=-1)
+            found = {}
+            pos = start
+            for i in range(last + 1):
+                sep = mm.find(self.separator, pos, end)
+                cell_end = end if sep == -1 else sep
+                if i in wanted:
+                    found[i] = mm[pos:cell_end].decode(self.encoding)
+                if sep == -1:
+                    break
+                pos = sep + len(self.separator)
+            cells = [found.get(index, '') for index in indexes]
+        if self.strip_space:
+            cells = [cell.strip() for cell in cells]
+        return cells
+
+    def get_row(self, index, columns=None):
+        """Cells of the row (only of the given columns, in their order)"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('row index out of range')
+        return self._decode_cells(self._offsets[index], self._offsets[index + 1] - 1,
+                                  self._column_indexes_of(columns))
+
+    def iter_rows(self, columns=None, start=0, stop=None, step=1):
+        indexes = self._column_indexes_of(columns)
+        for i in range(*slice(start, stop, step).indices(len(self))):
+            yield self._decode_cells(self._offsets[i], self._offsets[i + 1] - 1, indexes)
+
+    def get_column(self, column):
+        for row in self.iter_rows(columns=[column]):
+            yield row[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return list(self.iter_rows(start=item.start, stop=item.stop, step=item.step or 1))
+        return self.get_row(item)
+
+    def __len__(self):
+        return max(len(self._offsets) - 1, 0)
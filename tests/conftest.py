@@ -0,0 +1,169 @@
+import pytest
+
+from squyrrel.core.registry.meta import ClassMeta, ModuleMeta
+from squyrrel.db.sqlite.connection import SqliteConnection
+from squyrrel.orm.field import IntegerField, StringField, ManyToOne, ManyToMany, OneToMany
+from squyrrel.orm.instrumentation import QueryInstrumentation
+from squyrrel.orm.migration_manager import MigrationManager
+from squyrrel.orm.model import Model
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+
+
+class Author(Model):
+    table_name = 'author'
+
+    author_id = IntegerField(primary_key=True)
+    fullname = StringField(unique=True)
+
+
+class Tag(Model):
+    table_name = 'tag'
+
+    tag_id = IntegerField(primary_key=True)
+    label = StringField()
+    books = ManyToMany('Book', junction_table='book_tag', foreign_key_field='book_id')
+
+
+class Book(Model):
+    table_name = 'book'
+    fulltext_search_columns = ['book.title']
+
+    book_id = IntegerField(primary_key=True)
+    title = StringField()
+    author_id = IntegerField()
+    author = ManyToOne('Author', foreign_key_field='author_id', update_search_column='fullname', lazy_load=False)
+    tags = ManyToMany('Tag', junction_table='book_tag', foreign_key_field='tag_id', lazy_load=False)
+    chapters = OneToMany('Chapter')
+
+
+class Chapter(Model):
+    table_name = 'chapter'
+
+    chapter_id = IntegerField(primary_key=True)
+    heading = StringField()
+    book_id = IntegerField()
+    book = ManyToOne('Book', foreign_key_field='book_id')
+
+
+LIBRARY_MODELS = [Author, Tag, Book, Chapter]
+
+
+def register_models(qw, models):
+    for model in models:
+        qw.register_model(ClassMeta(module=ModuleMeta(package='tests', module_name='library'),
+                                    class_name=model.__name__,
+                                    class_reference=model),
+                          table_name=model.table_name)
+
+
+def build_library(qw):
+    """Creates the library schema and a few rows"""
+    register_models(qw, LIBRARY_MODELS)
+
+    migration_manager = MigrationManager(qw)
+    migration_manager.build_db_schema('schema', LIBRARY_MODELS)
+    qw.execute_queries_in_transaction(migration_manager.queries['schema'])
+
+    for fullname in ('Ann', 'Bob'):
+        qw.create(Author, {'fullname': fullname}, return_created_object=False)
+    for label in ('novel', 'poetry', 'essay'):
+        qw.create(Tag, {'label': label}, return_created_object=False)
+    qw.create(Book, {'title': 'First', 'author': 'Ann', 'tags': [1, 2]}, return_created_object=False)
+    qw.create(Book, {'title': 'Second', 'author': 'Bob', 'tags': [2]}, return_created_object=False)
+    qw.create(Book, {'title': 'Third', 'author': 'Ann', 'tags': []}, return_created_object=False)
+    for heading, book_id in (('Intro', 1), ('Outro', 1), ('Prologue', 2)):
+        qw.create(Chapter, {'heading': heading, 'book_id': book_id}, return_created_object=False)
+
+
+@pytest.fixture
+def library_models():
+    """The models of the library: Author, Tag, Book, Chapter"""
+    return list(LIBRARY_MODELS)
+
+
+@pytest.fixture(name='register_models')
+def register_models_fixture():
+    """register_models(qw, models)"""
+    return register_models
+
+
+@pytest.fixture(name='build_library')
+def build_library_fixture():
+    """build_library(qw): creates the library schema and rows on the db of qw"""
+    return build_library
+
+
+@pytest.fixture
+def library():
+    """QueryWizzard on an in-memory sqlite db with the library schema and a few rows"""
+    db = SqliteConnection()
+    db.connect(':memory:')
+    qw = QueryWizzard(db=db, builder=SqlBuilder())
+    build_library(qw)
+
+    yield qw
+    db.close()
+
+
+@pytest.fixture
+def library_file(tmp_path):
+    """Filename of a sqlite db with the library schema and a few rows"""
+    filename = str(tmp_path / 'library.db')
+    db = SqliteConnection()
+    db.connect(filename)
+    build_library(QueryWizzard(db=db, builder=SqlBuilder()))
+    db.close()
+    return filename
+
+
+@pytest.fixture
+def open_library():
+    """Opens QueryWizzards (with the library models registered) on sqlite db files: open_library(filename, **kwargs)"""
+    connections = []
+
+    def open_(filename, **kwargs):
+        db = SqliteConnection()
+        db.connect(filename)
+        connections.append(db)
+        qw = QueryWizzard(db=db, builder=SqlBuilder(), **kwargs)
+        register_models(qw, LIBRARY_MODELS)
+        return qw
+
+    yield open_
+    for db in connections:
+        db.close()
+
+
+@pytest.fixture
+def record_sql():
+    """record_sql(qw): records the sql of every statement qw executes from now on, returns the list of statements"""
+
+    def record(qw):
+        executed = []
+        execute, executemany = qw.db.execute, qw.db.executemany
+
+        def recording_execute(sql, cursor=None, params=None):
+            executed.append(sql)
+            return execute(sql, cursor=cursor, params=params)
+
+        def recording_executemany(sql, seq_of_params, cursor=None):
+            executed.append(sql)
+            return executemany(sql, seq_of_params, cursor=cursor)
+
+        qw.db.execute, qw.db.executemany = recording_execute, recording_executemany
+        return executed
+
+    return record
+
+
+@pytest.fixture
+def record_query_events():
+    """record_query_events(qw): installs a QueryInstrumentation on qw, returns the list its query events are appended to"""
+
+    def record(qw):
+        events = []
+        qw.instrumentation = QueryInstrumentation(hooks=[events.append])
+        return events
+
+    return record
@@ -0,0 +1,53 @@
+import logging
+
+from squyrrel.core.logging.utils import LogSettings, log_call
+
+
+class FakeSquyrrel:
+
+    def __init__(self):
+        self.debug_indent_level = 0
+        self.messages = []
+
+    def debug(self, message, tags=None):
+        self.messages.append((message, tags))
+
+
+def test_tags_and_levels():
+    settings = LogSettings(level=logging.INFO)
+    assert settings.is_enabled(None)
+    assert settings.is_enabled('error')
+    assert not settings.is_enabled('call')
+    settings.enable('call')
+    assert settings.is_enabled('call')
+    settings.set_level(logging.DEBUG)
+    settings.disable('gui_call')
+    assert not settings.is_enabled('gui_call')
+    assert settings.is_enabled('signal')
+
+
+def test_log_call_disabled_does_not_format():
+    squyrrel = FakeSquyrrel()
+    wrapped = log_call(squyrrel, 'Test', lambda x: x * 2)
+    assert wrapped(3) == 6
+    assert squyrrel.messages == []
+
+
+def test_log_call_defers_formatting(monkeypatch):
+    squyrrel = FakeSquyrrel()
+    formatted = []
+
+    class Arg:
+        def __repr__(self):
+            formatted.append(True)
+            return 'arg'
+
+    def double(x):
+        return 2
+
+    monkeypatch.setattr('squyrrel.core.logging.utils.log_settings', LogSettings(level=logging.DEBUG))
+    wrapped = log_call(squyrrel, 'Test', double)
+    assert wrapped(Arg()) == 2
+    assert not formatted
+    assert [message() for message, _ in squyrrel.messages] == ['Test.double(arg)', '-> (Test.double) ->: 2\n']
+    assert squyrrel.debug_indent_level == 0
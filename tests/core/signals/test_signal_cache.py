@@ -0,0 +1,36 @@
+from squyrrel.core.signals import Signal
+from squyrrel.core.signals.base import SignalCache
+
+
+def test_no_caching_by_default():
+    signal = Signal('test')
+    signal.emit(1)
+    assert len(signal.cache) == 0
+    assert signal.clear_cache() == []
+
+
+def test_ring_buffer():
+    signal = Signal('test', caching=True, cache_size=2)
+    for i in range(5):
+        signal.emit(i, key=i)
+    freezes = signal.clear_cache()
+    assert [(freeze.args, freeze.kwargs) for freeze in freezes] == [((3,), {'key': 3}), ((4,), {'key': 4})]
+    assert len(signal.cache) == 0
+
+
+def test_max_age():
+    cache = SignalCache(max_age=10)
+    cache.append((1,), {})
+    cache.append((2,), {})
+    cache.drop_older_than(cache.cache[1].timestamp)
+    assert cache.popfirst().args == (2,)
+    assert cache.popfirst() is None
+
+
+def test_filtered_signal_caches_only_matching_emissions():
+    signal = Signal('numbers')
+    even = signal.filtered(lambda number: number % 2 == 0, caching=True)
+    for number in range(5):
+        signal.emit(number)
+    assert [freeze.args[0] for freeze in even.clear_cache()] == [0, 2, 4]
+    assert len(signal.cache) == 0
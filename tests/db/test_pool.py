@@ -0,0 +1,127 @@
+import threading
+
+import pytest
+
+from squyrrel.db.exceptions import PoolTimeoutException, PoolClosedException, PoolException
+from squyrrel.db.pool import ConnectionPool
+from squyrrel.db.sqlite.connection import SqliteConnection
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+
+
+def sqlite_factory():
+    connection = SqliteConnection()
+    connection.connect(':memory:', check_same_thread=False)
+    return connection
+
+
+class TestConnectionPool:
+
+    def test_reuses_released_connections(self):
+        pool = ConnectionPool(sqlite_factory, min_size=1, max_size=2)
+        connection = pool.acquire()
+        assert pool.stats()['in_use'] == 1
+        pool.release(connection)
+        assert pool.acquire() is connection
+        stats = pool.stats()
+        assert (stats['size'], stats['idle'], stats['in_use'], stats['checkouts']) == (1, 0, 1, 2)
+
+    def test_checkout_timeout(self):
+        pool = ConnectionPool(sqlite_factory, min_size=0, max_size=1)
+        pool.acquire()
+        with pytest.raises(PoolTimeoutException):
+            pool.acquire(timeout=0.01)
+        assert pool.stats()['timeouts'] == 1
+
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool(sqlite_factory, min_size=1, max_size=1)
+        connection = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+        waiter.start()
+        while pool.stats()['waiting'] == 0:
+            pass
+        pool.release(connection)
+        waiter.join()
+        assert acquired == [connection]
+        assert pool.stats()['max_wait_time'] > 0
+
+    def test_recycles_connections(self):
+        pool = ConnectionPool(sqlite_factory, min_size=1, max_size=1, max_uses=2)
+        first = pool.acquire()
+        pool.release(first)
+        assert pool.acquire() is first
+        pool.release(first)
+        assert pool.acquire() is not first
+        assert pool.stats()['recycled'] == 1
+
+    def test_health_check_replaces_broken_connection(self):
+        pool = ConnectionPool(sqlite_factory, min_size=1, max_size=1)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.c.close()
+        assert not connection.ping()
+        assert pool.acquire() is not connection
+        assert pool.stats()['health_check_failures'] == 1
+
+    def test_thread_affinity(self):
+        pool = ConnectionPool(sqlite_factory, min_size=0, max_size=2, thread_affinity=True)
+        own = pool.acquire()
+        other = []
+
+        def use_connection():
+            other.append(pool.acquire())
+            pool.release(other[0])
+
+        thread = threading.Thread(target=use_connection)
+        thread.start()
+        thread.join()
+        pool.release(own)
+        # the idle connection used last by this thread is handed out, not the most recently released one
+        assert pool.acquire() is own
+
+    def test_close(self):
+        pool = ConnectionPool(sqlite_factory, min_size=2, max_size=2)
+        connection = pool.acquire()
+        pool.close()
+        with pytest.raises(PoolClosedException):
+            pool.acquire()
+        pool.release(connection)
+        assert pool.stats()['size'] == 0
+        with pytest.raises(PoolException):
+            pool.release(connection)
+
+
+class TestUnitOfWork:
+
+    def test_connection_per_unit_of_work(self, tmp_path):
+        pool = ConnectionPool.for_sqlite(str(tmp_path / 'pool.db'), max_size=2)
+        qw = QueryWizzard(builder=SqlBuilder(), pool=pool)
+        with pytest.raises(PoolException):
+            qw.db
+
+        with qw.unit_of_work():
+            qw.execute_sql('CREATE TABLE item (item_id INTEGER PRIMARY KEY, label TEXT)')
+            with qw.unit_of_work():
+                qw.execute_sql('INSERT INTO item (label) VALUES (?)', params=['a'])
+            assert pool.stats()['in_use'] == 1
+
+        with pytest.raises(ValueError):
+            with qw.unit_of_work():
+                qw.execute_sql('INSERT INTO item (label) VALUES (?)', params=['rolled back'])
+                raise ValueError()
+
+        labels = []
+
+        def read_labels():
+            with qw.unit_of_work():
+                qw.execute_sql('SELECT label FROM item')
+                labels.append(qw.db.fetchall())
+
+        threads = [threading.Thread(target=read_labels) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert labels == [[('a',)]] * 4
+        assert pool.stats()['in_use'] == 0
@@ -0,0 +1,12 @@
+from squyrrel.db.postgres.copy import copy_csv
+
+
+class TestCopyCsv:
+
+    def test_none_and_empty_string(self):
+        rows = [(1, None, ''), (None, 'a "b"', 'x,\ny'), (2.5, True, r'\N')]
+        assert copy_csv(rows).getvalue() == (
+            '1,\\N,""\n'
+            '\\N,"a ""b""","x,\ny"\n'
+            '2.5,1,"\\N"\n'
+        )
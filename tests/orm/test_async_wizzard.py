@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from squyrrel.db.async_connection import connect_sqlite, ExecutorAsyncConnection
+from squyrrel.db.sqlite.connection import SqliteConnection
+from squyrrel.orm.async_wizzard import AsyncQueryWizzard
+from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+from squyrrel.sql.query import InsertQuery
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+@pytest.fixture
+def run(library_file, library_models, register_models):
+    """run(coroutine_function): awaits coroutine_function(aqw) with an AsyncQueryWizzard on the library db file"""
+    def run_(coroutine_function):
+        async def main():
+            db = await connect_sqlite(library_file)
+            aqw = AsyncQueryWizzard(db, builder=SqlBuilder())
+            register_models(aqw, library_models)
+            try:
+                return await coroutine_function(aqw)
+            finally:
+                await db.close()
+        return asyncio.run(main())
+    return run_
+
+
+class TestAsyncQueryWizzard:
+
+    def test_reads(self, run):
+        async def reads(aqw):
+            book = await aqw.get_by_id('Book', 1, entity_format=EntityFormat.JSON, prefetch=['chapters'])
+            books = await aqw.get_all(QueryBuilder('Book', aqw).orderby('book_id').build(), include_count=True)
+            count = await aqw.count('Book')
+            return book, books, count
+
+        book, books, count = run(reads)
+        assert book['author'] == {'author_id': 1, 'fullname': 'Ann'}
+        assert [tag['label'] for tag in book['tags']] == ['novel', 'poetry']
+        assert sorted(chapter['heading'] for chapter in book['chapters']) == ['Intro', 'Outro']
+        assert [entity.title.value for entity in books['entities']] == ['First', 'Second', 'Third']
+        assert books['count'] == count == 3
+
+    def test_writes(self, run):
+        async def writes(aqw):
+            created = await aqw.create('Book', {'title': 'Fourth', 'author': 'Bob', 'tags': [3]})
+            updated = await aqw.update_by_id('Book', created['book_id'], {'title': 'Last', 'tags': [1]},
+                                             prev_data={'tags': [3]})
+            await aqw.delete_by_id('Book', 2)
+            return created, updated, await aqw.count('Book')
+
+        created, updated, count = run(writes)
+        assert created['author']['fullname'] == 'Bob'
+        assert [tag['tag_id'] for tag in created['tags']] == [3]
+        assert updated['title'] == 'Last'
+        assert [tag['tag_id'] for tag in updated['tags']] == [1]
+        assert count == 3
+
+    def test_concurrent_inserts_without_returning(self, run):
+        async def creates(aqw):
+            aqw.db.connection.supports_returning = False
+            executed = []
+            execute = aqw.db.connection.execute
+
+            def recording_execute(sql, cursor=None, params=None):
+                executed.append(sql)
+                return execute(sql, cursor=cursor, params=params)
+
+            aqw.db.connection.execute = recording_execute
+            ids = await asyncio.gather(*[aqw.execute_insert_query(aqw.get_model('Tag'), InsertQuery.build(
+                'tag', {'label': label})) for label in ('drama', 'comedy', 'satire')])
+            labels = await aqw.db.execute_fetchall('SELECT tag_id, label FROM tag WHERE tag_id > 3')
+            return ids, dict(labels), executed
+
+        ids, labels, executed = run(creates)
+        assert [labels[tag_id] for tag_id in ids] == ['drama', 'comedy', 'satire']
+        assert not [sql for sql in executed if 'last_insert_rowid' in sql]
+
+    def test_same_sql_as_sync_wizzard(self, library_file, open_library, run):
+        qw = open_library(library_file)
+        qw.get_by_id('Book', 2, load_relations_entities=False)
+        sync_sql = qw.render_query(qw.last_sql_query)
+
+        async def get(aqw):
+            await aqw.get_by_id('Book', 2, load_relations_entities=False)
+            return aqw.wizzard.render_query(aqw.last_sql_query)
+
+        assert run(get) == sync_sql
+
+    def test_concurrent_queries_on_executor_connection(self, library_file, library_models, register_models):
+        async def main():
+            db = ExecutorAsyncConnection(SqliteConnection)
+            await db.connect(library_file)
+            aqw = AsyncQueryWizzard(db, builder=SqlBuilder())
+            register_models(aqw, library_models)
+            try:
+                return await asyncio.gather(*[aqw.get_by_id('Book', book_id, entity_format=EntityFormat.JSON)
+                                              for book_id in (1, 2, 3, 1)])
+            finally:
+                await db.close()
+
+        books = asyncio.run(main())
+        assert [book['title'] for book in books] == ['First', 'Second', 'Third', 'First']
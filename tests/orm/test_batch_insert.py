@@ -0,0 +1,75 @@
+import io
+
+from squyrrel.orm.migration_manager import MigrationManager
+from squyrrel.sql.clauses import SelectClause, FromClause
+from squyrrel.sql.query import Query, BulkInsertQuery, BatchInsertQuery
+
+
+def labels(qw):
+    query = Query(select_clause=SelectClause('label'), from_clause=FromClause('tag'))
+    qw.execute_query(query)
+    return [row[0] for row in qw.db.fetchall()]
+
+
+class TestBatchInsert:
+
+    def test_renders_one_placeholder_row(self):
+        query = BulkInsertQuery('tag', ['tag_id', 'label'], [(10, 'a'), (11, 'b')])
+        assert repr(query) == 'INSERT INTO tag (tag_id, label)\nVALUES (?, ?);'
+        assert query.params is None
+
+    def test_migration_manager_uses_executemany(self, library):
+        executed = []
+        executemany = library.db.executemany
+
+        def recording_executemany(sql, seq_of_params, cursor=None):
+            executed.append((sql, list(seq_of_params)))
+            return executemany(sql, executed[-1][1], cursor=cursor)
+
+        library.db.executemany = recording_executemany
+        migration_manager = MigrationManager(library)
+        migration_manager.add_query_key('data')
+        rows = [(f"it's {i}",) for i in range(1200)]
+        migration_manager.add_batch_inserts('data', 'tag', ['label'], rows)
+        library.execute_queries_in_transaction(migration_manager.queries['data'])
+
+        assert len(executed) == 1
+        assert executed[0][0] == 'INSERT INTO tag (label)\nVALUES (?);'
+        assert labels(library)[-1] == "it's 1199"
+
+    def test_rows_per_batch(self, library):
+        migration_manager = MigrationManager(library)
+        migration_manager.add_query_key('data')
+        migration_manager.add_batch_inserts('data', 'tag', ['label'], [('a',), ('b',), ('c',)], rows_per_batch=2)
+        assert [len(query.seq_of_params) for query in migration_manager.queries['data']] == [2, 1]
+
+    def test_write_queries_to_file_quotes_literals(self, library):
+        migration_manager = MigrationManager(library)
+        migration_manager.add_query_key('data')
+        migration_manager.add_batch_inserts('data', 'tag', ['tag_id', 'label'], [(10, "it's"), (11, None)])
+        file = io.StringIO()
+        migration_manager.write_queries_to_file('data', file)
+        sql = file.getvalue()
+        assert "(10, 'it''s')," in sql
+        assert '(11, NULL)' in sql
+
+        library.db.c.executescript(sql)
+        assert labels(library)[-2:] == ["it's", None]
+
+    def test_insert_rows_respects_max_variables(self, library):
+        executed = []
+        execute = library.db.execute
+
+        def recording_execute(sql, cursor=None, params=None):
+            executed.append(params)
+            return execute(sql, cursor=cursor, params=params)
+
+        library.db.execute = recording_execute
+        library.db.max_variables = 4
+        ids = library.insert_rows('Tag', ['label'], [(str(i),) for i in range(10)])
+        assert ids == list(range(4, 14))
+        assert [len(params) for params in executed] == [4, 4, 2]
+
+    def test_batch_insert_literal_values(self):
+        query = BatchInsertQuery('tag', rows=[[1, "a'b", None, True]])
+        assert '(1, \'a\'\'b\', NULL, 1)' in repr(query)
@@ -0,0 +1,56 @@
+import pytest
+
+from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.orm.exceptions import DidNotFindForeignIdException
+
+
+def book_json(qw, book_id, prefetch=None):
+    return qw.get_by_id('Book', book_id, entity_format=EntityFormat.JSON, prefetch=prefetch)
+
+
+class TestCreateMany:
+
+    def test_create_many(self, library, record_sql):
+        rows = [{'title': f'Book {i}', 'author': 'Bob' if i % 2 else 'Ann', 'tags': [1, 3]} for i in range(10)]
+        rows.append({'title': 'Untagged', 'author': 'Ann'})
+        executed = record_sql(library)
+        ids = library.create_many('Book', rows, chunk_size=6)
+        # per chunk: author lookup, insert, junction rows
+        assert len(executed) == 6
+        assert ids == list(range(4, 15))
+
+        book = book_json(library, ids[1])
+        assert (book['title'], book['author']['fullname']) == ('Book 1', 'Bob')
+        assert [tag['tag_id'] for tag in book['tags']] == [1, 3]
+        assert book_json(library, ids[-1])['tags'] == []
+
+    def test_missing_foreign_value_rolls_back_chunk(self, library):
+        with pytest.raises(DidNotFindForeignIdException):
+            library.create_many('Book', [{'title': 'a', 'author': 'Ann'}, {'title': 'b', 'author': 'Nobody'}])
+        assert library.count('Book') == 3
+
+    def test_one_to_many(self, library):
+        chapter_ids = library.create_many('Chapter', [{'heading': 'Epilogue'}, {'heading': 'Appendix'}])
+        [book_id] = library.create_many('Book', [{'title': 'Fourth', 'chapters': chapter_ids}])
+        assert sorted(chapter['heading'] for chapter in book_json(library, book_id, prefetch=['chapters'])['chapters']) == \
+            ['Appendix', 'Epilogue']
+
+    def test_string_in_integer_column(self, library, record_sql):
+        executed = record_sql(library)
+        ids = library.create_many('Chapter', [{'heading': 'x', 'book_id': '1'}, {'heading': 'y', 'book_id': '2'}])
+        assert [sql.split()[0] for sql in executed] == ['INSERT']
+        assert ids == [4, 5]
+
+
+class TestUpdateMany:
+
+    def test_update_many(self, library, record_sql):
+        executed = record_sql(library)
+        library.update_many('Book', [{'book_id': 1, 'title': 'Eins', 'tags': [3]},
+                                     {'book_id': 2, 'title': 'Zwei', 'author': 1},
+                                     {'book_id': 3, 'title': 'Drei'}])
+        # two update shapes, junction delete and insert
+        assert len(executed) == 4
+        assert [book_json(library, book_id)['title'] for book_id in (1, 2, 3)] == ['Eins', 'Zwei', 'Drei']
+        assert [tag['tag_id'] for tag in book_json(library, 1)['tags']] == [3]
+        assert book_json(library, 2)['author']['fullname'] == 'Ann'
@@ -0,0 +1,60 @@
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+def books_page(qw, active_page, page_size=2):
+    return QueryBuilder('Book', qw).orderby('book_id').pagination(active_page, page_size=page_size).build()
+
+
+class TestCount:
+
+    def test_get_all_with_window_count(self, library, record_query_events):
+        events = record_query_events(library)
+        response = library.get_all(books_page(library, 2), include_count=True)
+        library.finish_query_event()
+        assert [book.title.value for book in response['entities']] == ['Third']
+        assert response['count'] == 3
+        assert len(events) == 1
+        assert 'COUNT(*) OVER ()' in events[0].sql
+        assert response['entities'][0].as_json() == library.get_all(books_page(library, 2))[0].as_json()
+
+    def test_page_behind_last_row(self, library, record_query_events):
+        events = record_query_events(library)
+        response = library.get_all(books_page(library, 5), include_count=True)
+        library.finish_query_event()
+        assert response == {'entities': [], 'count': 3}
+        assert len(events) == 2
+
+    def test_without_window_functions(self, library, monkeypatch, record_query_events):
+        monkeypatch.setattr(library.db, 'supports_window_functions', False)
+        events = record_query_events(library)
+        response = library.get_all(books_page(library, 1), include_count=True)
+        library.finish_query_event()
+        assert len(response['entities']) == 2
+        assert response['count'] == 3
+        assert len(events) == 2
+        assert 'OVER' not in events[0].sql
+
+    def test_count_does_not_change_query(self, library):
+        query = books_page(library, 2)
+        sql = library.render_query(query)[0]
+        assert library.count('Book', query=query) == 3
+        assert library.render_query(query)[0] == sql
+        assert query.pagination.offset == 2
+
+    def test_reused_query(self, library):
+        query = books_page(library, 1)
+        first = library.get_all(query, include_count=True)
+        items = list(query.select_clause.items)
+        second = library.get_all(query, include_count=True)
+        assert 'OVER' not in repr(query.select_clause)
+        assert query.select_clause.items == items
+        assert second['count'] == first['count'] == 3
+        assert [book.as_json() for book in second['entities']] == [book.as_json() for book in first['entities']]
+
+    def test_fulltext_search(self, library, record_query_events):
+        events = record_query_events(library)
+        data = library.fulltext_search('Book', 'i', pagesize=1, active_page=1)
+        library.finish_query_event()
+        assert [book.title.value for book in data['list']] == ['First']
+        assert data['count'] == 2
+        assert len(events) == 1
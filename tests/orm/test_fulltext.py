@@ -0,0 +1,63 @@
+import pytest
+
+from squyrrel.db.sqlite.connection import SqliteConnection
+from squyrrel.orm.fulltext import Fts5SearchBackend, TsvectorSearchBackend
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+@pytest.fixture
+def fts_library(build_library):
+    db = SqliteConnection()
+    db.connect(':memory:')
+    qw = QueryWizzard(db=db, builder=SqlBuilder(), fulltext_backend=Fts5SearchBackend())
+    build_library(qw)
+    yield qw
+    db.close()
+
+
+def titles(data):
+    return [book.title.value for book in data['list']]
+
+
+class TestFts5SearchBackend:
+
+    def test_search_is_ranked(self, fts_library):
+        fts_library.create('Book', {'title': 'Third third'}, return_created_object=False)
+        data = fts_library.fulltext_search('Book', 'thi', pagesize=10, active_page=1)
+        assert titles(data) == ['Third third', 'Third']
+        assert data['count'] == 2
+        sql = fts_library.render_query(QueryBuilder('Book', fts_library).fulltext_search('x', rank=True).build())[0]
+        assert 'INNER JOIN book_fts\nON book_fts.rowid = book.book_id' in sql
+        assert 'WHERE book_fts MATCH ?' in sql
+        assert 'ORDER BY book_fts.rank ASC' in sql
+        assert 'LIKE' not in sql
+
+    def test_index_follows_writes(self, fts_library):
+        fts_library.update_by_id('Book', 2, {'title': 'Renamed'}, prev_data={})
+        fts_library.delete_by_id('Book', 1)
+        assert titles(fts_library.fulltext_search('Book', 'renamed', pagesize=10, active_page=1)) == ['Renamed']
+        assert fts_library.fulltext_search('Book', 'first second', pagesize=10, active_page=1)['count'] == 0
+
+    def test_quotes_in_search_value(self, fts_library):
+        data = fts_library.fulltext_search('Book', '"fir OR', pagesize=10, active_page=1)
+        assert data['count'] == 0
+
+    def test_keyset(self, fts_library):
+        data = fts_library.fulltext_search('Book', 'f', pagesize=10, active_page=None, keyset=True)
+        assert titles(data) == ['First']
+
+
+class TestTsvectorSearchBackend:
+
+    def test_queries(self, library):
+        book_model = library.get_model('Book')
+        backend = TsvectorSearchBackend(config='english')
+        ddl = [repr(query) for query in backend.create_queries(book_model)]
+        assert ddl[0] == ("ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+                          "(to_tsvector('english', coalesce(title, ''))) STORED;")
+        assert ddl[1] == 'CREATE INDEX IF NOT EXISTS book_search_vector_idx ON book USING GIN (search_vector);'
+        condition = backend.search_condition(book_model, "it's new")
+        assert repr(condition) == "book.search_vector @@ to_tsquery('english', ?)"
+        assert condition.params == ["'it''s':* & 'new':*"]
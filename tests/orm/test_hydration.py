@@ -0,0 +1,88 @@
+import tracemalloc
+from datetime import datetime
+
+from squyrrel.orm.field import IntegerField, StringField, BooleanField, DateTimeField, ManyToOne, BoundField
+from squyrrel.orm.model import Model
+from squyrrel.sql.references import ColumnReference
+
+
+class Publisher(Model):
+    table_name = 'publisher'
+
+    publisher_id = IntegerField(primary_key=True)
+    title = StringField()
+
+
+class Record(Model):
+    table_name = 'record'
+
+    record_id = IntegerField(primary_key=True)
+    title = StringField()
+    rating = IntegerField()
+    available = BooleanField(nice_true='yes', nice_false='no')
+    created = DateTimeField()
+    comment = StringField()
+    publisher_id = IntegerField()
+    publisher = ManyToOne('Publisher', foreign_key_field='publisher_id')
+
+
+SELECT_FIELDS = [ColumnReference(field_name, table='record') for field_name in Record.meta().field_names]
+ROW = (1, 'Kind of Blue', 5, 1, '1959-08-17 00:00:00', 'Modal jazz', 3)
+
+
+def build_row_dict(row):
+    return dict(zip(Record.meta().field_names, row))
+
+
+class TestHydration:
+
+    def test_from_row_keeps_field_api(self):
+        column_slots = Record.meta().column_slots(SELECT_FIELDS)
+        record = Record.from_row(ROW, column_slots)
+
+        assert isinstance(record.title, BoundField)
+        assert isinstance(record.title, StringField)
+        assert type(record.title) is type(record.comment) is BoundField.bound_class(StringField)
+        assert record.title.value == 'Kind of Blue'
+        assert record.available.nice_value == 'yes'
+        assert str(record.available) == 'yes'
+        assert record.record_id.primary_key
+        assert record.id == 1
+        assert record.as_json() == build_row_dict(ROW)
+        assert record.as_json() == Record(**build_row_dict(ROW)).as_json()
+
+    def test_set_value_writes_into_entity(self):
+        record = Record.from_dict(build_row_dict(ROW))
+        record.created.value = datetime(2000, 1, 2, 3, 4, 5)
+        record.rating.value = 4
+        assert record.as_json()['created'] == '2000-01-02 03:04:05'
+        assert record.as_json()['rating'] == 4
+        assert record.created.convert_to_python_datetime() == datetime(2000, 1, 2, 3, 4, 5)
+        # class level fields are untouched
+        assert Record.rating.value is None
+
+    def test_relations_are_bound_lazily(self):
+        publisher = Publisher.from_dict({'publisher_id': 3, 'title': 'Columbia'})
+        record = Record.from_dict({**build_row_dict(ROW), 'publisher': publisher})
+        assert 'publisher' not in record.__dict__
+        assert record.publisher.entity is publisher
+        assert record.publisher.title.value == 'Columbia'
+        assert record.publisher is record.publisher
+        assert Record.publisher.entity is None
+
+    def test_hydration_allocates_less_than_cloning_fields(self):
+        # small benchmark: compare the memory allocated for 1000 entities built either way
+        rows = [(i,) + ROW[1:] for i in range(1000)]
+        column_slots = Record.meta().column_slots(SELECT_FIELDS)
+
+        def measure(build):
+            tracemalloc.start()
+            entities = [build(row) for row in rows]
+            size, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            assert len(entities) == len(rows)
+            return size
+
+        cloned = measure(lambda row: Record(**build_row_dict(row)))
+        hydrated = measure(lambda row: Record.from_row(row, column_slots))
+        assert hydrated * 3 < cloned
@@ -0,0 +1,91 @@
+import pytest
+
+from squyrrel.db.pool import ConnectionPool
+from squyrrel.db.sqlite.connection import SqliteConnection
+from squyrrel.orm.field import IntegerField, StringField, ManyToOne
+from squyrrel.orm.index import Index
+from squyrrel.orm.migration_manager import MigrationManager
+from squyrrel.orm.model import Model
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+
+
+class Review(Model):
+    table_name = 'review'
+    indexes = [
+        Index('book_id', 'stars'),
+        Index('stars', where='stars > 3', include=['text']),
+        Index('text', name='review_text_unique', unique=True, include=['stars']),
+    ]
+
+    review_id = IntegerField(primary_key=True)
+    book_id = IntegerField()
+    reviewer_id = IntegerField()
+    stars = IntegerField()
+    text = StringField()
+    book = ManyToOne('Book', foreign_key_field='book_id')
+    reviewer = ManyToOne('Author', foreign_key_field='reviewer_id')
+
+
+@pytest.fixture
+def models(library_models):
+    return library_models + [Review]
+
+
+def schema_sql(qw, models):
+    migration_manager = MigrationManager(qw)
+    migration_manager.build_db_schema('schema', models)
+    return migration_manager.queries['schema']
+
+
+def index_sql(queries):
+    return [repr(query) for query in queries if repr(query).startswith('CREATE INDEX')
+            or repr(query).startswith('CREATE UNIQUE INDEX')]
+
+
+class TestIndexes:
+
+    def test_schema_indexes(self, models, register_models):
+        db = SqliteConnection()
+        db.connect(':memory:')
+        qw = QueryWizzard(db=db, builder=SqlBuilder())
+        register_models(qw, models)
+        queries = schema_sql(qw, models)
+        assert index_sql(queries) == [
+            'CREATE INDEX book_tag_book_id_idx ON book_tag (book_id);',
+            'CREATE INDEX book_author_id_idx ON book (author_id);',
+            'CREATE INDEX chapter_book_id_idx ON chapter (book_id);',
+            'CREATE INDEX review_book_id_stars_idx ON review (book_id, stars);',
+            'CREATE INDEX review_stars_idx ON review (stars, text) WHERE stars > 3;',
+            'CREATE UNIQUE INDEX review_text_unique ON review (text);',
+            'CREATE INDEX review_reviewer_id_idx ON review (reviewer_id);',
+        ]
+        qw.execute_queries_in_transaction(queries)
+        qw.execute_sql("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE '%idx'")
+        assert len(qw.fetchall()) == 6
+        db.close()
+
+    def test_include_and_if_not_exists(self, models, register_models):
+        class PostgresLike:
+            supports_index_include = True
+
+        qw = QueryWizzard(db=PostgresLike(), builder=SqlBuilder())
+        register_models(qw, models)
+        queries = [repr(query) for query in qw.build_create_index_queries('Review', if_not_exists=True)]
+        assert queries[1] == 'CREATE INDEX IF NOT EXISTS review_stars_idx ON review (stars) INCLUDE (text) WHERE stars > 3;'
+
+    def test_include_with_pool(self, models, register_models):
+        class PostgresLikeConnection(SqliteConnection):
+            supports_index_include = True
+
+        def connection_factory():
+            connection = PostgresLikeConnection()
+            connection.connect(':memory:')
+            return connection
+
+        pool = ConnectionPool(connection_factory, min_size=0, max_size=1)
+        qw = QueryWizzard(pool=pool, builder=SqlBuilder())
+        register_models(qw, models)
+        queries = [repr(query) for query in qw.build_create_index_queries('Review')]
+        assert queries[2] == 'CREATE UNIQUE INDEX review_text_unique ON review (text) INCLUDE (stars);'
+        pool.close()
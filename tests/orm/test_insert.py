@@ -0,0 +1,54 @@
+from squyrrel.sql.query import InsertQuery, BatchInsertQuery
+
+
+class TestInsert:
+
+    def test_create_uses_returning(self, library, record_sql):
+        executed = record_sql(library)
+        tag_id = library.create('Tag', {'label': 'drama'}, return_created_object=False)
+        assert tag_id == 4
+        assert len(executed) == 1
+        assert executed[0].endswith('RETURNING tag_id;')
+
+    def test_fallback_to_lastrowid(self, library, record_sql):
+        library.db.supports_returning = False
+        executed = record_sql(library)
+        assert library.create('Tag', {'label': 'drama'}, return_created_object=False) == 4
+        assert len(executed) == 1
+        assert 'RETURNING' not in executed[0]
+
+    def test_insert_rows_returns_all_ids_in_one_statement(self, library, record_sql):
+        executed = record_sql(library)
+        ids = library.insert_rows('Tag', ['label'], [('drama',), ('comedy',), ('satire',)])
+        assert ids == [4, 5, 6]
+        assert len(executed) == 1
+        library.db.supports_returning = False
+        assert library.insert_rows('Tag', ['label'], [('x',), ('y',)]) == [7, 8]
+
+    def test_render_returning(self, library):
+        query = InsertQuery.build('tag', {'label': 'drama'}).returning('tag_id')
+        assert library.builder.build(query) == repr(query) == 'INSERT INTO tag (label)\nVALUES (?)\nRETURNING tag_id;'
+        batch = BatchInsertQuery.build('tag', ['tag_id', 'label'], [(1, 'a'), (2, 'b')]).returning('tag_id')
+        assert repr(batch) == 'INSERT INTO tag (tag_id, label)\nVALUES\n(?, ?),\n(?, ?)\nRETURNING tag_id;'
+        assert batch.params == [1, 'a', 2, 'b']
+
+    def test_insert_rows_matches_ids_by_values(self, library):
+        # RETURNING does not guarantee the order of the VALUES list
+        fetchall = library.fetchall
+        library.fetchall = lambda: list(reversed(fetchall()))
+        ids = library.insert_rows('Tag', ['label'], [('drama',), ('comedy',), ('drama',)])
+        library.fetchall = fetchall
+        library.execute_sql('SELECT tag_id, label FROM tag WHERE tag_id IN (?, ?, ?)', params=ids)
+        assert dict(library.fetchall()) == {ids[0]: 'drama', ids[1]: 'comedy', ids[2]: 'drama'}
+        assert ids[1] == 5
+
+    def test_insert_rows_with_values_converted_by_the_db(self, library, record_sql):
+        # sqlite stores the string '1' of an integer column as 1
+        fetchall = library.fetchall
+        library.fetchall = lambda: list(reversed(fetchall()))
+        executed = record_sql(library)
+        ids = library.insert_rows('Chapter', ['heading', 'book_id'], [('x', '1'), ('y', '2'), ('z', 3)])
+        library.fetchall = fetchall
+        assert [sql.split()[0] for sql in executed] == ['INSERT']
+        library.execute_sql('SELECT chapter_id, heading, book_id FROM chapter WHERE chapter_id > 3 ORDER BY chapter_id')
+        assert library.fetchall() == [(ids[0], 'x', 1), (ids[1], 'y', 2), (ids[2], 'z', 3)]
@@ -0,0 +1,52 @@
+from squyrrel.orm.instrumentation import QueryInstrumentation, QueryEvent
+from squyrrel.sql.query import Query
+from squyrrel.sql.clauses import SelectClause, FromClause
+
+
+def books_query():
+    query = Query(select_clause=SelectClause('book_id', 'title'), from_clause=FromClause('book'))
+    query.model = 'Book'
+    return query
+
+
+class TestInstrumentation:
+
+    def test_get_all_records_rows_and_hydration(self, library):
+        events = []
+        library.instrumentation = QueryInstrumentation(hooks=[events.append])
+        library.get_all(books_query())
+        library.get_all(books_query())
+
+        assert len(events) == 2
+        assert events[0].rows == 3
+        assert events[0].hydration_time > 0
+        assert events[0].fingerprint == events[1].fingerprint
+
+        stats = library.instrumentation.stats()
+        assert len(stats) == 1
+        assert stats[0]['count'] == 2
+        assert stats[0]['rows'] == 6
+        assert sum(stats[0]['histogram'].values()) == 2
+
+    def test_get_and_writes(self, library):
+        events = []
+        library.instrumentation = QueryInstrumentation(hooks=[events.append])
+        library.get_by_id('Author', 1)
+        library.create('Tag', {'label': 'drama'}, return_created_object=False)
+        assert any(event.sql.startswith('INSERT INTO tag') for event in events)
+        assert events[0].rows == 1
+
+    def test_iter_all(self, library):
+        library.instrumentation = QueryInstrumentation()
+        assert len(list(library.iter_all(books_query(), batch_size=2))) == 3
+        stats = library.instrumentation.stats()
+        assert stats[0]['rows'] == 3
+
+    def test_slow_query_log(self):
+        instrumentation = QueryInstrumentation(slow_query_threshold=0.5, slow_query_log_size=1)
+        for duration in (0.1, 0.6, 0.7):
+            instrumentation.record(QueryEvent('SELECT 1;', None, duration))
+        assert [event.duration for event in instrumentation.slow_queries] == [0.7]
+        histogram = instrumentation.stats()[0]['histogram']
+        assert histogram[0.1] == 1
+        assert histogram[1.0] == 2
@@ -0,0 +1,27 @@
+from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+class TestIterAll:
+
+    def test_iter_all_in_batches(self, library):
+        books = library.iter_all(QueryBuilder('Book', library).orderby('book_id').build(), batch_size=2)
+        assert [book.title.value for book in books] == ['First', 'Second', 'Third']
+
+    def test_iter_all_json(self, library):
+        query = QueryBuilder('Book', library).orderby('book_id').build()
+        expected = library.get_all(QueryBuilder('Book', library).orderby('book_id').build(),
+                                   entity_format=EntityFormat.JSON)
+        assert list(library.iter_all(query, batch_size=1, entity_format=EntityFormat.JSON)) == expected
+
+    def test_iter_all_is_lazy(self, library):
+        books = library.iter_all(QueryBuilder('Book', library).orderby('book_id').build(), batch_size=1)
+        first = next(books)
+        # other queries may run while the generator is suspended
+        assert library.count('Book') == 3
+        assert [first.title.value] + [book.title.value for book in books] == ['First', 'Second', 'Third']
+
+    def test_streaming_cursor_is_not_the_connection_cursor(self, library):
+        library.execute_sql('SELECT count(*) FROM book')
+        assert len(list(library.iter_all(QueryBuilder('Book', library).build(), batch_size=2))) == 3
+        assert library.fetchall() == [(3,)]
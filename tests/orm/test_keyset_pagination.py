@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+
+from squyrrel.sql.clauses import KeysetPagination
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+def add_books(qw, titles):
+    qw.create_many('Book', [{'title': title} for title in titles])
+
+
+def pages(qw, build_query):
+    cursor = None
+    result = []
+    while True:
+        page = qw.get_page(build_query(cursor))
+        result.append([book.title.value for book in page['entities']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return result
+
+
+class TestKeysetPagination:
+
+    def test_pages_by_primary_key(self, library):
+        add_books(library, ['Fourth', 'Fifth'])
+        query = QueryBuilder('Book', library).keyset_pagination(2).build()
+        assert repr(query.pagination) == 'LIMIT 2'
+        assert pages(library, lambda cursor: QueryBuilder('Book', library).keyset_pagination(2, cursor).build()) == \
+            [['First', 'Second'], ['Third', 'Fourth'], ['Fifth']]
+
+    def test_orderby_column_with_ties(self, library):
+        add_books(library, ['Second', 'Another'])
+
+        def build_query(cursor):
+            return QueryBuilder('Book', library).orderby('title').keyset_pagination(2, cursor).build()
+
+        assert pages(library, build_query) == [['Another', 'First'], ['Second', 'Second'], ['Third']]
+        sql = library.render_query(build_query(KeysetPagination.encode_cursor(['First', 1])))[0]
+        assert '(book.title, book.book_id) > (?, ?)' in sql
+        assert 'OFFSET' not in sql
+
+    def test_mixed_directions(self, library):
+        add_books(library, ['Second'])
+
+        def build_query(cursor):
+            return QueryBuilder('Book', library) \
+                .orderby(['title', 'book_id'], ascending={'book.title': False, 'book.book_id': True}) \
+                .keyset_pagination(2, cursor).build()
+
+        assert pages(library, build_query) == [['Third', 'Second'], ['Second', 'First'], []]
+
+    def test_fulltext_search(self, library):
+        data = library.fulltext_search('Book', 'i', pagesize=2, active_page=None, keyset=True)
+        assert [book.title.value for book in data['list']] == ['First', 'Third']
+        assert data['count'] == 2
+        data = library.fulltext_search('Book', 'i', pagesize=2, active_page=None, keyset=True,
+                                       cursor=data['next_cursor'])
+        assert data['list'] == [] and data['next_cursor'] is None
+
+    def test_invalid_cursor(self, library):
+        with pytest.raises(ValueError):
+            QueryBuilder('Book', library).keyset_pagination(2, 'not a cursor').build()
+
+    def test_select_without_keyset_columns(self, library):
+        def build_query(cursor):
+            return QueryBuilder('Book', library).select(['book.author_id']).orderby('title') \
+                .keyset_pagination(2, cursor).build()
+
+        assert repr(build_query(None).select_clause) == 'SELECT book.author_id, book.title, book.book_id'
+        assert pages(library, build_query) == [['First', 'Second'], ['Third']]
+
+    def test_cursor_with_datetime(self):
+        values = [datetime.datetime(2020, 5, 17, 12, 30), datetime.date(2020, 5, 17), 'x', 3]
+        assert KeysetPagination.decode_cursor(KeysetPagination.encode_cursor(values)) == values
+        with pytest.raises(TypeError):
+            KeysetPagination.encode_cursor([object()])
+
+
+def test_orderby_column_not_in_select_warns(library):
+    with pytest.warns(UserWarning, match='orderby column <book.book_id> is not specified'):
+        query = QueryBuilder('Book', library).select(['title']).orderby('book_id').build()
+    assert query.orderby_clause is None
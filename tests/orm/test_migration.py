@@ -0,0 +1,120 @@
+import pytest
+
+from squyrrel.db.sqlite.connection import SqliteConnection
+from squyrrel.orm.field import IntegerField, StringField, ManyToOne, ManyToMany, OneToMany
+from squyrrel.orm.migration_manager import MigrationManager
+from squyrrel.orm.model import Model
+from squyrrel.orm.schema import TableRebuild
+from squyrrel.orm.wizzard import QueryWizzard
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+
+
+class Book(Model):
+    """Book of the library with a new column subtitle"""
+    table_name = 'book'
+
+    book_id = IntegerField(primary_key=True)
+    title = StringField()
+    subtitle = StringField()
+    author_id = IntegerField()
+    author = ManyToOne('Author', foreign_key_field='author_id', update_search_column='fullname', lazy_load=False)
+    tags = ManyToMany('Tag', junction_table='book_tag', foreign_key_field='tag_id', lazy_load=False)
+    chapters = OneToMany('Chapter')
+
+
+@pytest.fixture
+def connect(library_file, register_models):
+    """connect(models): QueryWizzard on the library db file with the models registered"""
+    connections = []
+
+    def connect_(models):
+        db = SqliteConnection()
+        db.connect(library_file)
+        connections.append(db)
+        qw = QueryWizzard(db=db, builder=SqlBuilder())
+        register_models(qw, models)
+        return qw
+
+    yield connect_
+    for db in connections:
+        db.close()
+
+
+def with_book(models, book_model):
+    """The models with book_model instead of the Book of the library"""
+    return [book_model if model.__name__ == 'Book' else model for model in models]
+
+
+def rows(qw, sql):
+    qw.execute_sql(sql)
+    return qw.fetchall()
+
+
+class TestMigration:
+
+    def test_nothing_to_migrate(self, library, library_models):
+        assert MigrationManager(library).build_migration('migration', library_models) == []
+
+    def test_add_column_and_backfill(self, connect, library_models):
+        models = with_book(library_models, Book)
+        qw = connect(models)
+        migration_manager = MigrationManager(qw)
+        steps = migration_manager.build_migration('migration', models)
+        assert [repr(step) for step in steps] == ['ALTER TABLE book ADD COLUMN subtitle TEXT;']
+
+        progress = []
+        migration_manager.add_backfill('migration', 'Book', {'subtitle': 'upper(title)'}, where='book_id != 2',
+                                       batch_size=1, progress_callback=progress.append)
+        migration_manager.run('migration')
+        assert progress == [1, 2]
+        assert rows(qw, 'SELECT subtitle FROM book ORDER BY book_id') == [('FIRST',), (None,), ('THIRD',)]
+        assert MigrationManager(qw).build_migration('again', models) == []
+
+    def test_rebuild_table(self, connect, library_models):
+        class Book(Model):
+            table_name = 'book'
+
+            book_id = IntegerField(primary_key=True)
+            title = StringField(not_null=True, default='untitled')
+            tags = ManyToMany('Tag', junction_table='book_tag', foreign_key_field='tag_id', lazy_load=False)
+            chapters = OneToMany('Chapter')
+
+        models = with_book(library_models, Book)
+        qw = connect(models)
+        qw.execute_sql('UPDATE book SET title = NULL WHERE book_id = 3')
+        qw.commit()
+        migration_manager = MigrationManager(qw)
+        steps = migration_manager.build_migration('migration', models, drop_columns=True)
+        assert len(steps) == 1
+        assert isinstance(steps[0], TableRebuild)
+        assert steps[0].columns == ['book_id', 'title']
+        assert "SELECT book_id, coalesce(title, 'untitled') FROM book" in repr(steps[0])
+
+        migration_manager.run('migration')
+        assert rows(qw, 'SELECT title FROM book ORDER BY book_id') == [('First',), ('Second',), ('untitled',)]
+        assert rows(qw, 'PRAGMA table_info(book)')[1][1:4] == ('title', 'TEXT', 1)
+        assert [name for _, name, *_ in rows(qw, 'PRAGMA table_info(book)')] == ['book_id', 'title']
+        assert rows(qw, 'SELECT count(*) FROM book_tag') == [(3,)]
+        assert rows(qw, 'PRAGMA foreign_keys') == [(1,)]
+        assert MigrationManager(qw).build_migration('again', models, drop_columns=True) == []
+
+    def test_failed_rebuild_is_rolled_back(self, connect, library_models):
+        class Book(Model):
+            table_name = 'book'
+
+            book_id = IntegerField(primary_key=True)
+            title = StringField(not_null=True)
+            author_id = IntegerField()
+
+        models = with_book(library_models, Book)
+        qw = connect(models)
+        qw.execute_sql('UPDATE book SET title = NULL WHERE book_id = 3')
+        qw.commit()
+        migration_manager = MigrationManager(qw)
+        migration_manager.build_migration('migration', models)
+        with pytest.raises(Exception):
+            migration_manager.run('migration')
+        assert rows(qw, "SELECT name FROM sqlite_master WHERE name LIKE 'book%' AND type = 'table' ORDER BY name") \
+            == [('book',), ('book_tag',)]
+        assert rows(qw, 'SELECT count(*) FROM book') == [(3,)]
+        assert rows(qw, 'PRAGMA foreign_keys') == [(1,)]
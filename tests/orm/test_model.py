@@ -0,0 +1,74 @@
+import pytest
+
+from squyrrel.orm.field import IntegerField, StringField, ManyToOne, ManyToMany
+from squyrrel.orm.exceptions import RelationNotFoundException
+from squyrrel.orm.model import Model
+
+
+class Author(Model):
+    table_name = 'author'
+
+    author_id = IntegerField(primary_key=True)
+    name = StringField()
+
+
+class Book(Model):
+    table_name = 'book'
+
+    book_id = IntegerField(primary_key=True)
+    title = StringField()
+    secret = StringField(never_select=True)
+    author_id = IntegerField()
+    author = ManyToOne('Author', foreign_key_field='author_id')
+    tags = ManyToMany('Tag', junction_table='book_tag', foreign_key_field='tag_id')
+
+
+class TestModelMeta:
+
+    def test_meta_is_compiled_once(self):
+        assert Book.meta() is Book.meta()
+
+    def test_fields(self):
+        assert list(Book.fields_dict().keys()) == ['book_id', 'title', 'author_id']
+        assert list(Book.fields_dict(include_never_select_fields=True).keys()) == \
+            ['book_id', 'title', 'secret', 'author_id']
+        assert Book.get_field('secret') is None
+        assert Book.id_field_name() == 'book_id'
+
+    def test_relations(self):
+        assert list(Book.relations_dict().keys()) == ['author', 'tags']
+        assert list(Book.many_to_one_dict().keys()) == ['author']
+        assert list(Book.many_to_many_dict().keys()) == ['tags']
+        assert Book.one_to_many_dict() == {}
+
+    def test_relation_by_fk_id_column(self):
+        relation_name, relation = Book.get_relation_by_fk_id_column('author_id')
+        assert relation_name == 'author'
+        assert isinstance(relation, ManyToOne)
+        with pytest.raises(RelationNotFoundException):
+            Book.get_relation_by_fk_id_column('title')
+
+    def test_subclass_does_not_inherit_meta(self):
+        Author.meta()
+
+        class CoAuthor(Author):
+            table_name = 'co_author'
+
+            co_author_id = IntegerField(primary_key=True)
+
+        assert CoAuthor.meta() is not Author.meta()
+        assert CoAuthor.id_field_name() == 'co_author_id'
+
+    def test_meta_invalidated_when_class_changes(self):
+        class Tag(Model):
+            table_name = 'tag'
+
+            tag_id = IntegerField(primary_key=True)
+
+        meta = Tag.meta()
+        Tag.label = StringField()
+        assert Tag.meta() is not meta
+        assert list(Tag.fields_dict().keys()) == ['tag_id', 'label']
+
+        del Tag.label
+        assert list(Tag.fields_dict().keys()) == ['tag_id']
@@ -0,0 +1,48 @@
+import pytest
+
+from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.orm.exceptions import DidNotFindObjectWithIdException
+from squyrrel.orm.filter import ManyToManyFilter
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+class TestPrefetch:
+
+    def test_prefetch_stitches_to_many_relations(self, library, record_sql):
+        query = QueryBuilder('Book', library).orderby('book_id').build()
+        executed = record_sql(library)
+        books = library.get_all(query, prefetch=['tags', 'chapters'])
+        # books, tags of all books, chapters of all books
+        assert len(executed) == 3
+        assert [[tag.label.value for tag in book.tags.entities] for book in books] == \
+            [['novel', 'poetry'], ['poetry'], []]
+        assert [sorted(chapter.heading.value for chapter in book.chapters.entities) for book in books] == \
+            [['Intro', 'Outro'], ['Prologue'], []]
+        assert library.get_model('Book').chapters.entities is None
+
+    def test_prefetch_json(self, library):
+        books = library.get_all(QueryBuilder('Book', library).orderby('book_id').build(),
+                                entity_format=EntityFormat.JSON, prefetch=True)
+        assert [[tag['label'] for tag in book['tags']] for book in books] == [['novel', 'poetry'], ['poetry'], []]
+        assert 'chapters' not in books[0]
+
+    def test_prefetch_chunks_ids(self, library):
+        library.prefetch_chunk_size = 2
+        related = library.prefetch_relation_to_many('Book', [1, 2, 3], library.get_model('Book').tags)
+        assert {book_id: [tag.id for tag in tags] for book_id, tags in related.items()} == {1: [1, 2], 2: [2], 3: []}
+
+    def test_get_by_id_loads_relations_in_one_query_each(self, library):
+        book = library.get_by_id('Book', 1, entity_format=EntityFormat.JSON, prefetch=['chapters'])
+        assert [tag['label'] for tag in book['tags']] == ['novel', 'poetry']
+        assert sorted(chapter['heading'] for chapter in book['chapters']) == ['Intro', 'Outro']
+
+    def test_load_filter_values_keeps_order_of_ids(self, library, record_sql):
+        filter_ = ManyToManyFilter('tags', library.get_model('Book'), 'tags', value=[3, 1])
+        executed = record_sql(library)
+        library.load_filter_values([filter_])
+        assert len(executed) == 1
+        assert [tag.id for tag in filter_.entities] == [3, 1]
+
+    def test_get_all_by_ids_raises_for_missing_id(self, library):
+        with pytest.raises(DidNotFindObjectWithIdException):
+            library.get_all_by_ids('Tag', [1, 7])
@@ -0,0 +1,82 @@
+from squyrrel.orm.result_cache import ResultCache, KeyValueResultCacheBackend, InMemoryResultCacheBackend
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+class DictClient:
+    """Local stand-in for a redis client"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+
+
+def tags_query(qw):
+    return QueryBuilder('Tag', qw).orderby('tag_id').build()
+
+
+class TestResultCache:
+
+    def test_repeated_reads_are_cached(self, library, record_query_events):
+        library.result_cache = ResultCache()
+        events = record_query_events(library)
+        first = library.get_all(tags_query(library))
+        second = library.get_all(tags_query(library))
+        assert [tag.label.value for tag in second] == [tag.label.value for tag in first]
+        assert library.count('Tag') == library.count('Tag') == 3
+        library.commit()
+        assert len(events) == 2
+        assert library.result_cache.stats() == {'hits': 2, 'misses': 2}
+
+    def test_writes_invalidate(self, library):
+        library.result_cache = ResultCache()
+        assert library.count('Tag') == 3
+        library.create('Tag', {'label': 'drama'}, return_created_object=False)
+        assert library.count('Tag') == 4
+
+        assert library.get_all(tags_query(library))[0].label.value == 'novel'
+        library.update_by_id('Tag', 1, {'label': 'romance'}, prev_data={}, return_updated_object=False)
+        assert library.get_all(tags_query(library))[0].label.value == 'romance'
+
+    def test_rollback_invalidates_written_tables(self, library):
+        library.result_cache = ResultCache()
+        library.execute_sql("INSERT INTO tag (label) VALUES ('uncommitted')")
+        assert library.count('Tag') == 4
+        library.rollback()
+        assert library.count('Tag') == 3
+
+    def test_shared_backend(self, library):
+        library.result_cache = ResultCache(backend=KeyValueResultCacheBackend(DictClient()))
+        assert library.count('Tag') == library.count('Tag') == 3
+        assert library.result_cache.hits == 1
+        library.delete_by_id('Tag', 3)
+        assert library.count('Tag') == 2
+
+    def test_in_memory_lru_and_ttl(self):
+        backend = InMemoryResultCacheBackend(max_size=2)
+        backend.set('a', [1])
+        backend.set('b', [2])
+        backend.get('a')
+        backend.set('c', [3])
+        assert backend.get('b') is None
+        backend.set('d', [4], ttl=0)
+        assert backend.get('d') is None
+        assert backend.get('c') == [3]
+
+    def test_reader_on_other_connection_during_write(self, library_file, open_library):
+        result_cache = ResultCache(backend=KeyValueResultCacheBackend(DictClient()))
+        writer = open_library(library_file, result_cache=result_cache)
+        reader = open_library(library_file, result_cache=result_cache)
+
+        writer.execute_sql("UPDATE tag SET label = 'changed' WHERE tag_id = 1")
+        # not committed yet: the reader caches the old rows under the version bumped by the update
+        assert reader.get_all(tags_query(reader))[0].label.value == 'novel'
+        writer.commit()
+        assert reader.get_all(tags_query(reader))[0].label.value == 'changed'
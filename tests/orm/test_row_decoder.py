@@ -0,0 +1,34 @@
+from squyrrel.orm.entity_format import EntityFormat
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+class TestRowDecoder:
+
+    def test_get_all_models(self, library):
+        books = library.get_all(QueryBuilder('Book', library).orderby('book_id').build())
+        assert [book.title.value for book in books] == ['First', 'Second', 'Third']
+        assert [book.author.fullname.value for book in books] == ['Ann', 'Bob', 'Ann']
+        assert books[0].as_json() == {'book_id': 1, 'title': 'First', 'author_id': 1}
+
+    def test_get_all_json(self, library):
+        books = library.get_all(QueryBuilder('Book', library).orderby('book_id').build(),
+                                entity_format=EntityFormat.JSON)
+        assert books[1] == {'book_id': 2, 'title': 'Second', 'author_id': 2,
+                            'author': {'author_id': 2, 'fullname': 'Bob'}}
+
+    def test_decoder_is_compiled_once_per_query(self, library):
+        query = QueryBuilder('Book', library).build()
+        library.get_all(query)
+        decoder = query.row_decoder
+        assert decoder.column_slots == [(0, 0), (1, 1), (2, 2)]
+        relation_name, foreign_model, column_slots, columns = decoder.many_to_one[0]
+        assert relation_name == 'author'
+        assert column_slots == [(3, 0), (4, 1)]
+        assert columns == [(3, 'author_id'), (4, 'fullname')]
+
+    def test_compile_row_decoder(self, library):
+        model = library.get_model('Book')
+        row_decoder = library.compile_row_decoder(model, model.build_select_fields())
+        row = (1, 'First', 1)
+        assert row_decoder.to_dict(row) == {'book_id': 1, 'title': 'First', 'author_id': 1}
+        assert row_decoder.to_entity(row).id == 1
@@ -0,0 +1,58 @@
+from squyrrel.orm.session import Session
+from squyrrel.sql.query_builder import QueryBuilder
+
+
+class TestSession:
+
+    def test_identity_map(self, library, record_query_events):
+        session = Session(library)
+        book = session.get_by_id('Book', 1)
+        events = record_query_events(library)
+        assert session.get_by_id('Book', 1) is book
+        assert session.get_all_by_ids('Book', [1, 1]) == [book, book]
+        library.commit()
+        assert events == []
+
+        books = session.get_all(QueryBuilder('Book', library).build())
+        assert books[0] is book
+        assert session.get_all_by_ids('Book', [3, 2]) == [books[2], books[1]]
+
+    def test_flush_only_changed_columns(self, library, record_query_events):
+        session = Session(library)
+        book = session.get_by_id('Book', 1)
+        author = session.get_by_id('Author', 2)
+        assert not book.is_dirty
+
+        book.title.value = 'First edition'
+        author.fullname.value = 'Bob'  # unchanged value
+        assert book.dirty_fields() == {'title': 'First edition'}
+        assert session.dirty_entities() == [book]
+
+        events = record_query_events(library)
+        assert session.flush() == 1
+        assert [event.sql for event in events] == ['UPDATE book\nSET title = ?\nWHERE book.book_id = ?;']
+        assert not book.is_dirty
+        assert library.get_by_id('Book', 1).title.value == 'First edition'
+
+    def test_create_caches_m21_lookups(self, library, record_query_events):
+        session = Session(library)
+        events = record_query_events(library)
+        session.create('Book', {'title': 'Fourth', 'author': 'Ann'})
+        session.create('Book', {'title': 'Fifth', 'author': 'Ann'})
+        session.commit()
+        lookups = [event for event in events if event.sql.startswith('SELECT')]
+        assert len(lookups) == 1
+        assert library.count('Book') == 5
+
+    def test_get_by_id_completes_entity_of_query(self, library, record_query_events):
+        session = Session(library)
+        books = session.get_all(QueryBuilder('Book', library).build())
+        book = session.get_by_id('Book', 1)
+        assert book is books[0]
+        assert [tag.label.value for tag in book.tags.entities] == [
+            tag.label.value for tag in library.get_by_id('Book', 1).tags.entities]
+        assert book.tags.entities
+        events = record_query_events(library)
+        assert session.get_by_id('Book', 1) is book
+        library.commit()
+        assert events == []
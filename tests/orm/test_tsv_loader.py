@@ -0,0 +1,55 @@
+import pytest
+
+from squyrrel.orm.exceptions import TsvLoadException
+from squyrrel.orm.field import BooleanField, DateTimeField, IntegerField, StringField
+from squyrrel.orm.tsv_loader import TsvLoader
+
+
+def write_tsv(tmp_path, lines):
+    filepath = tmp_path / 'data.tsv'
+    filepath.write_text('\n'.join(lines) + '\n', encoding='utf8')
+    return str(filepath)
+
+
+def chapters(qw):
+    qw.execute_sql('SELECT heading, book_id FROM chapter ORDER BY chapter_id')
+    return qw.db.fetchall()
+
+
+class TestFieldParse:
+
+    def test_parse(self):
+        assert IntegerField().parse('12') == 12
+        assert IntegerField().parse('') is None
+        assert StringField().parse('') == ''
+        assert BooleanField().parse('True') is True
+        assert BooleanField(nice_false='nein').parse('nein') is False
+        assert DateTimeField().parse('2020-01-02 03:04:05') == '2020-01-02 03:04:05'
+        with pytest.raises(ValueError):
+            DateTimeField().parse('02.01.2020')
+
+
+class TestTsvLoader:
+
+    def test_load_in_chunks(self, library, tmp_path):
+        lines = ['title\tbook_id\tignored'] + [f'Chapter {i}\t{i % 3 + 1}\tx' for i in range(25)]
+        progress = []
+        loader = TsvLoader(library, chunk_size=10, progress_callback=lambda *args: progress.append(args))
+        loaded = loader.load('Chapter', write_tsv(tmp_path, lines), column_map={'title': 'heading', 'ignored': None})
+
+        assert loaded == 25
+        assert [rows_loaded for rows_loaded, _, _ in progress] == [10, 20, 25]
+        assert progress[-1][1] == progress[-1][2]
+        assert chapters(library)[3:5] == [('Chapter 0', 1), ('Chapter 1', 2)]
+
+    def test_invalid_cell_rolls_back(self, library, tmp_path):
+        lines = ['heading\tbook_id', 'a\t1', 'b\tone']
+        with pytest.raises(TsvLoadException) as exc_info:
+            TsvLoader(library, chunk_size=1).load('Chapter', write_tsv(tmp_path, lines))
+        assert exc_info.value.line_number == 3
+        assert exc_info.value.column == 'book_id'
+        assert len(chapters(library)) == 3
+
+    def test_unknown_column(self, library, tmp_path):
+        with pytest.raises(TsvLoadException):
+            TsvLoader(library).load('Chapter', write_tsv(tmp_path, ['chapter\tbook_id', 'a\t1']))
@@ -0,0 +1,10 @@
+from squyrrel.sql.builder.query_cache import QueryCache
+
+
+class TestWizzardQueryCache:
+
+    def test_get_all_with_query_cache(self, library):
+        library.query_cache = QueryCache(library.builder)
+        titles = [library.get_by_id('Book', book_id).title.value for book_id in (1, 2, 3)]
+        assert titles == ['First', 'Second', 'Third']
+        assert library.query_cache.hits >= 2
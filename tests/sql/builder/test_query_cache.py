@@ -0,0 +1,59 @@
+from squyrrel.sql.builder.query_cache import QueryCache
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+from squyrrel.sql.clauses import SelectClause, FromClause, WhereClause, SetClause, UpdateClause
+from squyrrel.sql.expressions import Equals, And, Parameter, NumericalLiteral
+from squyrrel.sql.query import Query, UpdateQuery
+from squyrrel.sql.references import ColumnReference
+
+
+def build_query(book_id, title, limit_literal=1):
+    condition = And(Equals(ColumnReference('book_id', table='book'), Parameter(book_id)),
+                    Equals(ColumnReference('title', table='book'), Parameter(title)))
+    return Query(select_clause=SelectClause(ColumnReference('title', table='book'), NumericalLiteral(limit_literal)),
+                 from_clause=FromClause('book'),
+                 where_clause=WhereClause(condition))
+
+
+class TestQueryCache:
+
+    def test_same_shape_is_rendered_once(self):
+        cache = QueryCache(SqlBuilder())
+        sql, params = cache.render(build_query(1, 'First'))
+        assert sql == SqlBuilder().build(build_query(1, 'First'))
+        assert params == [1, 'First']
+
+        sql2, params2 = cache.render(build_query(2, 'Second'))
+        assert sql2 == sql
+        assert params2 == [2, 'Second']
+        assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+    def test_literals_are_part_of_the_shape(self):
+        cache = QueryCache(SqlBuilder())
+        sql1, _ = cache.render(build_query(1, 'First', limit_literal=1))
+        sql2, _ = cache.render(build_query(1, 'First', limit_literal=2))
+        assert sql1 != sql2
+        assert cache.misses == 2
+
+    def test_equal_scalars_of_other_types(self):
+        cache = QueryCache(SqlBuilder())
+        for literal in (1, 1.0, True):
+            assert cache.render(build_query(1, 'First', limit_literal=literal))[0] == \
+                SqlBuilder().build(build_query(1, 'First', limit_literal=literal))
+        assert cache.misses == 3
+
+    def test_param_plan_follows_query_params(self):
+        cache = QueryCache(SqlBuilder())
+        query = UpdateQuery(update_clause=UpdateClause('book'),
+                            set_clause=SetClause(title='New', author_id=2),
+                            where_clause=WhereClause(Equals(ColumnReference('book_id'), Parameter(1))))
+        assert cache.render(query) == (SqlBuilder().build(query), ['New', 2, 1])
+        query.where_clause.condition.rhs.value = 5
+        assert cache.render(query)[1] == ['New', 2, 5]
+
+    def test_lru_bound(self):
+        cache = QueryCache(SqlBuilder(), max_size=2)
+        for literal in (1, 2, 1, 3):
+            cache.render(build_query(1, 'First', limit_literal=literal))
+        assert len(cache) == 2
+        cache.render(build_query(1, 'First', limit_literal=2))
+        assert cache.stats == {'size': 2, 'max_size': 2, 'hits': 1, 'misses': 4}
@@ -0,0 +1,57 @@
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+from squyrrel.sql.clauses import SelectClause, FromClause, WhereClause, OrderByClause, GroupByClause
+from squyrrel.sql.expressions import Equals, Like, Or, Not, In, And, Parameter, NumericalLiteral
+from squyrrel.sql.aggregation import Count
+from squyrrel.sql.join import OnJoinCondition, JoinType
+from squyrrel.sql.query import Query
+from squyrrel.sql.references import ColumnReference
+
+
+def build_query():
+    from_clause = FromClause('book')
+    from_clause.join(JoinType.INNER_JOIN, 'author',
+                     OnJoinCondition(Equals(ColumnReference('author_id', table='book'),
+                                            ColumnReference('author_id', table='author'))))
+    from_clause.join(JoinType.INNER_JOIN, 'book_tag',
+                     OnJoinCondition(Equals(ColumnReference('book_id', table='book'),
+                                            ColumnReference('book_id', table='book_tag'))))
+    subquery = Query(select_clause=SelectClause(Count([ColumnReference('tag_id')])),
+                     from_clause=FromClause('book_tag'),
+                     alias='num_tags', is_subquery=True)
+    condition = Or(And(Like.column_as_parameter('book.title', 'Fir'), Not(Equals(ColumnReference('book_id'),
+                                                                                   NumericalLiteral(3)))),
+                   In.column_as_parameters('book.book_id', [1, 2]))
+    return Query(select_clause=SelectClause('book.title', ColumnReference('fullname', table='author', alias='a'),
+                                            subquery),
+                 from_clause=from_clause,
+                 where_clause=WhereClause(condition),
+                 groupby_clause=GroupByClause(ColumnReference('title', table='book')),
+                 orderby_clause=OrderByClause([ColumnReference('title', table='book')],
+                                              ascending={ColumnReference('title', table='book'): False}))
+
+
+class LoudEquals(Equals):
+
+    def __repr__(self):
+        return 'LOUD'
+
+
+class TestSqlBuilder:
+
+    def test_output_equals_repr(self):
+        query = build_query()
+        assert SqlBuilder().build(query) == repr(query)
+
+    def test_dispatch_is_cached_per_class(self):
+        builder = SqlBuilder()
+        builder.build(build_query())
+        assert SqlBuilder._dispatch_cache[Equals] is SqlBuilder.visit_ComparisionOperator
+        assert SqlBuilder._dispatch_cache[ColumnReference] is None
+
+    def test_overridden_repr_is_respected(self):
+        condition = And(LoudEquals(ColumnReference('a'), Parameter(1)), Equals(ColumnReference('b'), Parameter(2)))
+        assert SqlBuilder().build(condition) == '(LOUD AND b = ?)'
+
+    def test_long_condition_chain(self):
+        condition = And.concat([Equals(ColumnReference('id'), Parameter(i)) for i in range(200)])
+        assert SqlBuilder().build(condition) == repr(condition)
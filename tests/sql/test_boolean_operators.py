@@ -0,0 +1,44 @@
+from squyrrel.orm.filter import ManyToManyFilter
+from squyrrel.sql.builder.sql_builder import SqlBuilder
+from squyrrel.sql.expressions import And, Or, Equals, Parameter, BooleanLiteral
+from squyrrel.sql.query_builder import QueryBuilder
+from squyrrel.sql.references import ColumnReference
+
+
+def equals(column, value):
+    return Equals(ColumnReference(column), Parameter(value))
+
+
+def test_concat_builds_flat_operator():
+    condition = And.concat([equals('a', 1), equals('b', 2), equals('c', 3)])
+    assert len(condition.operands) == 3
+    assert repr(condition) == '(a = ? AND b = ? AND c = ?)'
+    assert condition.params == [1, 2, 3]
+    assert condition.columns == [ColumnReference('a'), ColumnReference('b'), ColumnReference('c')]
+
+
+def test_concat_merges_operands_of_same_operator_only():
+    condition = Or.concat([Or(equals('a', 1), equals('b', 2)), And(equals('c', 3), equals('d', 4))])
+    assert repr(condition) == '(a = ? OR b = ? OR (c = ? AND d = ?))'
+    assert Or.concat([equals('a', 1)]).params == [1]
+
+
+def test_binary_interface():
+    condition = And(equals('a', 1), equals('b', 2), equals('c', 3))
+    assert repr(condition.lhs) == 'a = ?'
+    assert repr(condition.rhs) == '(b = ? AND c = ?)'
+    assert And(BooleanLiteral(True), BooleanLiteral(False)).rhs.value is False
+
+
+def test_long_chain_renders_without_recursion():
+    condition = Or.concat([equals('id', i) for i in range(5000)])
+    sql = SqlBuilder().build(condition)
+    assert sql == repr(condition)
+    assert sql.count('?') == len(condition.params) == 5000
+
+
+def test_many_to_many_or_filter_uses_in(library):
+    filter_ = ManyToManyFilter('tags', library.get_model('Book'), 'tags', value=[1, 2])
+    query = QueryBuilder('Book', library).model_filters([filter_]).orderby('book_id').build()
+    assert 'tag.tag_id IN (?, ?)' in library.builder.build(query)
+    assert {book.title.value for book in library.get_all(query)} == {'First', 'Second'}
@@ -0,0 +1,55 @@
+import pytest
+
+from squyrrel.utils.tsv_table import TsvTableDocument, MappedTsvTableDocument
+
+
+@pytest.fixture
+def tsv_file(tmp_path):
+    filepath = tmp_path / 'table.tsv'
+    filepath.write_bytes('id\tname\tcity\r\n1\tÄnne\tBern\r\n2\tBob\tBasel\n3\tCarl\tChur'.encode('utf8'))
+    return str(filepath)
+
+
+class TestTsvTableDocument:
+
+    def test_binary_mode(self, tsv_file):
+        with open(tsv_file, 'rb') as file:
+            rows = TsvTableDocument.get_tsv(file, open_in_text_mode=False, strip_line_break=True)
+        assert len(rows) == 4
+        assert rows[3] == ['3', 'Carl', 'Chur']
+
+    def test_column_index(self, tsv_file):
+        document = TsvTableDocument()
+        document.load_from_file(tsv_file, strip_line_break=True)
+        assert document.get_column_index('name') == 1
+        assert document.get_column_index('zip') is None
+
+
+class TestMappedTsvTableDocument:
+
+    def test_rows(self, tsv_file):
+        with MappedTsvTableDocument() as document:
+            document.load_from_file(tsv_file)
+            assert document.column_headers == ['id', 'name', 'city']
+            assert len(document) == 3
+            assert document[0] == ['1', 'Änne', 'Bern']
+            assert document[-1] == ['3', 'Carl', 'Chur']
+            assert document[1:] == [['2', 'Bob', 'Basel'], ['3', 'Carl', 'Chur']]
+            with pytest.raises(IndexError):
+                document[3]
+
+    def test_column_projection(self, tsv_file):
+        with MappedTsvTableDocument() as document:
+            document.load_from_file(tsv_file)
+            assert document.get_row(0, columns=['city', 'id']) == ['Bern', '1']
+            assert list(document.get_column('name')) == ['Änne', 'Bob', 'Carl']
+            assert list(document.iter_rows(columns=[0], start=1)) == [['2'], ['3']]
+            with pytest.raises(KeyError):
+                document.get_row(0, columns=['zip'])
+
+    def test_empty_file(self, tmp_path):
+        filepath = tmp_path / 'empty.tsv'
+        filepath.write_bytes(b'')
+        with MappedTsvTableDocument() as document:
+            document.load_from_file(str(filepath))
+            assert len(document) == 0